@@ -12,7 +12,15 @@
 
 __all__ = ["getStateColorMap", "getColorFromState",
            "getCSSColorFromState",
-           "getBgColorFromState", "getFgColorFromState"]
+           "getBgColorFromState", "getFgColorFromState",
+           "registerStateColor", "addStateColorMapListener",
+           "removeStateColorMapListener",
+           "getStateRGBATable", "getRGBAFromStates", "getBgFgRGBAFromStates"]
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from qarbon.meta import State
 
@@ -67,9 +75,33 @@ __STATE_COLOR_MAP = {
     None:                (darkgray, white),  # None == _Invalid
 }
 
+#: dict<State, str> CSS string for each state (see :func:`getCSSColorFromState`)
+__STATE_CSS_MAP = {}
+
+#: uint8 array of shape (2, max state value + 1, 4): RGBA background (0) and
+#: foreground (1) color for each state value (see :func:`getStateRGBATable`)
+__STATE_RGBA_TABLE = None
+
+#: callables to be notified when the state color map changes
+__STATE_COLOR_MAP_LISTENERS = []
+
+
+def __toCSS(bg, fg):
+    return "background-color: rgba{0}; color: rgba{1};".format(bg, fg)
+
+
+def __buildCSSMap():
+    global __STATE_CSS_MAP
+    __STATE_CSS_MAP = dict([(state, __toCSS(bg, fg))
+                            for state, (bg, fg) in __STATE_COLOR_MAP.items()])
+
+
+__buildCSSMap()
+
 
 def getStateColorMap():
-    """Returns the map used for color states.
+    """Returns the map used for color states. It should not be changed
+    directly: use :func:`registerStateColor` instead.
 
     dict<State, tuple<bg color(tuple<R (int), G (int), B (int)>, A (int)>),
     fg color(tuple<R (int), G (int), B (int), A (int)>)>>
@@ -94,8 +126,7 @@ def getCSSColorFromState(state):
 
     :return: a CSS string representing the color for the given state
     :rtype: str"""
-    bg, fg = getColorFromState(state)
-    return "background-color: rgba{0}; color: rgba{1};".format(bg, fg)
+    return __STATE_CSS_MAP[state]
 
 
 def getBgColorFromState(state):
@@ -114,3 +145,130 @@ def getFgColorFromState(state):
     :return: the foreground color for the given state
     :rtype: tuple"""
     return getColorFromState(state)[1]
+
+
+def registerStateColor(state, bg, fg):
+    """Sets the background and foreground colors for the given state.
+    All tables derived from the state color map (CSS, Qt colors, brushes and
+    palettes) are rebuilt.
+
+    :param state: the state
+    :type state: State
+    :param bg: background color tuple<R (int), G (int), B (int), A (int)>
+    :type bg: tuple
+    :param fg: foreground color tuple<R (int), G (int), B (int), A (int)>
+    :type fg: tuple"""
+    bg, fg = tuple(bg), tuple(fg)
+    __STATE_COLOR_MAP[state] = bg, fg
+    if state is State._Invalid:
+        __STATE_COLOR_MAP[None] = bg, fg
+    __buildCSSMap()
+    global __STATE_RGBA_TABLE
+    __STATE_RGBA_TABLE = None
+    for listener in __STATE_COLOR_MAP_LISTENERS:
+        listener()
+
+
+def addStateColorMapListener(listener):
+    """Adds a callable (without arguments) to be called when the state color
+    map changes through :func:`registerStateColor`.
+
+    :param listener: callable to be notified
+    :type listener: callable"""
+    if listener not in __STATE_COLOR_MAP_LISTENERS:
+        __STATE_COLOR_MAP_LISTENERS.append(listener)
+
+
+def removeStateColorMapListener(listener):
+    """Removes a callable previously added with
+    :func:`addStateColorMapListener`.
+
+    :param listener: callable to be removed
+    :type listener: callable"""
+    if listener in __STATE_COLOR_MAP_LISTENERS:
+        __STATE_COLOR_MAP_LISTENERS.remove(listener)
+
+
+def getStateRGBATable():
+    """Returns the lookup table used to convert state values into colors:
+    a uint8 numpy array of shape (2, N, 4) where [0, v] is the background
+    RGBA color and [1, v] the foreground RGBA color of the state with value
+    *v*. The table is built once (and rebuilt when the state color map
+    changes) so it should not be modified.
+
+    :return: the state color lookup table
+    :rtype: numpy.ndarray"""
+    global __STATE_RGBA_TABLE
+    if __STATE_RGBA_TABLE is None:
+        states = list(State)
+        table = numpy.empty((2, max([s.value for s in states]) + 1, 4),
+                            dtype=numpy.uint8)
+        table[:] = numpy.array(__STATE_COLOR_MAP[State._Invalid])[:, None]
+        for state in states:
+            table[:, state.value] = __STATE_COLOR_MAP[state]
+        __STATE_RGBA_TABLE = table
+    return __STATE_RGBA_TABLE
+
+
+def __toStateIndexes(states, size):
+    """Converts a sequence of states into a numpy array of valid table
+    indexes. None, State._Invalid and out of range values become
+    State._Invalid"""
+    invalid = State._Invalid.value
+    states = numpy.asarray(states)
+    if states.dtype == object:
+        # slow path: sequence with State members and/or None
+        indexes = numpy.empty(states.shape, dtype=numpy.intp)
+        flat = indexes.reshape(-1)
+        for i, state in enumerate(states.flat):
+            if state is None:
+                flat[i] = invalid
+            else:
+                flat[i] = getattr(state, "value", state)
+        states = indexes
+    elif not numpy.issubdtype(states.dtype, numpy.integer):
+        raise TypeError("states must be an array of integers (got %s)"
+                        % states.dtype)
+    out_of_range = (states < 0) | (states >= size)
+    if out_of_range.any():
+        states = numpy.where(out_of_range, invalid, states)
+    return states
+
+
+def getRGBAFromStates(states, foreground=False, out=None):
+    """Returns the background (or foreground) colors for the given array of
+    state values as a uint8 numpy array of shape states.shape + (4,).
+
+    Values are integer :class:`~qarbon.meta.State` values. Negative or
+    unknown values (and None if states is a sequence of objects) are
+    mapped to the color of State._Invalid.
+
+    The bytes of the result are in R, G, B, A order so a 2D array of states
+    can be converted directly into a QImage.Format_RGBA8888 buffer (given as
+    *out*).
+
+    :param states: the state values
+    :type states: numpy.ndarray
+    :param foreground: if True return foreground colors
+    :type foreground: bool
+    :param out: optional uint8 array of shape states.shape + (4,) where to
+                put the result
+    :type out: numpy.ndarray
+    :return: the colors for the given states
+    :rtype: numpy.ndarray"""
+    table = getStateRGBATable()[int(bool(foreground))]
+    indexes = __toStateIndexes(states, len(table))
+    return table.take(indexes, axis=0, out=out)
+
+
+def getBgFgRGBAFromStates(states):
+    """Returns the background and foreground colors for the given array of
+    state values (see :func:`getRGBAFromStates`).
+
+    :param states: the state values
+    :type states: numpy.ndarray
+    :return: background colors, foreground colors
+    :rtype: tuple<numpy.ndarray, numpy.ndarray>"""
+    table = getStateRGBATable()
+    indexes = __toStateIndexes(states, table.shape[1])
+    return table[0].take(indexes, axis=0), table[1].take(indexes, axis=0)
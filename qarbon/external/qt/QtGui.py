@@ -19,6 +19,10 @@ if __backend == 'PyQt4':
 elif __backend == 'PyQt5':
     from PyQt5.QtGui import *
     from PyQt5.QtWidgets import *
+    # Qt5 moved these from QtGui to QtCore
+    from PyQt5.QtCore import QAbstractProxyModel, QSortFilterProxyModel, \
+        QItemSelection, QItemSelectionModel, QItemSelectionRange, \
+        QStringListModel
 elif __backend == 'PySide':
     from PySide.QtGui import *
 
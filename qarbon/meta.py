@@ -10,7 +10,8 @@
 
 """Meta information for qarbon."""
 
-__all__ = ["DataAccess", "DataType", "State"]
+__all__ = ["DataAccess", "DataType", "State", "enumLookup",
+           "toDataAccess", "toState"]
 
 import sys
 
@@ -20,6 +21,44 @@ from qarbon.util import isString
 _PY3 = sys.version_info[0] > 2
 
 
+def enumLookup(enum_class):
+    """Returns a function which converts a value into a member of the given
+    enumeration of small, non negative integers. The function is equivalent
+    to ``enum_class(value)`` but uses a tuple indexed by value instead of
+    going through the Enum machinery, which is much faster in hot paths.
+    Members are returned unchanged. The tuple is available as the *table*
+    attribute of the returned function.
+
+    :param enum_class: the enumeration class
+    :type enum_class: Enum
+    :return: a function which receives a value and returns a member
+    :rtype: callable"""
+    members = [m for m in enum_class if isinstance(m.value, int) and
+               not isinstance(m.value, bool) and m.value >= 0]
+    table = [None] * (max([m.value for m in members] + [-1]) + 1)
+    for member in members:
+        table[member.value] = member
+    table = tuple(table)
+
+    def fromValue(value):
+        if value.__class__ is enum_class:
+            return value
+        try:
+            if value >= 0:
+                member = table[value]
+                if member is not None:
+                    return member
+        except (TypeError, IndexError):
+            pass
+        # not in the table: let Enum give the answer (or raise ValueError)
+        return enum_class(value)
+
+    fromValue.table = table
+    fromValue.__doc__ = "Converts a value into a :class:`{0}`".format(
+        enum_class.__name__)
+    return fromValue
+
+
 class DataAccess(Enum):
     """Data access enum"""
 
@@ -81,14 +120,16 @@ class DataType(Enum):
     def toPythonType(dtype):
         """Convert from DataType to python type"""
         dtype = DataType.toDataType(dtype)
-        return DataType.__PYTYPE_MAP[dtype]
+        return DataType.__PYTYPE_MAP[dtype.value]
 
     @staticmethod
     def toDataType(dtype):
         """Convert from type to DataType"""
+        if dtype.__class__ is DataType:
+            return dtype
         if isString(dtype):
             dtype = dtype.lower()
-        return DataType.__DTYPE_MAP[dtype]
+        return _toDataType(DataType.__DTYPE_MAP[dtype])
 
 
 class State(Enum):
@@ -97,3 +138,14 @@ class State(Enum):
 
     On, Off, Close, Open, Insert, Extract, Moving, Standby, Fault, Init, \
     Running, Alarm, Disable, Unknown, Disconnected, _Invalid = range(16)
+
+
+#: fast conversion from value to :class:`DataAccess`
+toDataAccess = enumLookup(DataAccess)
+
+#: fast conversion from value to :class:`DataType` (to convert from python
+#: types or type names use :meth:`DataType.toDataType`)
+_toDataType = enumLookup(DataType)
+
+#: fast conversion from value to :class:`State`
+toState = enumLookup(State)
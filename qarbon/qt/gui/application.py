@@ -27,6 +27,8 @@ program.
 
 __all__ = ["Application"]
 
+import os
+
 from qarbon import log
 from qarbon import config
 
@@ -56,7 +58,14 @@ def Application(argv=None, **kwargs):
         label.show()
         app.exec_()
 
-    :param kwargs: currently unused
+    :param kwargs: *profile_events* (bool): create a
+                   :class:`~qarbon.qt.gui.eventprofiler.ProfilingApplication`
+                   so an :class:`~qarbon.qt.gui.eventprofiler.EventProfiler`
+                   can time the events [default: False];
+                   *paint_heatmap* (bool): enable the
+                   :mod:`~qarbon.qt.gui.paintprofiler` repaint heatmap
+                   [default: True if the QARBON_PAINT_HEATMAP environment
+                   variable is set to a non zero value, False otherwise]
     :return: the QApplication
     :rtype: QtGui.QApplication"""
 
@@ -71,7 +80,11 @@ def Application(argv=None, **kwargs):
     if app is None:
         if argv is None:
             from sys import argv
-        app = QtGui.QApplication(argv)
+        if kwargs.get('profile_events', False):
+            from qarbon.qt.gui.eventprofiler import ProfilingApplication
+            app = ProfilingApplication(argv)
+        else:
+            app = QtGui.QApplication(argv)
 
         init_application = kwargs.get('init_application', True)
         init_organization = kwargs.get('init_organization', True)
@@ -89,6 +102,12 @@ def Application(argv=None, **kwargs):
                                     config.ORGANIZATION_DOMAIN)
             app.setOrganizationDomain(org_domain)
 
+        paint_heatmap = kwargs.get('paint_heatmap',
+            os.environ.get('QARBON_PAINT_HEATMAP', '0') not in ('', '0'))
+        if paint_heatmap:
+            from qarbon.qt.gui.paintprofiler import setPaintHeatmapEnabled
+            setPaintHeatmapEnabled(True)
+
     elif argv:
         log.info("QApplication already initialized. argv will have no "
                  "effect")
@@ -14,7 +14,7 @@ __all__ = ["Axis", "AxesWidget"]
 
 import weakref
 
-from qarbon.meta import State
+from qarbon.meta import State, toState
 from qarbon.color import getCSSColorFromState
 from qarbon.external.enum import Enum
 from qarbon.external.qt import QtCore, QtGui
@@ -159,6 +159,8 @@ class ValueSpinBox(QtGui.QDoubleSpinBox):
     def setState(self, state):
         if state is None:
             state = State._Invalid
+        else:
+            state = toState(state)
         styleSheet = getCSSColorFromState(state)
         self.setStyleSheet(self.SpinStyleT % styleSheet)
 
@@ -412,6 +414,8 @@ class Axis(QtCore.QObject):
         old_state = self._state
         if state is None:
             state = State._Invalid
+        else:
+            state = toState(state)
         self._state = state
         if emit:
             self.stateChanged.emit(self.name, old_state, state)
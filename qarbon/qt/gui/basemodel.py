@@ -10,13 +10,34 @@
 
 """A base model and a base tree item."""
 
-__all__ = ["BaseTreeItem", "BaseModel", "BaseProxyModel"]
+__all__ = ["BaseTreeItem", "BaseModel", "BaseProxyModel", "ModelSearchIndex"]
 
+import re
+import time
+import bisect
+import threading
+
+from qarbon import log
 from qarbon.external.qt import QtCore, QtGui
 
 
+# children of the nodes which have none (shared to save memory)
+_NoChildren = ()
+
+# marks a role value which is not in the role cache
+_NoValue = object()
+
+
 class BaseTreeItem(object):
-    """A generic node"""
+    """A generic node.
+
+    Nodes use ``__slots__`` and leaf nodes share an empty tuple of children
+    so that models with millions of nodes remain affordable. Subclasses
+    which do not define ``__slots__`` get a regular instance dictionary."""
+
+    __slots__ = ("_model", "_itemData", "_parentItem", "_childItems",
+                 "_pending", "_row", "_depth", "_display", "_roleCache",
+                 "__weakref__")
 
     DisplayFunc = str
 
@@ -24,7 +45,10 @@ class BaseTreeItem(object):
         self._model = model
         self._itemData = data
         self._parentItem = parent
-        self._childItems = []
+        self._childItems = _NoChildren
+        self._pending = None
+        self._roleCache = None
+        self._row = 0
         self._depth = self._calcDepth()
 
     def itemData(self):
@@ -46,7 +70,74 @@ class BaseTreeItem(object):
 
         :param child: (BaseTreeItem) child to be added
         """
-        self._childItems.append(child)
+        children = self._mutableChildren()
+        child._row = len(children)
+        children.append(child)
+
+    def insertChild(self, row, child):
+        """Inserts a new child node at the given row
+
+        :param row: (int) row where the child should be inserted
+        :param child: (BaseTreeItem) child to be inserted
+        """
+        child._row = row
+        self._mutableChildren().insert(row, child)
+
+    def removeChild(self, row):
+        """Removes the child node at the given row
+
+        :param row: (int) row of the child to be removed
+        :return: (BaseTreeItem) the removed child node
+        """
+        return self._mutableChildren().pop(row)
+
+    def _mutableChildren(self):
+        """Returns the list of children, creating it for a leaf node"""
+        children = self._childItems
+        if children is _NoChildren:
+            children = self._childItems = []
+        return children
+
+    def _updateRows(self):
+        """Renumbers the row of every child node"""
+        for row, child in enumerate(self._childItems):
+            child._row = row
+
+    def key(self):
+        """Returns the key that identifies this node among its siblings.
+        It is used to match nodes when the model is refreshed
+        incrementally. This implementation returns the item data (as a
+        tuple if it is a list). Subclasses holding unhashable data must
+        override it.
+
+        :return: (object) hashable key for this node
+        """
+        data = self._itemData
+        if isinstance(data, list):
+            data = tuple(data)
+        return data
+
+    def updateFrom(self, other):
+        """Updates this node with the data of a node with the same key.
+        The node children are not touched.
+
+        :param other: (BaseTreeItem) node holding the new data
+        :return: (bool) True if the data changed or False otherwise
+        """
+        if self._itemData == other._itemData:
+            return False
+        self._itemData = other._itemData
+        self.invalidateRoleCache()
+        return True
+
+    def invalidateRoleCache(self):
+        """Forgets the cached display string and role values of this node.
+        Must be called when the node data changes."""
+        self._roleCache = None
+        try:
+            del self._display
+        except AttributeError:
+            pass
 
     def child(self, row):
         """Returns the child in the given row
@@ -62,7 +153,80 @@ class BaseTreeItem(object):
         return len(self._childItems)
 
     def hasChildren(self):
-        return len(self._childItems) > 0
+        return len(self._childItems) > 0 or self._pending is not None
+
+    def setPendingChildren(self, sources):
+        """Sets the sources of children which are not built yet. Each source
+        will be given to :meth:`createChild` when the children are fetched
+        (see :meth:`fetchMore`).
+
+        :param sources: sequence of child sources
+        :type sources: sequence
+        """
+        self._pending = pending = list(sources) or None
+        if pending is not None and self._model is not None:
+            self._model._hasPendingChildren = True
+
+    def pendingCount(self):
+        """Returns the number of children which are not built yet
+
+        :return: (int) number of children not built yet
+        """
+        if self._pending is None:
+            return 0
+        return len(self._pending)
+
+    def canFetchMore(self):
+        """Tells if there are children which are not built yet
+
+        :return: (bool) True if there are more children to build
+        """
+        return self._pending is not None
+
+    def fetchMore(self, count=None):
+        """Builds (and appends) the next children from the pending sources
+
+        :param count: maximum number of children to build
+                      [default: None, meaning all of them]
+        :type count: int
+        :return: (int) number of children built
+        """
+        children = self._buildPending(count)
+        for child in children:
+            self.appendChild(child)
+        return len(children)
+
+    def _buildPending(self, count=None):
+        """Builds (without appending them) the next children from the
+        pending sources. The sources for which :meth:`createChild` returns
+        None are dropped.
+
+        :return: (list<BaseTreeItem>) the new children
+        """
+        pending = self._pending
+        if pending is None:
+            return []
+        if count is None or count >= len(pending):
+            sources, self._pending = pending, None
+        else:
+            sources, self._pending = pending[:count], pending[count:]
+        children = []
+        for source in sources:
+            child = self.createChild(source)
+            if child is not None:
+                children.append(child)
+        return children
+
+    def createChild(self, source):
+        """Builds a child node from the given source. Called by
+        :meth:`fetchMore`. This implementation builds a node of the same
+        type with source as data. Subclasses may return None to skip a
+        source which is no longer valid.
+
+        :param source: child source (see :meth:`setPendingChildren`)
+        :return: (BaseTreeItem) the new child node or None
+        """
+        return self.__class__(self._model, source, self)
 
     def data(self, index):
         """Returns the data of this node for the given index
@@ -83,6 +247,7 @@ class BaseTreeItem(object):
         :param data: (object) the data to be associated with this node
         """
         self._itemData = data
+        self.invalidateRoleCache()
 
     def parent(self):
         """Returns the parent node or None if no parent exists
@@ -96,9 +261,16 @@ class BaseTreeItem(object):
 
         :return: (int) row number for this node
         """
-        if self._parentItem is None:
+        parent = self._parentItem
+        if parent is None:
             return 0
-        return self._parentItem._childItems.index(self)
+        # the cached row becomes stale after an insert or remove on the
+        # parent: renumber all siblings once instead of scanning each time
+        row, children = self._row, parent._childItems
+        if row >= len(children) or children[row] is not self:
+            parent._updateRows()
+            row = self._row
+        return row
 
     def _calcDepth(self):
         d = 0
@@ -135,6 +307,85 @@ class BaseTreeItem(object):
         return self.display()
 
 
+def _rowRanges(rows):
+    """Returns the (first, last) contiguous ranges of the given rows"""
+    ranges = []
+    for row in sorted(set(rows)):
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return ranges
+
+
+class _RefreshCancelled(Exception):
+    """Internal exception raised in a worker thread by
+    :meth:`BaseModel.reportProgress` when the refresh has been superseded"""
+
+
+# the refresh job running in the current (worker) thread
+_refreshLocal = threading.local()
+
+
+class _RefreshJobSignals(QtCore.QObject):
+    """Internal signal holder for :class:`_RefreshJob`"""
+
+    #: emited with (generation, done, total) while the job runs
+    progress = QtCore.Signal(int, int, int)
+
+    #: emited with (generation, root item or None) when the job finishes
+    finished = QtCore.Signal(int, object)
+
+    #: emited with (generation, error message) when the job fails
+    failed = QtCore.Signal(int, str)
+
+
+class _RefreshJob(QtCore.QRunnable):
+    """Internal job which builds the items of a model on a worker thread"""
+
+    def __init__(self, generation, model, rootItem, data, signals):
+        QtCore.QRunnable.__init__(self)
+        self.setAutoDelete(False)
+        self.generation = generation
+        self.model = model
+        self.rootItem = rootItem
+        self.data = data
+        self.signals = signals
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def run(self):
+        result, error = None, None
+        _refreshLocal.job = self
+        try:
+            if not self._cancelled:
+                self.model.buildModelData(self.rootItem, self.data)
+                result = self.rootItem
+        except _RefreshCancelled:
+            pass
+        except Exception as e:
+            error = "{0}: {1}".format(type(e).__name__, e)
+            log.error("Error building model items: %s", error)
+            log.debug("Details:", exc_info=1)
+        finally:
+            _refreshLocal.job = None
+        if self._cancelled:
+            result, error = None, None
+        try:
+            if error is None:
+                self.signals.finished.emit(self.generation, result)
+            else:
+                self.signals.failed.emit(self.generation, error)
+        except RuntimeError:
+            # model has been destroyed in the meantime
+            pass
+
+
 class BaseModel(QtCore.QAbstractItemModel):
     """The base class for all Qt models."""
 
@@ -143,6 +394,24 @@ class BaseModel(QtCore.QAbstractItemModel):
 
     DftFont = QtGui.QFont("Mono", 8)
 
+    DftLazy = False
+
+    DftFetchChunkSize = 256
+
+    #: default minimum time (ms) between two emissions of item changes
+    #: (0 means on the next event loop iteration)
+    DftUpdateInterval = 0
+
+    #: Signal emited with (done, total) while the items are being built
+    refreshProgress = QtCore.Signal(int, int)
+
+    #: Signal emited when the model has been refreshed
+    refreshFinished = QtCore.Signal()
+
+    #: Signal emited with the error message when an asynchronous refresh
+    #: fails (the model keeps its items)
+    refreshFailed = QtCore.Signal(str)
+
     def __init__(self, parent=None, data=None):
         QtCore.QAbstractItemModel.__init__(self, parent)
         # if qt < 4.6, beginResetModel and endResetModel don't exist. In this
@@ -153,8 +422,38 @@ class BaseModel(QtCore.QAbstractItemModel):
             self.endResetModel = self.reset
         self._data_src = None
         self._rootItem = None
+        self._incrementalRefresh = False
+        self._lazy = self.DftLazy
+        self._fetchChunkSize = self.DftFetchChunkSize
+        self._roleHandlers = {
+            QtCore.Qt.DisplayRole: self._dataHandler,
+            QtCore.Qt.EditRole: self._dataHandler,
+            QtCore.Qt.DecorationRole: self._iconHandler,
+            QtCore.Qt.ToolTipRole: self._toolTipHandler,
+            QtCore.Qt.FontRole: self._fontHandler,
+            QtCore.Qt.UserRole: self._itemHandler,
+        }
+        self._cachedHandlers = {}
+        self._roleStatistics = {}
+        self._refreshJob = None
+        # running jobs (also the cancelled ones, which must stay alive
+        # until the thread pool is done with them)
+        self._refreshJobs = {}
+        self._refreshGeneration = 0
+        self._refreshIncremental = False
+        self._pendingChanges = {}
+        self._changeTimer = timer = QtCore.QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(self.DftUpdateInterval)
+        timer.timeout.connect(self.flushChanges)
+        self._refreshSignals = signals = _RefreshJobSignals()
+        signals.progress.connect(self._onRefreshJobProgress)
+        signals.finished.connect(self._onRefreshJobFinished)
+        signals.failed.connect(self._onRefreshJobFailed)
         self._filters = []
         self._selectables = [self.ColumnRoles[0][-1]]
+        self._searchIndex = None
+        self._hasPendingChildren = False
         self.setDataSource(data)
 
     def __getattr__(self, name):
@@ -163,13 +462,509 @@ class BaseModel(QtCore.QAbstractItemModel):
     def createNewRootItem(self):
         return BaseTreeItem(self, self.ColumnNames)
 
-    def refresh(self, refresh_source=False):
+    def refresh(self, refresh_source=False, incremental=None):
+        """Rebuilds the model items from the data source.
+
+        In incremental mode the new items are matched against the current
+        ones by :meth:`BaseTreeItem.key` and only the differences are
+        signaled (rows inserted, removed, moved and data changed), so
+        selection, expansion and persistent indexes are kept. Otherwise the
+        model is reset.
+
+        :param incremental:
+            True for an incremental refresh, False for a model reset
+            [default: None, meaning use :meth:`isIncrementalRefresh`]
+        :type incremental: bool
+        """
+        if incremental is None:
+            incremental = self._incrementalRefresh
+        self.cancelRefresh()
+        rootItem = self.createNewRootItem()
+        self._buildItems(rootItem, self.dataSource())
+        self._setRootItem(rootItem, incremental)
+        self.refreshFinished.emit()
+
+    def refreshAsync(self, incremental=None):
+        """Rebuilds the model items from the data source in a worker thread
+        and then replaces them (see :meth:`refresh`) in the GUI thread.
+        A refresh which is still running is cancelled. *refreshProgress* is
+        emited if :meth:`buildModelData` reports its progress and
+        *refreshFinished* is emited at the end (or *refreshFailed*, with the
+        error message, if :meth:`buildModelData` raises an exception).
+
+        If the model does not implement :meth:`buildModelData` the refresh
+        is done synchronously.
+
+        :param incremental:
+            True for an incremental refresh, False for a model reset
+            [default: None, meaning use :meth:`isIncrementalRefresh`]
+        :type incremental: bool
+        """
+        if not self.hasItemBuilder():
+            return self.refresh(incremental=incremental)
+        if incremental is None:
+            incremental = self._incrementalRefresh
+        self.cancelRefresh()
+        self._refreshIncremental = incremental
+        job = _RefreshJob(self._refreshGeneration, self,
+                          self.createNewRootItem(), self.dataSource(),
+                          self._refreshSignals)
+        self._refreshJob = self._refreshJobs[job.generation] = job
+        QtCore.QThreadPool.globalInstance().start(job)
+
+    def cancelRefresh(self):
+        """Cancels the asynchronous refresh which is running (if any)"""
+        self._refreshGeneration += 1
+        if self._refreshJob is not None:
+            self._refreshJob.cancel()
+            self._refreshJob = None
+
+    def isRefreshing(self):
+        """Tells if an asynchronous refresh is running
+
+        :return: True if an asynchronous refresh is running
+        :rtype: bool
+        """
+        return self._refreshJob is not None
+
+    def reportProgress(self, done, total):
+        """To be called by :meth:`buildModelData` to report its progress.
+        When called from a worker thread, it stops the build (by raising an
+        exception) if the refresh has been superseded or cancelled.
+
+        :param done: number of items built so far
+        :type done: int
+        :param total: total number of items
+        :type total: int
+        """
+        job = getattr(_refreshLocal, "job", None)
+        if job is None:
+            self.refreshProgress.emit(done, total)
+            return
+        if job.isCancelled():
+            raise _RefreshCancelled()
+        job.signals.progress.emit(job.generation, done, total)
+
+    def _onRefreshJobProgress(self, generation, done, total):
+        if generation == self._refreshGeneration:
+            self.refreshProgress.emit(done, total)
+
+    def _onRefreshJobFinished(self, generation, rootItem):
+        self._refreshJobs.pop(generation, None)
+        if generation != self._refreshGeneration:
+            return
+        self._refreshJob = None
+        if rootItem is not None:
+            self._setRootItem(rootItem, self._refreshIncremental)
+        self.refreshFinished.emit()
+
+    def _onRefreshJobFailed(self, generation, error):
+        self._refreshJobs.pop(generation, None)
+        if generation != self._refreshGeneration:
+            return
+        self._refreshJob = None
+        self.refreshFailed.emit(error)
+
+    def hasItemBuilder(self):
+        """Tells if the model implements :meth:`buildModelData` (and
+        therefore supports :meth:`refreshAsync`)
+
+        :return: True if the model implements buildModelData
+        :rtype: bool
+        """
+        return type(self).buildModelData is not BaseModel.buildModelData
+
+    def buildModelData(self, rootItem, data):
+        """Builds the model items for the given data source under
+        rootItem. Implement it instead of :meth:`setupModelData` to support
+        :meth:`refreshAsync`: it may then run in a worker thread so it must
+        only create items from plain python data and must not touch Qt
+        objects or the current model items.
+
+        :param rootItem: the new root item
+        :type rootItem: BaseTreeItem
+        :param data: the data source
+        """
+        raise NotImplementedError("buildModelData must be implemented "
+                                  "in %s" % self.__class__.__name__)
+
+    def _buildItems(self, rootItem, data):
+        if self.hasItemBuilder():
+            self.buildModelData(rootItem, data)
+            return
+        # setupModelData fills self._rootItem
+        oldRoot, self._rootItem = self._rootItem, rootItem
+        try:
+            self.setupModelData(data)
+        finally:
+            self._rootItem = oldRoot
+
+    def _setRootItem(self, rootItem, incremental):
+        oldRoot = self._rootItem
+        if incremental and oldRoot is not None and \
+                self._mergeItems(oldRoot, rootItem, QtCore.QModelIndex()):
+            return
+        # not incremental or siblings with duplicate keys cannot be matched
         self.beginResetModel()
-        self._rootItem = self.createNewRootItem()
-        self.setupModelData(self.dataSource())
+        self._pendingChanges = {}
+        self._rootItem = rootItem
         self.endResetModel()
 
+    def setIncrementalRefresh(self, yesno):
+        """Sets if :meth:`refresh` should update the model incrementally
+        instead of resetting it
+
+        :param yesno: True for incremental refresh or False otherwise
+        :type yesno: bool
+        """
+        self._incrementalRefresh = yesno
+
+    def isIncrementalRefresh(self):
+        """Tells if :meth:`refresh` updates the model incrementally
+
+        :return: True if refresh is incremental or False otherwise
+        :rtype: bool
+        """
+        return self._incrementalRefresh
+
+    def _mergeItems(self, oldItem, newItem, parent):
+        """Updates the children of oldItem so they match the ones of newItem,
+        emitting the corresponding model signals.
+
+        :return: (bool) False if the items could not be matched because
+                 of duplicate sibling keys or True otherwise
+        """
+        # build as many lazy children as the user has already fetched
+        missing = oldItem.childCount() - newItem.childCount()
+        if missing > 0:
+            newItem.fetchMore(missing)
+        oldItem._pending = newItem._pending
+        oldChildren = oldItem._childItems
+        newChildren = newItem._childItems
+        oldKeyList = [child.key() for child in oldChildren]
+        newKeyList = [child.key() for child in newChildren]
+
+        if oldKeyList != newKeyList:
+            try:
+                oldKeys = dict(zip(oldKeyList, oldChildren))
+                newKeys = set(newKeyList)
+            except TypeError:
+                raise TypeError("{0}.key() must return a hashable key "
+                                "for incremental refresh"
+                                .format(type(newChildren[0]).__name__))
+            if len(oldKeys) != len(oldKeyList) or \
+                    len(newKeys) != len(newKeyList):
+                return False
+            self._mergeRows(oldItem, newItem, parent, oldKeyList, oldKeys,
+                            newKeyList, newKeys)
+            oldChildren = oldItem._childItems
+
+        # same rows in the same order: update data and go down the tree
+        lastColumn = self.columnCount() - 1
+        for row, (oldChild, newChild) in enumerate(zip(oldChildren,
+                                                       newChildren)):
+            if oldChild is newChild:
+                # inserted by _mergeRows
+                continue
+            if oldChild.updateFrom(newChild):
+                self.dataChanged.emit(
+                    self.createIndex(row, 0, oldChild),
+                    self.createIndex(row, lastColumn, oldChild))
+            if oldChild._childItems or newChild._childItems:
+                childIndex = self.createIndex(row, 0, oldChild)
+                if not self._mergeItems(oldChild, newChild, childIndex):
+                    self._replaceChildren(oldChild, newChild, childIndex)
+        return True
+
+    def _mergeRows(self, oldItem, newItem, parent, oldKeyList, oldKeys,
+                   newKeyList, newKeys):
+        """Removes, inserts and moves rows of oldItem so its children match
+        (by key) the ones of newItem. Inserted rows are taken from newItem.
+        """
+        oldChildren = oldItem._mutableChildren()
+        newChildren = newItem._childItems
+
+        # remove rows which are gone, last ones first, in contiguous blocks
+        row = len(oldKeyList) - 1
+        while row >= 0:
+            if oldKeyList[row] in newKeys:
+                row -= 1
+                continue
+            last = row
+            while row > 0 and oldKeyList[row - 1] not in newKeys:
+                row -= 1
+            self.beginRemoveRows(parent, row, last)
+            del oldChildren[row:last + 1]
+            del oldKeyList[row:last + 1]
+            oldItem._updateRows()
+            self.endRemoveRows()
+            row -= 1
+
+        # insert new rows in contiguous blocks and move existing ones
+        row, nbNew = 0, len(newKeyList)
+        while row < nbNew:
+            oldChild = oldKeys.get(newKeyList[row])
+            if oldChild is None:
+                last = row
+                while last + 1 < nbNew and newKeyList[last + 1] not in oldKeys:
+                    last += 1
+                block = newChildren[row:last + 1]
+                self.beginInsertRows(parent, row, last)
+                for child in block:
+                    child._parentItem = oldItem
+                oldChildren[row:row] = block
+                oldItem._updateRows()
+                self.endInsertRows()
+                row = last + 1
+                continue
+            oldRow = oldChild.row()
+            if oldRow != row:
+                self.beginMoveRows(parent, oldRow, oldRow, parent, row)
+                del oldChildren[oldRow]
+                oldChildren.insert(row, oldChild)
+                oldItem._updateRows()
+                self.endMoveRows()
+            row += 1
+
+    def _replaceChildren(self, oldItem, newItem, parent):
+        oldChildren = oldItem._mutableChildren()
+        newChildren = newItem._childItems
+        oldItem._pending = newItem._pending
+        if oldChildren:
+            self.beginRemoveRows(parent, 0, len(oldChildren) - 1)
+            del oldChildren[:]
+            self.endRemoveRows()
+        if newChildren:
+            self.beginInsertRows(parent, 0, len(newChildren) - 1)
+            for child in newChildren:
+                child._parentItem = oldItem
+            oldChildren.extend(newChildren)
+            self.endInsertRows()
+
+    def setItemData(self, item, data, columns=None):
+        """Sets the data of the given item and schedules the emission of
+        the corresponding *dataChanged* (see :meth:`itemChanged`)
+
+        :param item: the item
+        :type item: BaseTreeItem
+        :param data: the new item data
+        :param columns: the columns which changed [default: None, meaning all]
+        :type columns: seq<int>
+        """
+        item.setData(None, data)
+        self.itemChanged(item, columns=columns)
+
+    def itemChanged(self, item, columns=None):
+        """Tells the model the data of the given item changed. Changes are
+        collected and, on the next event loop iteration (or after
+        :meth:`updateInterval`), emited as the smallest set of contiguous
+        *dataChanged* ranges per parent and column.
+
+        :param item: the item
+        :type item: BaseTreeItem
+        :param columns: the columns which changed [default: None, meaning all]
+        :type columns: seq<int>
+        """
+        item.invalidateRoleCache()
+        parentChanges = self._pendingChanges.setdefault(item._parentItem, {})
+        if columns is None:
+            parentChanges[item] = None
+        elif item in parentChanges:
+            itemColumns = parentChanges[item]
+            if itemColumns is not None:
+                itemColumns.update(columns)
+        else:
+            parentChanges[item] = set(columns)
+        timer = self._changeTimer
+        if not timer.isActive():
+            timer.start()
+
+    def setUpdateInterval(self, interval):
+        """Sets the minimum time between two emissions of item changes.
+        Use it to throttle data sources which update at high rates.
+
+        :param interval: interval (ms). 0 means the changes are emited on
+                         the next event loop iteration
+        :type interval: int
+        """
+        self._changeTimer.setInterval(interval)
+
+    def updateInterval(self):
+        """Returns the minimum time between two emissions of item changes
+
+        :return: interval (ms)
+        :rtype: int
+        """
+        return self._changeTimer.interval()
+
+    def resetUpdateInterval(self):
+        """Resets the minimum time between two emissions of item changes to
+        :attr:`DftUpdateInterval`"""
+        self.setUpdateInterval(self.DftUpdateInterval)
+
+    def flushChanges(self):
+        """Emits *dataChanged* for the item changes collected so far"""
+        self._changeTimer.stop()
+        changes, self._pendingChanges = self._pendingChanges, {}
+        lastColumn = self.columnCount() - 1
+        createIndex, emit = self.createIndex, self.dataChanged.emit
+        for parentItem, parentChanges in changes.items():
+            if not self._isAttached(parentItem):
+                continue
+            children = parentItem._childItems
+            rowsAll, rowsColumn = [], {}
+            for item, columns in parentChanges.items():
+                row = item.row()
+                if row >= len(children) or children[row] is not item:
+                    # removed in the meantime
+                    continue
+                if columns is None:
+                    rowsAll.append(row)
+                else:
+                    for column in columns:
+                        rowsColumn.setdefault(column, []).append(row)
+            ranges = [(first, last, 0, lastColumn)
+                      for first, last in _rowRanges(rowsAll)]
+            for column, rows in rowsColumn.items():
+                ranges.extend([(first, last, column, column)
+                               for first, last in _rowRanges(rows)])
+            for first, last, column1, column2 in ranges:
+                emit(createIndex(first, column1, children[first]),
+                     createIndex(last, column2, children[last]))
+
+    def _isAttached(self, item):
+        """Tells if the given item is (still) part of the model tree"""
+        rootItem = self._rootItem
+        while item is not rootItem:
+            parentItem = item._parentItem
+            if parentItem is None:
+                return False
+            row, children = item.row(), parentItem._childItems
+            if row >= len(children) or children[row] is not item:
+                return False
+            item = parentItem
+        return True
+
+    def setLazy(self, yesno):
+        """Sets if the model children should be built on demand. It is up to
+        :meth:`setupModelData` to honor this flag by giving pending children
+        (see :meth:`BaseTreeItem.setPendingChildren`) instead of building
+        the whole tree. Takes effect on the next :meth:`refresh`.
+
+        :param yesno: True for lazy child population or False otherwise
+        :type yesno: bool
+        """
+        self._lazy = yesno
+
+    def isLazy(self):
+        """Tells if the model children should be built on demand
+
+        :return: True if children are built on demand or False otherwise
+        :rtype: bool
+        """
+        return self._lazy
+
+    def setFetchChunkSize(self, size):
+        """Sets the maximum number of children built by each
+        :meth:`fetchMore`
+
+        :param size: maximum number of children built at once
+        :type size: int
+        """
+        self._fetchChunkSize = size
+
+    def fetchChunkSize(self):
+        """Returns the maximum number of children built by each
+        :meth:`fetchMore`
+
+        :return: maximum number of children built at once
+        :rtype: int
+        """
+        return self._fetchChunkSize
+
+    def resetFetchChunkSize(self):
+        """Resets the maximum number of children built by each
+        :meth:`fetchMore` to :attr:`DftFetchChunkSize`"""
+        self.setFetchChunkSize(self.DftFetchChunkSize)
+
+    def _fetch(self, parent, count):
+        if not parent.isValid():
+            parentItem = self._rootItem
+        else:
+            parentItem = parent.internalPointer()
+        if parentItem is None:
+            return
+        # build the children first: some sources may be skipped
+        children = parentItem._buildPending(count)
+        if not children:
+            return
+        first = parentItem.childCount()
+        self.beginInsertRows(parent, first, first + len(children) - 1)
+        for child in children:
+            parentItem.appendChild(child)
+        self.endInsertRows()
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            parentItem = self._rootItem
+        else:
+            parentItem = parent.internalPointer()
+        if parentItem is None:
+            return False
+        return parentItem.canFetchMore()
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        self._fetch(parent, self._fetchChunkSize)
+
+    def hasPendingChildren(self):
+        """Tells if some items may have children not built yet (see
+        :meth:`BaseTreeItem.setPendingChildren`). It is False after
+        :meth:`fetchAll` from the root until new pending children are set.
+
+        :return: True if some children may not be built yet or False
+                 otherwise
+        :rtype: bool
+        """
+        return self._hasPendingChildren
+
+    def fetchAll(self, parent=QtCore.QModelIndex()):
+        """Builds all pending children under the given index (recursively).
+        Useful before an operation that needs the whole tree like expanding
+        all items or filtering. Does nothing if no item has pending children
+        (see :meth:`hasPendingChildren`).
+
+        :param parent: index where to start [default: the root]
+        :type parent: QModelIndex
+        """
+        if not self._hasPendingChildren:
+            return
+        whole = not parent.isValid()
+        index = self.index
+        indexes = [parent]
+        while indexes:
+            parent = indexes.pop()
+            self._fetch(parent, None)
+            for row in range(self.rowCount(parent)):
+                child = index(row, 0, parent)
+                if self.hasChildren(child):
+                    indexes.append(child)
+        if whole:
+            self._hasPendingChildren = False
+
+    def searchIndex(self):
+        """Returns the full text search index of this model (built on the
+        first search and kept up to date as the model changes)
+
+        :return: the search index
+        :rtype: ModelSearchIndex
+        """
+        if self._searchIndex is None:
+            self._searchIndex = ModelSearchIndex(self)
+        return self._searchIndex
+
     def setupModelData(self, data):
+        """Builds the model items for the given data source under the root
+        item. Models may implement :meth:`buildModelData` instead."""
         raise NotImplementedError("setupModelData must be implemented "
                                   "in %s" % self.__class__.__name__)
 
@@ -187,7 +982,7 @@ class BaseModel(QtCore.QAbstractItemModel):
 
     def setDataSource(self, data_src):
         self._data_src = data_src
-        self.refresh()
+        self.refresh(incremental=False)
 
     def dataSource(self):
         return self._data_src
@@ -218,37 +1013,129 @@ class BaseModel(QtCore.QAbstractItemModel):
         s = self.roleSize(role)
         return s
 
+    #: roles which values are kept in the item role cache when it is enabled
+    CachedRoles = (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole,
+                   QtCore.Qt.DecorationRole, QtCore.Qt.ToolTipRole)
+
+    @staticmethod
+    def _dataHandler(item, index):
+        return item.data(index)
+
+    @staticmethod
+    def _iconHandler(item, index):
+        return item.icon(index)
+
+    @staticmethod
+    def _toolTipHandler(item, index):
+        return item.toolTip(index)
+
+    def _fontHandler(self, item, index):
+        return self.DftFont
+
+    @staticmethod
+    def _itemHandler(item, index):
+        return item
+
+    def setRoleHandler(self, role, handler):
+        """Sets the function which computes the value of the given role.
+        The function receives the item and the index and returns the value.
+
+        :param role: Qt item data role
+        :type role: int
+        :param handler: role handler or None to ignore the role
+        :type handler: callable
+        """
+        if handler is None:
+            self._roleHandlers.pop(role, None)
+        else:
+            self._roleHandlers[role] = handler
+        if self._cachedHandlers:
+            self._updateCachedHandlers()
+        self.invalidateRoleCache()
+
+    def roleHandler(self, role):
+        """Returns the function which computes the value of the given role
+
+        :param role: Qt item data role
+        :type role: int
+        :return: the role handler or None if the role is ignored
+        :rtype: callable
+        """
+        return self._roleHandlers.get(role)
+
+    def _updateCachedHandlers(self):
+        handlers = self._roleHandlers
+        self._cachedHandlers = dict([(role, handlers[role])
+                                     for role in self.CachedRoles
+                                     if role in handlers])
+
+    def setRoleCacheEnabled(self, yesno):
+        """Sets if the values of :attr:`CachedRoles` should be kept in the
+        items, computing them only once (until the item data changes).
+
+        :param yesno: True to enable the cache or False to disable it
+        :type yesno: bool
+        """
+        if yesno:
+            self._updateCachedHandlers()
+        else:
+            self._cachedHandlers = {}
+            self.invalidateRoleCache()
+
+    def isRoleCacheEnabled(self):
+        """Tells if the values of :attr:`CachedRoles` are kept in the items
+
+        :return: True if the role cache is enabled or False otherwise
+        :rtype: bool
+        """
+        return bool(self._cachedHandlers)
+
+    def invalidateRoleCache(self):
+        """Forgets the cached role values of all the items"""
+        items = [self._rootItem]
+        while items:
+            item = items.pop()
+            if item is None:
+                continue
+            item._roleCache = None
+            items.extend(item._childItems)
+
+    def getRoleStatistics(self):
+        """Returns the number of :meth:`data` calls for each role since the
+        last :meth:`resetRoleStatistics`
+
+        :return: map of role to number of calls
+        :rtype: dict
+        """
+        return dict(self._roleStatistics)
+
+    def resetRoleStatistics(self):
+        """Resets the number of :meth:`data` calls for each role"""
+        self._roleStatistics = {}
+
     def pyData(self, index, role=QtCore.Qt.DisplayRole):
         if not index.isValid():
             return None
-
-        item = index.internalPointer()
-
-        ret = None
-        if role == QtCore.Qt.DisplayRole or role == QtCore.Qt.EditRole:
-            ret = item.data(index)
-#        elif role == Qt.Qt.CheckStateRole:
-#            data = item.data(index)
-#            if type(data) != bool:
-#                data = str(data).lower() == 'true'
-#            ret = Qt.Qt.Unchecked
-#            if data == True:
-#                ret = Qt.Qt.Checked
-        elif role == QtCore.Qt.DecorationRole:
-            ret = item.icon(index)
-        elif role == QtCore.Qt.ToolTipRole:
-            ret = item.toolTip(index)
-        #elif role == Qt.Qt.SizeHintRole:
-        #    ret = self.columnSize(column)
-        elif role == QtCore.Qt.FontRole:
-            ret = self.DftFont
-        elif role == QtCore.Qt.UserRole:
-            ret = item
-        return ret
+        handler = self._cachedHandlers.get(role)
+        if handler is not None:
+            item = index.internalPointer()
+            cache = item._roleCache
+            if cache is None:
+                cache = item._roleCache = {}
+            key = role, index.column()
+            ret = cache.get(key, _NoValue)
+            if ret is _NoValue:
+                ret = cache[key] = handler(item, index)
+            return ret
+        handler = self._roleHandlers.get(role)
+        if handler is None:
+            return None
+        return handler(index.internalPointer(), index)
 
     def data(self, index, role=QtCore.Qt.DisplayRole):
-        ret = self.pyData(index, role)
-        return ret
+        stats = self._roleStatistics
+        stats[role] = stats.get(role, 0) + 1
+        return self.pyData(index, role)
 
     def _setData(self, index, pyobj, role=QtCore.Qt.EditRole):
         item = index.internalPointer()
@@ -287,16 +1174,20 @@ class BaseModel(QtCore.QAbstractItemModel):
         return ret
 
     def index(self, row, column, parent=QtCore.QModelIndex()):
-        if not self.hasIndex(row, column, parent):
-            return QtCore.QModelIndex()
+        # same checks as hasIndex() without going back and forth to C++
         if not parent.isValid():
             parentItem = self._rootItem
+        elif parent.column() > 0:
+            return QtCore.QModelIndex()
         else:
             parentItem = parent.internalPointer()
-        childItem = parentItem.child(row)
-        if childItem:
-            return self.createIndex(row, column, childItem)
-        return QtCore.QModelIndex()
+        if parentItem is None or row < 0 or column < 0 or \
+                column >= self.columnCount(parent):
+            return QtCore.QModelIndex()
+        children = parentItem._childItems
+        if row >= len(children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, children[row])
 
     def parent(self, index):
         if not index.isValid():
@@ -305,7 +1196,7 @@ class BaseModel(QtCore.QAbstractItemModel):
         childItem = index.internalPointer()
         parentItem = childItem.parent()
 
-        if parentItem is None or parentItem == self._rootItem:
+        if parentItem is None or parentItem is self._rootItem:
             return QtCore.QModelIndex()
 
         return self.createIndex(parentItem.row(), 0, parentItem)
@@ -335,8 +1226,46 @@ class BaseModel(QtCore.QAbstractItemModel):
         return parentItem.hasChildren()
 
 
+def _toFilterKey(value):
+    if value is None:
+        return ""
+    return "{0}".format(value).lower()
+
+
 class BaseProxyModel(QtGui.QSortFilterProxyModel):
-    """A base Qt filter & sort model"""
+    """A base Qt filter & sort model.
+
+    Besides the regular expression filter inherited from
+    QSortFilterProxyModel it provides a text filter (see
+    :meth:`setFilterText`) meant for large trees: the lower case filter key
+    of every source item is computed once, prefixes are looked up in a
+    sorted index and sub-strings narrow down the previous result when
+    possible. The filter is applied after the user stops typing
+    (see :meth:`setFilterDelay`) and it runs in small time slices of the
+    event loop, so a new text cancels a filter which is still running.
+    An item is accepted if it or any of its descendants matches.
+
+    With a :class:`BaseModel` source, the filter keys and the accepted
+    items are updated for the changed, inserted and removed rows only (a
+    model reset rebuilds them). Other sources are filtered again after any
+    change."""
+
+    #: emitted while the text filter runs with the number of items processed
+    #: and the total number of items
+    filterProgress = QtCore.Signal(int, int)
+
+    #: emitted when the text filter has been applied
+    filterFinished = QtCore.Signal()
+
+    #: default time (ms) to wait for more typed text before filtering
+    DftFilterDelay = 250
+
+    #: maximum time (ms) the text filter may run in one event loop iteration
+    FilterSliceTime = 20
+
+    #: above this number of inserted or removed items, the sorted filter
+    #: keys are rebuilt (on the next filter) rather than updated
+    SortedKeysUpdateLimit = 256
 
     def __init__(self, parent=None):
         QtGui.QSortFilterProxyModel.__init__(self, parent)
@@ -346,6 +1275,24 @@ class BaseProxyModel(QtGui.QSortFilterProxyModel):
         self.setFilterKeyColumn(0)
         self.setFilterRole(QtCore.Qt.DisplayRole)
 
+        # text filter
+        self._filterText = ""
+        self._filterSubstring = False
+        self._filterKeys = None
+        self._sortedFilterKeys = None
+        self._filterMatched = None
+        self._filterApplied = None
+        self._filterAccepted = None
+        self._filterDirty = False
+        self._filterJob = None
+        self._filterDelay = self.DftFilterDelay
+        self._filterTimer = timer = QtCore.QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(self._startFilter)
+        self._filterStepTimer = timer = QtCore.QTimer(self)
+        timer.setInterval(0)
+        timer.timeout.connect(self._stepFilter)
+
         # sort configuration
         self.setSortCaseSensitivity(QtCore.Qt.CaseInsensitive)
         self.setSortRole(QtCore.Qt.DisplayRole)
@@ -355,3 +1302,667 @@ class BaseProxyModel(QtGui.QSortFilterProxyModel):
 
     def __getattr__(self, name):
         return getattr(self.sourceModel(), name)
+
+    # (source signal, slot) updating the filter keys before the proxy
+    # filters the new or changed rows
+    _SourceSlots = (("modelReset", "_invalidateFilterKeys"),
+                    ("layoutChanged", "_onSourceLayoutChanged"),
+                    ("rowsMoved", "_onSourceLayoutChanged"),
+                    ("rowsInserted", "_onSourceRowsInserted"),
+                    ("rowsAboutToBeRemoved", "_onSourceRowsAboutToBeRemoved"),
+                    ("rowsRemoved", "_onSourceRowsRemoved"),
+                    ("dataChanged", "_onSourceDataChanged"))
+
+    # source signals after which the proxy is told about the ancestors
+    # accepted or rejected by the change
+    _SourcePostSignals = ("rowsInserted", "rowsRemoved", "dataChanged")
+
+    def setSourceModel(self, model):
+        old = self.sourceModel()
+        if old is not None:
+            slots = [(name, getattr(self, slot))
+                     for name, slot in self._SourceSlots]
+            slots += [(name, self._applyFilterChanges)
+                      for name in self._SourcePostSignals]
+            for name, slot in slots:
+                try:
+                    getattr(old, name).disconnect(slot)
+                except (TypeError, RuntimeError):
+                    pass
+        # slots are called in connection order: the filter keys are
+        # updated before QSortFilterProxyModel handles the change
+        if model is not None:
+            for name, slot in self._SourceSlots:
+                getattr(model, name).connect(getattr(self, slot))
+        QtGui.QSortFilterProxyModel.setSourceModel(self, model)
+        if model is not None:
+            for name in self._SourcePostSignals:
+                getattr(model, name).connect(self._applyFilterChanges)
+        self._invalidateFilterKeys()
+
+    def _invalidateFilterKeys(self, *args):
+        self._filterKeys = None
+        self._sortedFilterKeys = None
+        self._filterMatched = None
+        self._filterDirty = False
+        if self._filterText:
+            # re-apply the filter on the new data
+            self.cancelFilter()
+            self._filterTimer.start(self._filterDelay)
+
+    def _beginFilterKeysUpdate(self):
+        """Returns True if the filter keys must be updated for a source
+        change or False if there is nothing to update (or if everything is
+        rebuilt)"""
+        if not isinstance(self.sourceModel(), BaseModel):
+            self._invalidateFilterKeys()
+            return False
+        # the matches kept to narrow down the next filter are out of date
+        self._filterMatched = None
+        if self._filterJob is not None:
+            # the running filter may have seen the old items: start it again
+            self.cancelFilter()
+            self._filterTimer.start(self._filterDelay)
+        return self._filterKeys is not None
+
+    def _isFilterApplied(self):
+        """Tells if the accepted items must be updated for a source change
+        (they are recomputed by a pending filter)"""
+        return self._filterAccepted is not None and not self.isFiltering()
+
+    def _sourceParentItem(self, parent):
+        if parent.isValid():
+            return parent.internalPointer()
+        return self.sourceModel()._rootItem
+
+    @staticmethod
+    def _treeItems(item, row):
+        """Returns the (item, row) of the item and all its descendants,
+        parents first"""
+        result, items = [], [(item, row)]
+        while items:
+            item, row = items.pop()
+            result.append((item, row))
+            items.extend((child, r) for r, child in
+                         enumerate(item._childItems))
+        return result
+
+    def _addFilterKey(self, item, row):
+        source = self.sourceModel()
+        column, role = max(self.filterKeyColumn(), 0), self.filterRole()
+        key = self._filterKeys[item] = _toFilterKey(
+            source.pyData(source.createIndex(row, column, item), role))
+        sortedKeys = self._sortedFilterKeys
+        if sortedKeys is not None:
+            strings, items = sortedKeys
+            i = bisect.bisect_right(strings, key)
+            strings.insert(i, key)
+            items.insert(i, item)
+
+    def _removeFilterKey(self, item):
+        key = self._filterKeys.pop(item, None)
+        sortedKeys = self._sortedFilterKeys
+        if key is None or sortedKeys is None:
+            return
+        strings, items = sortedKeys
+        i = bisect.bisect_left(strings, key)
+        while items[i] is not item:
+            i += 1
+        del strings[i]
+        del items[i]
+
+    def _matchesFilter(self, item):
+        text, substring = self._filterApplied
+        key = self._filterKeys.get(item, "")
+        if substring:
+            return text in key
+        return key.startswith(text)
+
+    def _updateAccepted(self, item):
+        """Accepts or rejects the item according to its filter key and to
+        its children. Returns True if it changed"""
+        accepted = self._filterAccepted
+        isAccepted = self._matchesFilter(item) or \
+            any(child in accepted for child in item._childItems)
+        if isAccepted == (item in accepted):
+            return False
+        if isAccepted:
+            accepted.add(item)
+        else:
+            accepted.discard(item)
+        return True
+
+    def _updateAncestors(self, item):
+        """Updates the acceptance of the item and of its ancestors until one
+        doesn't change. Returns True if any changed"""
+        root = self.sourceModel()._rootItem
+        changed = False
+        while item is not None and item is not root and \
+                self._updateAccepted(item):
+            changed = True
+            item = item.parent()
+        return changed
+
+    def _onSourceLayoutChanged(self, *args):
+        # the items of a BaseModel keep their filter keys when moved
+        if not isinstance(self.sourceModel(), BaseModel):
+            self._invalidateFilterKeys()
+
+    def _onSourceRowsInserted(self, parent, first, last):
+        if not self._beginFilterKeysUpdate():
+            return
+        parentItem = self._sourceParentItem(parent)
+        children = parentItem._childItems
+        items = []
+        for row in range(first, last + 1):
+            items.extend(self._treeItems(children[row], row))
+        if len(items) > self.SortedKeysUpdateLimit:
+            self._sortedFilterKeys = None
+        for item, row in items:
+            self._addFilterKey(item, row)
+        if self._isFilterApplied():
+            # children first
+            for item, row in reversed(items):
+                self._updateAccepted(item)
+            # the proxy filters the inserted rows but not their ancestors
+            if self._updateAncestors(parentItem):
+                self._filterDirty = True
+
+    def _onSourceRowsAboutToBeRemoved(self, parent, first, last):
+        if not self._beginFilterKeysUpdate():
+            return
+        children = self._sourceParentItem(parent)._childItems
+        items = []
+        for row in range(first, last + 1):
+            items.extend(self._treeItems(children[row], row))
+        if len(items) > self.SortedKeysUpdateLimit:
+            self._sortedFilterKeys = None
+        accepted = self._filterAccepted
+        for item, row in items:
+            self._removeFilterKey(item)
+            if accepted is not None:
+                accepted.discard(item)
+
+    def _onSourceRowsRemoved(self, parent, first, last):
+        if isinstance(self.sourceModel(), BaseModel) and \
+                self._filterKeys is not None and self._isFilterApplied():
+            if self._updateAncestors(self._sourceParentItem(parent)):
+                self._filterDirty = True
+
+    def _onSourceDataChanged(self, topLeft, bottomRight, *args):
+        column = max(self.filterKeyColumn(), 0)
+        if not topLeft.column() <= column <= bottomRight.column():
+            return
+        if not self._beginFilterKeysUpdate():
+            return
+        children = self._sourceParentItem(topLeft.parent())._childItems
+        applied = self._isFilterApplied()
+        for row in range(topLeft.row(), bottomRight.row() + 1):
+            item = children[row]
+            self._removeFilterKey(item)
+            self._addFilterKey(item, row)
+            # the proxy filters the changed rows but not their ancestors
+            if applied and self._updateAccepted(item) and \
+                    self._updateAncestors(item.parent()):
+                self._filterDirty = True
+
+    def _applyFilterChanges(self, *args):
+        if self._filterDirty:
+            self._filterDirty = False
+            self.invalidate()
+
+    def setFilterText(self, text):
+        """Sets the text filter. Items which filter key (see
+        *filterKeyColumn* and *filterRole*) starts with (or contains, see
+        :meth:`setFilterSubstring`) the given text, ignoring case, are
+        accepted. An empty text disables the text filter. The filter is
+        applied after :meth:`filterDelay` ms.
+
+        :param text: the filter text
+        :type text: str
+        """
+        self._filterText = text
+        self.cancelFilter()
+        self._filterTimer.start(self._filterDelay)
+
+    def filterText(self):
+        """Returns the text filter
+
+        :return: the filter text
+        :rtype: str
+        """
+        return self._filterText
+
+    def setFilterSubstring(self, yesno):
+        """Sets if the text filter should match anywhere in the filter key
+        instead of only at its beginning
+
+        :param yesno: True to match sub-strings or False to match prefixes
+        :type yesno: bool
+        """
+        self._filterSubstring = yesno
+        if self._filterText:
+            self.setFilterText(self._filterText)
+
+    def isFilterSubstring(self):
+        """Tells if the text filter matches anywhere in the filter key
+
+        :return: True if the filter matches sub-strings or False if it only
+                 matches prefixes
+        :rtype: bool
+        """
+        return self._filterSubstring
+
+    def setFilterDelay(self, delay):
+        """Sets the time to wait for more typed text before filtering
+
+        :param delay: delay (ms)
+        :type delay: int
+        """
+        self._filterDelay = delay
+
+    def filterDelay(self):
+        """Returns the time to wait for more typed text before filtering
+
+        :return: delay (ms)
+        :rtype: int
+        """
+        return self._filterDelay
+
+    def resetFilterDelay(self):
+        """Resets the time to wait for more typed text before filtering to
+        :attr:`DftFilterDelay`"""
+        self.setFilterDelay(self.DftFilterDelay)
+
+    def isFiltering(self):
+        """Tells if a text filter is waiting to be applied or running
+
+        :return: True if a text filter is pending or False otherwise
+        :rtype: bool
+        """
+        return self._filterJob is not None or self._filterTimer.isActive()
+
+    def cancelFilter(self):
+        """Cancels the text filter which is waiting to be applied or running.
+        The current filter result is kept."""
+        self._filterTimer.stop()
+        self._filterStepTimer.stop()
+        self._filterJob = None
+
+    def applyFilter(self):
+        """Applies the pending text filter right away (blocking)"""
+        if self._filterTimer.isActive():
+            self._startFilter()
+        job = self._filterJob
+        if job is not None:
+            for _ in job:
+                pass
+
+    def _startFilter(self):
+        self.cancelFilter()
+        text = self._filterText.lower()
+        if not text:
+            self._filterApplied = None
+            self._filterAccepted = None
+            self.invalidate()
+            self.filterFinished.emit()
+            return
+        source = self.sourceModel()
+        if isinstance(source, BaseModel):
+            # the filter must see the children which are built on demand
+            source.fetchAll()
+        self._filterJob = self._filter(text)
+        self._filterStepTimer.start()
+
+    def _stepFilter(self):
+        job = self._filterJob
+        if job is None:
+            self._filterStepTimer.stop()
+            return
+        end = time.time() + self.FilterSliceTime / 1000.0
+        for _ in job:
+            if time.time() > end:
+                return
+
+    def _filter(self, text):
+        """Generator which applies the text filter. It yields regularly to
+        give the control back to the event loop."""
+        keys = self._filterKeys
+        if keys is None:
+            keys = {}
+            for _ in self._buildFilterKeys(keys):
+                yield
+            self._filterKeys = keys
+        total = len(keys)
+        substring = self._filterSubstring
+
+        last = self._filterMatched
+        if substring:
+            candidates = keys.items()
+            if last is not None and last[1] and last[0] in text:
+                # more text typed: only the previous matches may match
+                candidates = last[2]
+            matched = []
+            for i, (item, key) in enumerate(candidates):
+                if text in key:
+                    matched.append((item, key))
+                if not i % 1000:
+                    self.filterProgress.emit(i, total)
+                    yield
+        else:
+            sortedKeys = self._sortedFilterKeys
+            if sortedKeys is None:
+                pairs = sorted(keys.items(), key=lambda pair: pair[1])
+                sortedKeys = [pair[1] for pair in pairs], \
+                    [pair[0] for pair in pairs]
+                self._sortedFilterKeys = sortedKeys
+                yield
+            strings, items = sortedKeys
+            start = bisect.bisect_left(strings, text)
+            end = start
+            nb = len(strings)
+            while end < nb and strings[end].startswith(text):
+                end += 1
+            matched = list(zip(items[start:end], strings[start:end]))
+
+        # accept the matches and all their ancestors
+        accepted = set()
+        for i, (item, key) in enumerate(matched):
+            while item is not None and item not in accepted:
+                accepted.add(item)
+                item = item.parent()
+            if not i % 1000:
+                yield
+
+        self._filterJob = None
+        self._filterStepTimer.stop()
+        self._filterMatched = text, substring, matched
+        self._filterApplied = text, substring
+        self._filterAccepted = accepted
+        # a layout change is much cheaper than the row by row removals of
+        # invalidateFilter() on views with many expanded items
+        self.invalidate()
+        self.filterProgress.emit(total, total)
+        self.filterFinished.emit()
+
+    def _buildFilterKeys(self, keys):
+        """Generator which fills keys with the filter key of every item of
+        the source model"""
+        source = self.sourceModel()
+        if source is None:
+            return
+        column, role = max(self.filterKeyColumn(), 0), self.filterRole()
+        if isinstance(source, BaseModel):
+            # walk the items directly (much faster than source.index())
+            createIndex, data = source.createIndex, source.pyData
+            items = [source._rootItem]
+            while items:
+                item = items.pop()
+                if item is None:
+                    continue
+                for row, child in enumerate(item._childItems):
+                    keys[child] = _toFilterKey(
+                        data(createIndex(row, column, child), role))
+                    if child._childItems:
+                        items.append(child)
+                yield
+            return
+        index, data = source.index, source.data
+        rowCount, hasChildren = source.rowCount, source.hasChildren
+        parents = [QtCore.QModelIndex()]
+        while parents:
+            parent = parents.pop()
+            for row in range(rowCount(parent)):
+                child = index(row, 0, parent)
+                keyIndex = child if column == 0 else index(row, column, parent)
+                keys[child.internalPointer()] = _toFilterKey(
+                    data(keyIndex, role))
+                if hasChildren(child):
+                    parents.append(child)
+            yield
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        accepted = self._filterAccepted
+        if accepted is None:
+            return QtGui.QSortFilterProxyModel.filterAcceptsRow(
+                self, sourceRow, sourceParent)
+        source = self.sourceModel()
+        if isinstance(source, BaseModel):
+            if sourceParent.isValid():
+                parentItem = sourceParent.internalPointer()
+            else:
+                parentItem = source._rootItem
+            return parentItem._childItems[sourceRow] in accepted
+        index = source.index(sourceRow, 0, sourceParent)
+        return index.internalPointer() in accepted
+
+
+_SearchTokenRe = re.compile(r"\w+", re.UNICODE)
+_TagRe = re.compile(r"<[^>]*>")
+
+
+def _searchTokens(value):
+    """Returns the lower case words of a display or tool tip value (HTML
+    tags are ignored)"""
+    if value is None:
+        return ()
+    text = "{0}".format(value)
+    if "<" in text:
+        text = _TagRe.sub(" ", text)
+    return _SearchTokenRe.findall(text.lower())
+
+
+class ModelSearchIndex(QtCore.QObject):
+    """A full text search index of the items of a :class:`BaseModel`.
+
+    It is an inverted index from the words of the item texts (by default
+    the display text and the tool tip of every column) to the items. It is
+    built on the first search and then updated incrementally from the model
+    signals (a model reset throws it away). A search returns the items
+    having, for every word of the searched text, a word starting with it::
+
+        index = model.searchIndex()
+        items = index.search("motor 1")
+    """
+
+    DftRoles = QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole
+
+    def __init__(self, model, roles=None):
+        QtCore.QObject.__init__(self, model)
+        self._model = model
+        if roles is None:
+            roles = self.DftRoles
+        self._roles = tuple(roles)
+        self._itemTokens = None
+        self._tokenItems = None
+        self._sortedTokens = None
+        self._generation = 0
+        model.modelReset.connect(self.invalidate)
+        model.rowsInserted.connect(self._onRowsInserted)
+        model.rowsAboutToBeRemoved.connect(self._onRowsAboutToBeRemoved)
+        model.rowsMoved.connect(self._onChanged)
+        model.layoutChanged.connect(self._onChanged)
+        model.dataChanged.connect(self._onDataChanged)
+
+    def model(self):
+        """Returns the indexed model
+
+        :return: the model
+        :rtype: BaseModel
+        """
+        return self._model
+
+    def roles(self):
+        """Returns the indexed roles
+
+        :return: the indexed roles
+        :rtype: tuple<int>
+        """
+        return self._roles
+
+    def generation(self):
+        """Returns a number which changes every time the indexed items or
+        their order change (useful to cache search results)
+
+        :return: the index generation
+        :rtype: int
+        """
+        return self._generation
+
+    def isBuilt(self):
+        """Tells if the index is built
+
+        :return: True if the index is built or False otherwise
+        :rtype: bool
+        """
+        return self._itemTokens is not None
+
+    def invalidate(self):
+        """Throws the index away. It is rebuilt on the next search"""
+        self._itemTokens = None
+        self._tokenItems = None
+        self._sortedTokens = None
+        self._generation += 1
+
+    def build(self):
+        """(Re)builds the index from all the items of the model (the
+        children not yet fetched by a lazy model are not indexed, see
+        :meth:`BaseModel.fetchAll`)"""
+        self.invalidate()
+        self._itemTokens = {}
+        self._tokenItems = {}
+        root = self._model._rootItem
+        if root is not None:
+            for row, child in enumerate(root._childItems):
+                self._addTree(child, row)
+
+    def _itemWords(self, item, row):
+        model = self._model
+        createIndex, data = model.createIndex, model.pyData
+        words = set()
+        for column in range(model.columnCount()):
+            index = createIndex(row, column, item)
+            for role in self._roles:
+                words.update(_searchTokens(data(index, role)))
+        return words
+
+    def _addItem(self, item, row):
+        words = self._itemTokens[item] = frozenset(self._itemWords(item, row))
+        tokenItems = self._tokenItems
+        for word in words:
+            items = tokenItems.get(word)
+            if items is None:
+                items = tokenItems[word] = set()
+                self._sortedTokens = None
+            items.add(item)
+
+    def _removeItem(self, item):
+        words = self._itemTokens.pop(item, ())
+        tokenItems = self._tokenItems
+        for word in words:
+            items = tokenItems[word]
+            items.discard(item)
+            if not items:
+                del tokenItems[word]
+                self._sortedTokens = None
+
+    def _addTree(self, item, row):
+        items = [(item, row)]
+        while items:
+            item, row = items.pop()
+            self._addItem(item, row)
+            items.extend((child, r) for r, child in
+                         enumerate(item._childItems))
+
+    def _removeTree(self, item):
+        items = [item]
+        while items:
+            item = items.pop()
+            self._removeItem(item)
+            items.extend(item._childItems)
+
+    def _parentItem(self, parent):
+        if parent.isValid():
+            return parent.internalPointer()
+        return self._model._rootItem
+
+    def _onChanged(self, *args):
+        self._generation += 1
+
+    def _onRowsInserted(self, parent, first, last):
+        self._generation += 1
+        if not self.isBuilt():
+            return
+        children = self._parentItem(parent)._childItems
+        for row in range(first, last + 1):
+            self._addTree(children[row], row)
+
+    def _onRowsAboutToBeRemoved(self, parent, first, last):
+        self._generation += 1
+        if not self.isBuilt():
+            return
+        children = self._parentItem(parent)._childItems
+        for row in range(first, last + 1):
+            self._removeTree(children[row])
+
+    def _onDataChanged(self, topLeft, bottomRight, *args):
+        if not self.isBuilt():
+            return
+        self._generation += 1
+        children = self._parentItem(topLeft.parent())._childItems
+        for row in range(topLeft.row(), bottomRight.row() + 1):
+            item = children[row]
+            self._removeItem(item)
+            self._addItem(item, row)
+
+    def search(self, text):
+        """Returns the items matching the given text in tree order: every
+        word of the text must start a word of the item texts (case
+        insensitive). The index is built if needed.
+
+        :param text: the searched text
+        :type text: str
+        :return: the matching items
+        :rtype: list<BaseTreeItem>
+        """
+        words = _searchTokens(text)
+        if not words:
+            return []
+        if not self.isBuilt():
+            self.build()
+        tokens = self._sortedTokens
+        if tokens is None:
+            tokens = self._sortedTokens = sorted(self._tokenItems)
+        tokenItems = self._tokenItems
+        result = None
+        # longest (most selective) words first
+        for word in sorted(set(words), key=len, reverse=True):
+            matches = set()
+            i = bisect.bisect_left(tokens, word)
+            while i < len(tokens) and tokens[i].startswith(word):
+                matches.update(tokenItems[tokens[i]])
+                i += 1
+            if result is None:
+                result = matches
+            else:
+                result &= matches
+            if not result:
+                return []
+        return sorted(result, key=self.itemPath)
+
+    def itemPath(self, item):
+        """Returns the path (tuple of rows from the root) of the given item.
+        Paths sort in tree order.
+
+        :param item: the item
+        :type item: BaseTreeItem
+        :return: the item path
+        :rtype: tuple<int>
+        """
+        path = []
+        root = self._model._rootItem
+        while item is not None and item is not root:
+            path.append(item.row())
+            item = item._parentItem
+        path.reverse()
+        return tuple(path)
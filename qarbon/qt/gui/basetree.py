@@ -12,7 +12,11 @@
 
 __all__ = ["BaseTreeWidget"]
 
+import bisect
+import collections
+
 from qarbon.external.qt import QtCore, QtGui
+from qarbon.qt.gui.basemodel import BaseModel
 from qarbon.qt.gui.icon import getIcon
 from qarbon.qt.gui.action import getAction
 from qarbon.qt.gui.baseview import BaseToolBar, BaseModelWidget
@@ -156,12 +160,90 @@ class ExpansionBar(BaseToolBar):
         self.collapseSelectionTriggered.emit()
 
 
+class SearchToolBar(BaseToolBar):
+    """Internal widget providing a full text search with next/previous match
+    navigation to be placed in a _QToolArea"""
+
+    searchChanged = QtCore.Signal(str)
+    findNextTriggered = QtCore.Signal()
+    findPreviousTriggered = QtCore.Signal()
+
+    def __init__(self, view=None, parent=None, designMode=False):
+        BaseToolBar.__init__(self, name="Search toolbar", view=view,
+                             parent=parent, designMode=designMode)
+        searchLineEdit = self._searchLineEdit = QtGui.QLineEdit(self)
+        searchLineEdit.setSizePolicy(QtGui.QSizePolicy(
+                                            QtGui.QSizePolicy.Preferred,
+                                            QtGui.QSizePolicy.Preferred))
+        searchLineEdit.setToolTip("Search (Enter goes to the next match)")
+        searchLineEdit.textChanged.connect(self.onSearchChanged)
+        searchLineEdit.returnPressed.connect(self.onFindNext)
+        self.addWidget(searchLineEdit)
+
+        self._findPreviousAction = getAction("Previous", parent=self,
+            icon=getIcon("go-previous"),
+            tooltip="Go to the previous match",
+            triggered=self.onFindPrevious)
+        self._findNextAction = getAction("Next", parent=self,
+            icon=getIcon("go-next"),
+            tooltip="Go to the next match",
+            triggered=self.onFindNext)
+        self.addAction(self._findPreviousAction)
+        self.addAction(self._findNextAction)
+
+    def getSearchLineEdit(self):
+        return self._searchLineEdit
+
+    def onSearchChanged(self, text=None):
+        text = text or self.getSearchLineEdit().text()
+        self.searchChanged.emit(text)
+
+    def onFindNext(self):
+        self.findNextTriggered.emit()
+
+    def onFindPrevious(self):
+        self.findPreviousTriggered.emit()
+
+    def setSearchText(self, text):
+        self.getSearchLineEdit().setText(text)
+
+
 class BaseTreeWidget(BaseModelWidget):
     """A pure Qt tree widget implementing a tree with a navigation toolbar"""
 
+    #: default maximum number of nodes expanded in one event loop iteration
+    #: by :meth:`expandAllTree`
+    DftExpandChunkSize = 256
+
+    #: maximum number of rows visited or fetched in one event loop
+    #: iteration by :meth:`expandAllTree`
+    MaxExpandStepRows = 4096
+
+    #: maximum number of rows measured (besides the visible ones) by
+    #: :meth:`estimateColumnWidth`
+    MaxSampledRows = 256
+
+    #: extra space (pixels) around a cell text or icon
+    CellMargin = 8
+
+    #: maximum number of text widths kept in the cache
+    MaxTextWidthCache = 8192
+
+    _textWidths = {}
+
     def __init__(self, parent=None, with_navigation_bar=True,
                  with_filter_widget=True, with_selection_widget=True,
-                 with_refresh_widget=True, perspective=None, proxy=None):
+                 with_refresh_widget=True, perspective=None, proxy=None,
+                 with_search_widget=True):
+
+        self._searchText = ""
+        self._searchCache = None
+        self._expandQueue = None
+        self._expandCount = 0
+        self._expandChunkSize = self.DftExpandChunkSize
+        self._expandTimer = timer = QtCore.QTimer()
+        timer.setInterval(0)
+        timer.timeout.connect(self._expandStep)
 
         if with_navigation_bar:
             if isinstance(with_navigation_bar, (bool, int)):
@@ -171,6 +253,14 @@ class BaseTreeWidget(BaseModelWidget):
         else:
             self._with_navigation_bar = None
 
+        if with_search_widget:
+            if isinstance(with_search_widget, (bool, int)):
+                self._with_search_widget = SearchToolBar
+            else:
+                self._with_search_widget = with_search_widget
+        else:
+            self._with_search_widget = None
+
         BaseModelWidget.__init__(self, parent,
             with_filter_widget=with_filter_widget,
             with_selection_widget=with_selection_widget,
@@ -196,8 +286,21 @@ class BaseTreeWidget(BaseModelWidget):
             ta.append(n_bar)
         else:
             self._navigationToolBar = None
+
+        if self._with_search_widget:
+            s_bar = self._searchBar = \
+                self._with_search_widget(view=self, parent=self)
+            s_bar.searchChanged.connect(self.setSearchText)
+            s_bar.findNextTriggered.connect(self.findNext)
+            s_bar.findPreviousTriggered.connect(self.findPrevious)
+            ta.append(s_bar)
+        else:
+            self._searchBar = None
         return ta
 
+    def getSearchBar(self):
+        return self._searchBar
+
     def createViewWidget(self, klass=None):
         if klass is None:
             klass = QtGui.QTreeView
@@ -213,10 +316,70 @@ class BaseTreeWidget(BaseModelWidget):
         tree.expanded.connect(self.onExpanded)
         tree.clicked.connect(self._onClicked)
         tree.doubleClicked.connect(self._onDoubleClicked)
-        h = tree.header()
-        h.setResizeMode(0, QtGui.QHeaderView.Stretch)
         return tree
 
+    def setQModel(self, qmodel):
+        # the pending expansion belongs to the previous model
+        self.cancelExpandAll()
+        BaseModelWidget.setQModel(self, qmodel)
+        # the header has no sections (and Qt5 crashes setting their resize
+        # mode) until the view has a model
+        h = self.viewWidget().header()
+        if h.count() > 0:
+            # Qt5 renamed setResizeMode
+            setResizeMode = getattr(h, "setSectionResizeMode", None) or \
+                h.setResizeMode
+            setResizeMode(0, QtGui.QHeaderView.Stretch)
+
+    def saveViewState(self):
+        """Returns the state of the view (see
+        :meth:`BaseModelWidget.saveViewState`) including the expanded items
+        and the scroll position
+
+        :return: the view state
+        :rtype: dict
+        """
+        state = BaseModelWidget.saveViewState(self)
+        tree = self.viewWidget()
+        model = tree.model()
+        expanded = []
+        if model is not None:
+            Persistent = QtCore.QPersistentModelIndex
+            # only the children of expanded items can be expanded
+            parents = [tree.rootIndex()]
+            while parents:
+                parent = parents.pop()
+                for row in range(model.rowCount(parent)):
+                    index = model.index(row, 0, parent)
+                    if tree.isExpanded(index):
+                        expanded.append(Persistent(index))
+                        parents.append(index)
+        state["expanded"] = expanded
+        state["scroll"] = tree.verticalScrollBar().value(), \
+            tree.horizontalScrollBar().value()
+        return state
+
+    def restoreViewState(self, state):
+        """Restores a view state returned by :meth:`saveViewState`
+
+        :param state: the view state
+        :type state: dict
+        """
+        BaseModelWidget.restoreViewState(self, state)
+        tree = self.viewWidget()
+        # columns are resized once at the end, not on each expansion
+        tree.blockSignals(True)
+        try:
+            for index in state.get("expanded", ()):
+                tree.expand(QtCore.QModelIndex(index))
+        finally:
+            tree.blockSignals(False)
+        self.resizeColumns()
+        if "scroll" in state:
+            v, h = state["scroll"]
+            tree.verticalScrollBar().setValue(v)
+            tree.horizontalScrollBar().setValue(h)
+
     def treeView(self):
         return self.viewWidget()
 
@@ -230,19 +393,130 @@ class BaseTreeWidget(BaseModelWidget):
         return self._navigationToolBar.goUpAction()
 
     def expandAllTree(self):
-        sb = self.statusBar()
-        sb.showMessage("Expanding all items... (it may take a few seconds)")
-        QtCore.QTimer.singleShot(0, self._expandTree)
-
-    def _expandTree(self):
+        """Expands all the items, breadth first, :meth:`expandChunkSize`
+        nodes and at most :attr:`MaxExpandStepRows` visited or fetched rows
+        per event loop iteration so the GUI stays responsive. Calling it
+        while the items are being expanded cancels the expansion."""
+        if self.isExpandingAll():
+            self.cancelExpandAll()
+            return
         tree = self.viewWidget()
-        tree.expandAll()
-        self.statusBar().showMessage("All items expanded!", 3000)
+        # breadth first: [parent, next child row to visit, expanded]
+        self._expandQueue = collections.deque(
+            [[QtCore.QPersistentModelIndex(tree.rootIndex()), 0, True]])
+        self._expandCount = 0
+        self._expandBar._expandAllAction.setToolTip("Stop expanding items")
+        self.statusBar().showMessage("Expanding all items...")
+        self._expandTimer.start()
+
+    def isExpandingAll(self):
+        """Tells if all the items are being expanded
+
+        :return: True if the items are being expanded or False otherwise
+        :rtype: bool
+        """
+        return self._expandQueue is not None
+
+    def cancelExpandAll(self):
+        """Stops expanding all the items (the items already expanded stay
+        expanded)"""
+        if self.isExpandingAll():
+            self._finishExpandAll("Expansion stopped ({0} items expanded)"
+                                  .format(self._expandCount))
+
+    def setExpandChunkSize(self, size):
+        """Sets the maximum number of nodes expanded in one event loop
+        iteration by :meth:`expandAllTree`
+
+        :param size: maximum number of nodes expanded at once
+        :type size: int
+        """
+        self._expandChunkSize = size
+
+    def expandChunkSize(self):
+        """Returns the maximum number of nodes expanded in one event loop
+        iteration by :meth:`expandAllTree`
+
+        :return: maximum number of nodes expanded at once
+        :rtype: int
+        """
+        return self._expandChunkSize
+
+    def resetExpandChunkSize(self):
+        """Resets the maximum number of nodes expanded in one event loop
+        iteration to :attr:`DftExpandChunkSize`"""
+        self.setExpandChunkSize(self.DftExpandChunkSize)
+
+    def _expandStep(self):
+        queue = self._expandQueue
+        if queue is None:
+            self._expandTimer.stop()
+            return
+        tree = self.viewWidget()
+        model = tree.model()
+        rootIndex = tree.rootIndex()
+        count = rows = 0
+        maxRows = self.MaxExpandStepRows
+        while queue and count < self._expandChunkSize and rows < maxRows:
+            entry = queue[0]
+            parent, row = QtCore.QModelIndex(entry[0]), entry[1]
+            if parent.isValid():
+                if parent.model() is not model:
+                    # model changed in the meantime
+                    queue.popleft()
+                    continue
+            elif rootIndex.isValid():
+                # root index vanished in the meantime
+                queue.popleft()
+                continue
+            if not entry[2]:
+                entry[2] = True
+                tree.expand(parent)
+                count += 1
+            rowCount = model.rowCount(parent)
+            if row >= rowCount:
+                # children built on demand are only shown once fetched, one
+                # chunk at a time
+                if not model.canFetchMore(parent):
+                    queue.popleft()
+                    continue
+                model.fetchMore(parent)
+                fetched = model.rowCount(parent) - rowCount
+                if fetched <= 0:
+                    queue.popleft()
+                    continue
+                rows += fetched
+                continue
+            end = min(rowCount, row + maxRows - rows)
+            rows += end - row
+            for row in range(row, end):
+                child = model.index(row, 0, parent)
+                if model.hasChildren(child):
+                    queue.append([QtCore.QPersistentModelIndex(child), 0,
+                                  False])
+            entry[1] = end
+        self._expandCount += count
+        if queue:
+            self.statusBar().showMessage(
+                "Expanding all items... ({0} expanded, {1} pending)"
+                .format(self._expandCount, len(queue)))
+        else:
+            self._finishExpandAll("All items expanded!")
 
-    def onExpanded(self):
+    def _finishExpandAll(self, message):
+        self._expandTimer.stop()
+        self._expandQueue = None
+        self._expandBar._expandAllAction.setToolTip("Expand all items")
         self.resizeColumns()
+        self.statusBar().showMessage(message, 3000)
+
+    def onExpanded(self):
+        # while expanding all, columns are resized once at the end
+        if not self.isExpandingAll():
+            self.resizeColumns()
 
     def collapseAllTree(self):
+        self.cancelExpandAll()
         self.viewWidget().collapseAll()
 
     def expandSelectionTree(self):
@@ -257,13 +531,246 @@ class BaseTreeWidget(BaseModelWidget):
         if index.isValid():
             tree.collapse(index)
 
+    #--------------------------------------------------------------------------
+    # Search
+    #--------------------------------------------------------------------------
+
+    def setSearchText(self, text):
+        """Sets the text searched by :meth:`findNext` and
+        :meth:`findPrevious` (see :meth:`BaseModel.searchIndex`)
+
+        :param text: the searched text
+        :type text: str
+        """
+        self._searchText = text
+
+    def searchText(self):
+        """Returns the text searched by :meth:`findNext` and
+        :meth:`findPrevious`
+
+        :return: the searched text
+        :rtype: str
+        """
+        return self._searchText
+
+    def searchMatches(self):
+        """Returns the items matching the search text, in tree order
+
+        :return: the matching items
+        :rtype: list<BaseTreeItem>
+        """
+        return self._searchResult()[0]
+
+    def _searchResult(self):
+        model = self.getBaseQModel()
+        if not isinstance(model, BaseModel) or not self._searchText:
+            return [], []
+        index = model.searchIndex()
+        key = index, index.generation(), self._searchText
+        cache = self._searchCache
+        if cache is not None and cache[0] == key:
+            return cache[1]
+        # the search must see the children which are built on demand
+        if model.isLazy():
+            model.fetchAll()
+            key = index, index.generation(), self._searchText
+        items = index.search(self._searchText)
+        result = items, [index.itemPath(item) for item in items]
+        self._searchCache = key, result
+        return result
+
+    def findNext(self):
+        """Goes to the first item after the current one matching the search
+        text (wrapping around at the end)
+
+        :return: the item found or None if there is no match
+        :rtype: BaseTreeItem
+        """
+        return self._find(1)
+
+    def findPrevious(self):
+        """Goes to the last item before the current one matching the search
+        text (wrapping around at the beginning)
+
+        :return: the item found or None if there is no match
+        :rtype: BaseTreeItem
+        """
+        return self._find(-1)
+
+    def _find(self, step):
+        items, paths = self._searchResult()
+        statusBar = self.statusBar()
+        if not items:
+            if self._searchText:
+                statusBar.showMessage("No match for '{0}'"
+                                      .format(self._searchText), 3000)
+            return None
+        current = self._mapToSource(self.viewWidget().currentIndex())
+        if current.isValid():
+            path = self.getBaseQModel().searchIndex().itemPath(
+                current.internalPointer())
+        else:
+            path = ()
+        n = len(items)
+        if step > 0:
+            start = bisect.bisect_right(paths, path)
+        else:
+            start = bisect.bisect_left(paths, path) - 1
+        # skip the matches hidden by a filter
+        for i in range(n):
+            pos = (start + i * step) % n
+            if self.showItem(items[pos]):
+                statusBar.showMessage("Match {0} of {1}".format(pos + 1, n))
+                return items[pos]
+        statusBar.showMessage("No visible match for '{0}'"
+                              .format(self._searchText), 3000)
+        return None
+
+    def showItem(self, item):
+        """Makes the given item current, expanding only its ancestors and
+        scrolling to it
+
+        :param item: the item
+        :type item: BaseTreeItem
+        :return: True if the item was shown or False if it is not in the view
+                 (filtered out for example)
+        :rtype: bool
+        """
+        model = self.getBaseQModel()
+        index = self._mapFromSource(model.createIndex(item.row(), 0, item))
+        if not index.isValid():
+            return False
+        tree = self.viewWidget()
+        ancestors = []
+        parent = index.parent()
+        while parent.isValid():
+            ancestors.append(parent)
+            parent = parent.parent()
+        for ancestor in reversed(ancestors):
+            tree.expand(ancestor)
+        tree.setCurrentIndex(index)
+        tree.scrollTo(index)
+        return True
+
     def resizeColumns(self):
+        """Widens the columns which content (estimated from a sample of
+        rows, see :meth:`estimateColumnWidth`) does not fit. Columns are
+        never shrunk."""
         tree = self.viewWidget()
         model = tree.model()
         if model is None:
             return
-        for c in range(model.columnCount()):
-            tree.resizeColumnToContents(c)
+        indexes = self._sampleRows()
+        for column in range(model.columnCount()):
+            width = self.estimateColumnWidth(column, indexes)
+            if width > tree.columnWidth(column):
+                tree.setColumnWidth(column, width)
+
+    def estimateColumnWidth(self, column, indexes=None):
+        """Estimates the width needed by the given column. Instead of
+        measuring every row (like QTreeView.resizeColumnToContents) it only
+        measures the visible rows plus a stratified sample of the expanded
+        ones (at most :attr:`MaxSampledRows`), caching the text widths.
+
+        :param column: the column
+        :type column: int
+        :param indexes: rows (column 0 indexes) to measure
+                        [default: None, meaning a new sample]
+        :type indexes: seq<QModelIndex>
+        :return: the estimated width (pixels)
+        :rtype: int
+        """
+        tree = self.viewWidget()
+        model = tree.model()
+        if indexes is None:
+            indexes = self._sampleRows()
+        header = tree.header()
+        width = header.sectionSizeHint(column)
+        defaultFont = tree.font()
+        textWidth = self._textWidth
+        indentation = tree.indentation()
+        rootDecoration = tree.rootIsDecorated()
+        iconWidth = tree.iconSize().width()
+        if iconWidth < 0:
+            iconWidth = tree.style().pixelMetric(
+                QtGui.QStyle.PM_SmallIconSize)
+        Qt = QtCore.Qt
+        for index in indexes:
+            if column:
+                index = index.sibling(index.row(), column)
+            text = model.data(index, Qt.DisplayRole)
+            if text is None:
+                text = ""
+            font = model.data(index, Qt.FontRole)
+            if not isinstance(font, QtGui.QFont):
+                font = defaultFont
+            w = textWidth(font, "{0}".format(text)) + self.CellMargin
+            if model.data(index, Qt.DecorationRole) is not None:
+                w += iconWidth + self.CellMargin
+            if column == 0:
+                depth = int(rootDecoration)
+                parent = index.parent()
+                while parent.isValid():
+                    depth += 1
+                    parent = parent.parent()
+                w += depth * indentation
+            width = max(width, w)
+        return width
+
+    def _textWidth(self, font, text):
+        key = font.key(), text
+        widths = self._textWidths
+        try:
+            return widths[key]
+        except KeyError:
+            pass
+        if len(widths) >= self.MaxTextWidthCache:
+            widths.clear()
+        metrics = QtGui.QFontMetrics(font)
+        # Qt 5.11 deprecated width() in favor of horizontalAdvance()
+        measure = getattr(metrics, "horizontalAdvance", metrics.width)
+        width = widths[key] = measure(text)
+        return width
+
+    def _sampleRows(self):
+        """Returns the visible rows plus a stratified sample of the expanded
+        rows (column 0 indexes)"""
+        tree = self.viewWidget()
+        model = tree.model()
+        rows = []
+
+        # visible rows
+        viewport = tree.viewport()
+        height = viewport.height()
+        index = tree.indexAt(QtCore.QPoint(0, 0))
+        for i in range(self.MaxSampledRows):
+            if not index.isValid() or tree.visualRect(index).top() > height:
+                break
+            rows.append(index)
+            index = tree.indexBelow(index)
+
+        # stratified sample of the expanded rows: each level gets an even
+        # share of what is left of the budget
+        budget = self.MaxSampledRows
+        parents = [tree.rootIndex()]
+        while parents and budget > 0:
+            share = max(1, budget // len(parents))
+            children = []
+            for parent in parents:
+                n = model.rowCount(parent)
+                if n == 0:
+                    continue
+                step = max(1, n // share)
+                for row in range(0, n, step):
+                    child = model.index(row, 0, parent)
+                    rows.append(child)
+                    budget -= 1
+                    if tree.isExpanded(child):
+                        children.append(child)
+                if budget <= 0:
+                    break
+            parents = children
+        return rows
 
     def goIntoTree(self):
         tree = self.viewWidget()
@@ -14,9 +14,12 @@ __all__ = ["BaseModelWidget",
            "BaseToolBar", "FilterToolBar", "EditorToolBar", "SelectionToolBar",
            "RefreshToolBar", "PerspectiveToolBar"]
 
+import collections
+
 from qarbon.external.qt import QtCore, QtGui
 from qarbon.qt.gui.icon import getIcon
 from qarbon.qt.gui.action import Action
+from qarbon.qt.gui.basemodel import BaseModel, BaseProxyModel
 
 
 class BaseToolBar(QtGui.QToolBar):
@@ -244,6 +247,10 @@ class BaseModelWidget(QtGui.QMainWindow):
     KnownPerspectives = {}
     DftPerspective = None
 
+    #: default maximum number of perspective models kept alive (see
+    #: :meth:`setModelCacheSize`)
+    DftModelCacheSize = 4
+
     itemClicked = QtCore.Signal(object, int)
     itemDoubleClicked = QtCore.Signal(object, int)
     itemSelectionChanged = QtCore.Signal()
@@ -282,6 +289,10 @@ class BaseModelWidget(QtGui.QMainWindow):
             self._with_refresh_widget = None
 
         self._proxyModel = proxy
+        self._perspective = None
+        self._modelCache = collections.OrderedDict()
+        self._modelCacheSize = self.DftModelCacheSize
+        self._switchingPerspective = False
 
         toolBars = self.createToolArea()
         self._viewWidget = self.createViewWidget()
@@ -357,7 +368,26 @@ class BaseModelWidget(QtGui.QMainWindow):
         return self._refreshBar
 
     def onRefreshModel(self):
-        self.getQModel().refresh()
+        self.getBaseQModel().refreshAsync()
+
+    def onRefreshProgress(self, done, total):
+        if total > 0:
+            msg = "Refreshing... {0}%".format(100 * done // total)
+        else:
+            msg = "Refreshing... ({0} items)".format(done)
+        self.statusBar().showMessage(msg)
+
+    def onRefreshFinished(self):
+        self.statusBar().showMessage("Refreshed", 3000)
+        if not self._switchingPerspective:
+            # the data source may have changed in place: the models of the
+            # other perspectives are refreshed when switching back to them
+            for perspective, entry in self._modelCache.items():
+                if perspective != self._perspective:
+                    entry["stale"] = True
+
+    def onRefreshFailed(self, error):
+        self.statusBar().showMessage("Refresh failed: {0}".format(error))
 
     def onSelectAll(self):
         view = self.viewWidget()
@@ -400,12 +430,35 @@ class BaseModelWidget(QtGui.QMainWindow):
             model = model.sourceModel()
         return index
 
+    def _mapFromSource(self, index):
+        if not self.usesProxyQModel():
+            return index
+        proxies = []
+        model = self.getQModel()
+        while isinstance(model, QtGui.QAbstractProxyModel):
+            proxies.append(model)
+            model = model.sourceModel()
+        for proxy in reversed(proxies):
+            index = proxy.mapFromSource(index)
+        return index
+
     def setQModel(self, qmodel):
 
+        old_base = self._baseQModel
+        if isinstance(old_base, BaseModel):
+            old_base.refreshProgress.disconnect(self.onRefreshProgress)
+            old_base.refreshFinished.disconnect(self.onRefreshFinished)
+            old_base.refreshFailed.disconnect(self.onRefreshFailed)
+
         self._baseQModel = qmodel
         while isinstance(self._baseQModel, QtGui.QAbstractProxyModel):
             self._baseQModel = self._baseQModel.sourceModel()
 
+        if isinstance(self._baseQModel, BaseModel):
+            self._baseQModel.refreshProgress.connect(self.onRefreshProgress)
+            self._baseQModel.refreshFinished.connect(self.onRefreshFinished)
+            self._baseQModel.refreshFailed.connect(self.onRefreshFailed)
+
         view = self.viewWidget()
         old_smodel = view.selectionModel()
         if old_smodel is not None:
@@ -457,8 +510,16 @@ class BaseModelWidget(QtGui.QMainWindow):
         if not self.usesProxyQModel():
             return
         proxy_model = self.getQModel()
+        if isinstance(proxy_model, BaseProxyModel):
+            # indexed and debounced (lazy children are fetched when the
+            # filter is applied)
+            proxy_model.setFilterText(new_filter)
+            return
+        if len(new_filter) > 0:
+            # the filter must see the children which are built on demand
+            self.getBaseQModel().fetchAll()
         if len(new_filter) > 0 and new_filter[0] != '^':
-            new_filter = '^' + filter
+            new_filter = '^' + new_filter
         proxy_model.setFilterRegExp(new_filter)
         #proxy_model.setFilterFixedString(filter)
         #proxy_model.setFilterWildcard(filter)
@@ -475,34 +536,203 @@ class BaseModelWidget(QtGui.QMainWindow):
         return self._perspectiveBar.perspective()
 
     def onSwitchPerspective(self, perspective):
+        self._switchingPerspective = True
+        try:
+            self._switchPerspective(perspective)
+        finally:
+            self._switchingPerspective = False
+
+    def _switchPerspective(self, perspective):
         old_qmodel = self.getQModel()
-        self._setPerspective(perspective)
+        old_base = self.getBaseQModel()
+        stale = self._setPerspective(perspective)
 
         #set the selectables as they where in the previous model
         if hasattr(old_qmodel, "selectables"):
             self.getQModel().setSelectables(old_qmodel.selectables())
 
-        #set the taurus model (if any) to the qmodel
+        #set the taurus model (if any) to the qmodel, otherwise keep
+        #showing the same data source. A cached model built from another
+        #data source is rebuilt
+        data_src = None
         if hasattr(self, 'getModelObj'):
-            taurusModel = self.getModelObj()
-            if taurusModel is not None:
-                self.getQModel().setDataSource(taurusModel)
+            data_src = self.getModelObj()
+        if data_src is None and isinstance(old_base, BaseModel):
+            data_src = old_base.dataSource()
+        base = self.getBaseQModel()
+        if data_src is not None and isinstance(base, BaseModel) and \
+                base.dataSource() is not data_src:
+            base.setDataSource(data_src)
+        elif stale and isinstance(base, BaseModel):
+            base.refresh()
 
     def _setPerspective(self, perspective):
+        """Shows the model of the given perspective (cached or new)
+
+        :return: (bool) True if the model is cached but out of date
+        """
+        cache = self._modelCache
+        old_perspective = self._perspective
+        if old_perspective is not None and old_perspective in cache:
+            cache[old_perspective]["state"] = self.saveViewState()
+        self._perspective = perspective
+
+        entry = cache.pop(perspective, None)
+        if entry is None:
+            entry = self._buildPerspectiveModel(perspective)
+        elif self._proxyModel is not None:
+            self._proxyModel.setSourceModel(entry["base"])
+        base = entry["base"]
+        stale, entry["stale"] = entry["stale"], False
+        cache[perspective] = entry  # most recently used goes last
+        self.setQModel(entry["qmodel"])
+        state = entry["state"]
+        if state is not None and state["dataSource"] is self._dataSource(base):
+            self.restoreViewState(state)
+        self._trimModelCache()
+        return stale
+
+    def _buildPerspectiveModel(self, perspective):
+        """Returns a new model cache entry: the model shown by the view
+        (*qmodel*), the base model (*base*), the proxies created for it
+        (*proxies*), the saved view state (*state*) and if the model is out
+        of date (*stale*)"""
         qmodel_classes = self.KnownPerspectives[perspective]["model"]
         qmodel_class = qmodel_classes[-1]
         qmodel_proxy_classes = qmodel_classes[-2::-1]  # reversed
         qmodel = qmodel_class(self)
         qmodel_source = qmodel
+        proxies = []
         if self._proxyModel is None:  # applies the chain of proxies
             for qmodel_proxy_class in qmodel_proxy_classes:
                 qproxy = qmodel_proxy_class(self)
                 qproxy.setSourceModel(qmodel_source)
                 qmodel_source = qproxy
+                proxies.append(qproxy)
         else:
             self._proxyModel.setSourceModel(qmodel_source)
             qmodel_source = self._proxyModel
-        self.setQModel(qmodel_source)
+        return dict(qmodel=qmodel_source, base=qmodel, proxies=proxies,
+                    state=None, stale=False)
+
+    @staticmethod
+    def _dataSource(qmodel):
+        if isinstance(qmodel, BaseModel):
+            return qmodel.dataSource()
+
+    def _trimModelCache(self):
+        cache = self._modelCache
+        while len(cache) > max(1, self._modelCacheSize):
+            perspective = next(iter(cache))
+            self._discardModel(cache.pop(perspective))
+
+    def _discardModel(self, entry):
+        # only what the entry owns: a shared proxy (given at construction)
+        # shows the model of another perspective
+        for qproxy in entry["proxies"]:
+            qproxy.deleteLater()
+        entry["base"].deleteLater()
+
+    def setModelCacheSize(self, size):
+        """Sets the maximum number of perspective models kept alive. Switching
+        back to a cached perspective reuses its model (no rebuild) and
+        restores its view state (see :meth:`saveViewState`). The least
+        recently used models are discarded first.
+
+        :param size: maximum number of cached models (the current one
+                     included)
+        :type size: int
+        """
+        self._modelCacheSize = size
+        self._trimModelCache()
+
+    def getModelCacheSize(self):
+        """Returns the maximum number of perspective models kept alive
+
+        :return: the maximum number of cached models
+        :rtype: int
+        """
+        return self._modelCacheSize
+
+    def resetModelCacheSize(self):
+        """Resets the maximum number of perspective models kept alive to
+        :attr:`DftModelCacheSize`"""
+        self.setModelCacheSize(self.DftModelCacheSize)
+
+    def cachedPerspectives(self):
+        """Returns the perspectives which model is cached, the least
+        recently used first
+
+        :return: the cached perspectives
+        :rtype: list<str>
+        """
+        return list(self._modelCache)
+
+    def invalidateModelCache(self, perspective=None, current=True):
+        """Discards the cached model of the given perspective (or of all the
+        perspectives if None). The current model is never discarded but its
+        saved view state is.
+
+        When switching perspective, a cached model built from another data
+        source object is rebuilt and, after the current model has been
+        refreshed (the data source may have changed in place), a cached
+        model is refreshed. Call it to release the cached models.
+
+        :param perspective: perspective name [default: None, meaning all]
+        :type perspective: str
+        :param current: also forget the saved view state of the current
+                        perspective [default: True]
+        :type current: bool
+        """
+        cache = self._modelCache
+        if perspective is None:
+            perspectives = list(cache)
+        else:
+            perspectives = [perspective]
+        for perspective in perspectives:
+            if perspective == self._perspective:
+                if current:
+                    cache[perspective]["state"] = None
+            elif perspective in cache:
+                self._discardModel(cache.pop(perspective))
+
+    def saveViewState(self):
+        """Returns the state of the view (root, current and selected items)
+        so it can be restored with :meth:`restoreViewState` after the view
+        has shown another model
+
+        :return: the view state
+        :rtype: dict
+        """
+        view = self.viewWidget()
+        Persistent = QtCore.QPersistentModelIndex
+        state = dict(dataSource=self._dataSource(self.getBaseQModel()),
+                     root=Persistent(view.rootIndex()),
+                     current=Persistent(view.currentIndex()),
+                     selection=None)
+        selection_model = view.selectionModel()
+        if selection_model is not None:
+            # selection ranges keep persistent indexes
+            state["selection"] = QtGui.QItemSelection(
+                selection_model.selection())
+        return state
+
+    def restoreViewState(self, state):
+        """Restores a view state returned by :meth:`saveViewState`
+
+        :param state: the view state
+        :type state: dict
+        """
+        view = self.viewWidget()
+        root = QtCore.QModelIndex(state["root"])
+        view.setRootIndex(root)
+        selection_model = view.selectionModel()
+        current = QtCore.QModelIndex(state["current"])
+        if current.isValid():
+            view.setCurrentIndex(current)
+        if selection_model is not None and state["selection"] is not None:
+            selection_model.select(state["selection"],
+                                   QtGui.QItemSelectionModel.ClearAndSelect)
 
     #--------------------------------------------------------------------------
     # QMainWindow overwriting
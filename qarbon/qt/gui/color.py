@@ -10,22 +10,70 @@
 
 """Helper functions to colors from state"""
 
-__all__ = ["getQColorFromState",
-           "getBgQColorFromState", "getFgQColorFromState"]
+__all__ = ["StateStyle", "getStateStyle", "getQColorFromState",
+           "getBgQColorFromState", "getFgQColorFromState",
+           "getBgQBrushFromState", "getFgQBrushFromState",
+           "getQPaletteFromState"]
+
+from collections import namedtuple
 
 from qarbon.external.qt import QtGui
-from qarbon.color import getStateColorMap
+from qarbon.color import getStateColorMap, getCSSColorFromState, \
+    addStateColorMapListener
+
+#: Styling information for a :class:`~qarbon.meta.State`: CSS string,
+#: background/foreground QColor and QBrush and a QPalette
+StateStyle = namedtuple("StateStyle",
+                        "css bg fg bgBrush fgBrush palette")
+
+__QSTATE_STYLE_MAP = None
 
-__QSTATE_COLOR_MAP = None
 
+def __buildStateStyle(state, bg, fg):
+    bg, fg = QtGui.QColor(*bg), QtGui.QColor(*fg)
+    bgBrush, fgBrush = QtGui.QBrush(bg), QtGui.QBrush(fg)
+    palette = QtGui.QPalette()
+    for role in (QtGui.QPalette.Window, QtGui.QPalette.Base,
+                 QtGui.QPalette.Button):
+        palette.setBrush(role, bgBrush)
+    for role in (QtGui.QPalette.WindowText, QtGui.QPalette.Text,
+                 QtGui.QPalette.ButtonText):
+        palette.setBrush(role, fgBrush)
+    return StateStyle(getCSSColorFromState(state), bg, fg, bgBrush, fgBrush,
+                      palette)
 
-def __getQstateColorMap():
-    global __QSTATE_COLOR_MAP
-    if __QSTATE_COLOR_MAP is None:
-        __QSTATE_COLOR_MAP = {}
+
+def __getQStateStyleMap():
+    global __QSTATE_STYLE_MAP
+    if __QSTATE_STYLE_MAP is None:
+        __QSTATE_STYLE_MAP = {}
         for k, (bg, fg) in getStateColorMap().items():
-            __QSTATE_COLOR_MAP[k] = QtGui.QColor(*bg), QtGui.QColor(*fg)
-    return __QSTATE_COLOR_MAP
+            __QSTATE_STYLE_MAP[k] = __buildStateStyle(k, bg, fg)
+    return __QSTATE_STYLE_MAP
+
+
+def __invalidateQStateStyleMap():
+    global __QSTATE_STYLE_MAP
+    __QSTATE_STYLE_MAP = None
+
+
+addStateColorMapListener(__invalidateQStateStyleMap)
+
+
+def getStateStyle(state):
+    """Returns the :class:`StateStyle` (CSS, QColors, QBrushes and QPalette)
+    for the given :class:`~qarbon.meta.State`.
+
+    The styles are built once and rebuilt only when the state color map
+    changes (see :func:`~qarbon.color.registerStateColor`). They are shared
+    so they should not be modified.
+
+    :param state: the state
+    :type state: State
+    :return: the style for the given state
+    :rtype: StateStyle
+    """
+    return __getQStateStyleMap()[state]
 
 
 def getQColorFromState(state):
@@ -37,7 +85,8 @@ def getQColorFromState(state):
     :return: a tuple of background a foreground color for the given state
     :rtype: tuple<QColor, QColor>
     """
-    return __getQstateColorMap()[state]
+    style = __getQStateStyleMap()[state]
+    return style.bg, style.fg
 
 
 def getBgQColorFromState(state):
@@ -48,7 +97,7 @@ def getBgQColorFromState(state):
     :return: a background QColor for the given state
     :rtype: QColor
     """
-    return getQColorFromState()[0]
+    return __getQStateStyleMap()[state].bg
 
 
 def getFgQColorFromState(state):
@@ -59,4 +108,39 @@ def getFgQColorFromState(state):
     :return: a foreground QColor for the given state
     :rtype: QColor
     """
-    return getQColorFromState()[1]
+    return __getQStateStyleMap()[state].fg
+
+
+def getBgQBrushFromState(state):
+    """Returns a background QBrush from the given :class:`~qarbon.meta.State`.
+
+    :param state: the state
+    :type state: State
+    :return: a background QBrush for the given state
+    :rtype: QBrush
+    """
+    return __getQStateStyleMap()[state].bgBrush
+
+
+def getFgQBrushFromState(state):
+    """Returns a foreground QBrush from the given :class:`~qarbon.meta.State`.
+
+    :param state: the state
+    :type state: State
+    :return: a foreground QBrush for the given state
+    :rtype: QBrush
+    """
+    return __getQStateStyleMap()[state].fgBrush
+
+
+def getQPaletteFromState(state):
+    """Returns a QPalette (window, base and button roles with the background
+    color, text roles with the foreground color) from the given
+    :class:`~qarbon.meta.State`.
+
+    :param state: the state
+    :type state: State
+    :return: a QPalette for the given state
+    :rtype: QPalette
+    """
+    return __getQStateStyleMap()[state].palette
@@ -0,0 +1,497 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+"""An application wide event profiler (for development purposes).
+
+It records, per (event type, object class, object name), how many events
+were delivered and how long they took to handle, to find out which widgets
+keep the GUI thread busy.
+
+Timing events requires the application to be created with
+``Application(profile_events=True)`` (which overrides
+:meth:`QApplication.notify`). With any other application the profiler falls
+back to an application event filter and only counts events, but a stopped
+profiler then costs nothing (the notify override costs a python call per
+event even when the profiler is stopped).
+
+Example::
+
+    from qarbon.qt.gui.application import Application
+    from qarbon.qt.gui.eventprofiler import EventProfiler, \\
+        EventProfilerWidget
+
+    app = Application(profile_events=True)
+
+    profiler = EventProfiler()
+    profiler.start()
+    viewer = EventProfilerWidget(profiler=profiler)
+    viewer.show()
+    app.exec_()
+    profiler.exportJSON("events.json")
+"""
+
+__all__ = ["ProfilingApplication", "EventProfiler", "getEventTypeName",
+           "EventProfileModel", "EventProfilerWidget"]
+
+import json
+import time
+import threading
+
+from qarbon import log
+from qarbon.external.qt import QtCore, QtGui
+
+from qarbon.qt.gui.icon import getIcon
+from qarbon.qt.gui.action import Action
+from qarbon.qt.gui.baseview import BaseToolBar
+from qarbon.qt.gui.basetree import BaseTreeWidget
+from qarbon.qt.gui.basemodel import BaseModel, BaseTreeItem
+from qarbon.qt.gui.application import Application
+
+# the most precise clock available
+_clock = getattr(time, "perf_counter", time.time)
+
+_EventTypeNames = {}
+
+
+def getEventTypeName(eventType):
+    """Returns the name of the given event type
+
+    :param eventType: the event type
+    :type eventType: int
+    :return: the event type name (ex: 'Paint', 'User+3')
+    :rtype: str
+    """
+    names = _EventTypeNames
+    if not names:
+        Type = QtCore.QEvent.Type
+        for name, value in vars(QtCore.QEvent).items():
+            if isinstance(value, Type):
+                names.setdefault(int(value), name)
+    eventType = int(eventType)
+    name = names.get(eventType)
+    if name is None:
+        user = int(QtCore.QEvent.User)
+        if eventType > user:
+            name = "User+{0}".format(eventType - user)
+        else:
+            name = str(eventType)
+    return name
+
+
+class ProfilingApplication(QtGui.QApplication):
+    """A QApplication which times the handling of the events while an
+    :class:`EventProfiler` is started. Use
+    ``Application(profile_events=True)`` to create it."""
+
+    _eventProfiler = None
+
+    def setEventProfiler(self, profiler):
+        """Sets the profiler which times the events
+
+        :param profiler: the profiler (None to stop timing the events)
+        :type profiler: EventProfiler
+        """
+        self._eventProfiler = profiler
+
+    def eventProfiler(self):
+        """Returns the profiler which times the events
+
+        :return: the profiler (None if not timing the events)
+        :rtype: EventProfiler
+        """
+        return self._eventProfiler
+
+    def notify(self, receiver, event):
+        profiler = self._eventProfiler
+        if profiler is None:
+            return QtGui.QApplication.notify(self, receiver, event)
+        return profiler._notify(self, receiver, event)
+
+
+class EventProfiler(QtCore.QObject):
+    """Records the events delivered in the GUI thread: the number of events
+    and their handling times (total, self i.e. without the nested events,
+    and maximum) per (event type, object class, object name)."""
+
+    def __init__(self, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self._stats = {}
+        self._stack = []
+        self._thread = None
+        self._app = None
+        self._startTime = None
+        self._duration = 0.0
+
+    def start(self):
+        """Starts recording the events"""
+        if self.isRunning():
+            return
+        app = self._app = Application()
+        self._thread = threading.current_thread()
+        self._startTime = time.time()
+        if isinstance(app, ProfilingApplication):
+            app.setEventProfiler(self)
+        else:
+            log.info("Event handling times are only recorded with "
+                     "Application(profile_events=True). Counting events only")
+            app.installEventFilter(self)
+
+    def stop(self):
+        """Stops recording the events"""
+        if not self.isRunning():
+            return
+        app, self._app = self._app, None
+        if isinstance(app, ProfilingApplication):
+            if app.eventProfiler() is self:
+                app.setEventProfiler(None)
+        else:
+            app.removeEventFilter(self)
+        self._duration += time.time() - self._startTime
+        self._startTime = None
+
+    def isRunning(self):
+        """Tells if the profiler is recording the events
+
+        :return: True if the profiler is recording or False otherwise
+        :rtype: bool
+        """
+        return self._app is not None
+
+    def isTiming(self):
+        """Tells if the profiler records the event handling times (see
+        :class:`ProfilingApplication`)
+
+        :return: True if the handling times are recorded or False otherwise
+        :rtype: bool
+        """
+        return isinstance(QtGui.QApplication.instance(), ProfilingApplication)
+
+    def clear(self):
+        """Forgets all the recorded events"""
+        self._stats.clear()
+        self._duration = 0.0
+        if self._startTime is not None:
+            self._startTime = time.time()
+
+    def duration(self):
+        """Returns for how long the events have been recorded
+
+        :return: the recording duration (s)
+        :rtype: float
+        """
+        duration = self._duration
+        if self._startTime is not None:
+            duration += time.time() - self._startTime
+        return duration
+
+    @staticmethod
+    def _key(receiver, eventType):
+        try:
+            name = receiver.objectName()
+        except (RuntimeError, AttributeError):
+            name = ""
+        return int(eventType), type(receiver).__name__, name
+
+    def _notify(self, app, receiver, event):
+        if threading.current_thread() is not self._thread:
+            return QtGui.QApplication.notify(app, receiver, event)
+        # the receiver may be deleted by the event (DeferredDelete)
+        key = self._key(receiver, event.type())
+        stack = self._stack
+        stack.append(0.0)
+        start = _clock()
+        try:
+            return QtGui.QApplication.notify(app, receiver, event)
+        finally:
+            elapsed = _clock() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self._record(key, elapsed, elapsed - nested)
+
+    def eventFilter(self, receiver, event):
+        self._record(self._key(receiver, event.type()), 0.0, 0.0)
+        return False
+
+    def _record(self, key, elapsed, selfElapsed):
+        stat = self._stats.get(key)
+        if stat is None:
+            self._stats[key] = [1, elapsed, selfElapsed, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] += selfElapsed
+            if elapsed > stat[3]:
+                stat[3] = elapsed
+
+    def statistics(self):
+        """Returns the recorded statistics, one dict per (event type, object
+        class, object name) with keys: *event* (event type name),
+        *eventType*, *className*, *objectName*, *count*, *time* (total
+        handling time, s), *selfTime* (total handling time without the
+        nested events, s) and *maxTime* (s)
+
+        :return: the statistics
+        :rtype: list<dict>
+        """
+        result = []
+        for key, stat in list(self._stats.items()):
+            eventType, className, objectName = key
+            count, total, selfTime, maxTime = stat
+            result.append(dict(event=getEventTypeName(eventType),
+                               eventType=eventType, className=className,
+                               objectName=objectName, count=count,
+                               time=total, selfTime=selfTime,
+                               maxTime=maxTime))
+        return result
+
+    def hotSpots(self, limit=None, sortBy="selfTime"):
+        """Returns the statistics (see :meth:`statistics`) ranked by the
+        given key, the highest first
+
+        :param limit: maximum number of statistics
+                      [default: None, meaning all]
+        :type limit: int
+        :param sortBy: 'selfTime', 'time', 'maxTime' or 'count'
+                       [default: 'selfTime']
+        :type sortBy: str
+        :return: the hot spots
+        :rtype: list<dict>
+        """
+        stats = self.statistics()
+        stats.sort(key=lambda stat: (stat[sortBy], stat["count"]),
+                   reverse=True)
+        return stats[:limit]
+
+    def toDict(self):
+        """Returns the recording as a JSON serializable dict
+
+        :return: the recording
+        :rtype: dict
+        """
+        return dict(duration=self.duration(), timing=self.isTiming(),
+                    statistics=self.hotSpots())
+
+    def exportJSON(self, filename):
+        """Writes the recording (see :meth:`toDict`) to the given JSON file
+
+        :param filename: name of the file to write
+        :type filename: str
+        """
+        with open(filename, "w") as f:
+            json.dump(self.toDict(), f, indent=1)
+
+
+class _EventStatItem(BaseTreeItem):
+    """An item of :class:`EventProfileModel`. Its numbers change from one
+    refresh to the next: it is identified by its label only"""
+
+    __slots__ = ()
+
+    def key(self):
+        return self._itemData[0]
+
+
+def _ms(seconds):
+    return "{0:.3f}".format(1000 * seconds)
+
+
+class EventProfileModel(BaseModel):
+    """A model of the events recorded by an :class:`EventProfiler` (the
+    data source): one item per object (class and name), ranked by self
+    time, with one child per event type"""
+
+    ColumnNames = "Object / event", "Count", "Time (ms)", "Self time (ms)", \
+        "Max time (ms)"
+    ColumnRoles = ("Object", "Event"), "Count", "Time", "SelfTime", "MaxTime"
+
+    def __init__(self, parent=None, data=None):
+        BaseModel.__init__(self, parent=parent, data=data)
+        self.setIncrementalRefresh(True)
+
+    def roleIcon(self, role):
+        return QtGui.QIcon()
+
+    def roleSize(self, role):
+        return QtCore.QSize(100, 24)
+
+    def roleToolTip(self, role):
+        return role
+
+    def setupModelData(self, profiler):
+        if profiler is None:
+            return
+        objects = {}
+        for stat in profiler.statistics():
+            key = stat["className"], stat["objectName"]
+            objects.setdefault(key, []).append(stat)
+        totals = []
+        for (className, objectName), stats in objects.items():
+            total = [sum(stat[name] for stat in stats)
+                     for name in ("count", "time", "selfTime")]
+            total.append(max(stat["maxTime"] for stat in stats))
+            totals.append((total, className, objectName, stats))
+        totals.sort(key=lambda item: (item[0][2], item[0][0]), reverse=True)
+
+        root = self._rootItem
+        for (count, total, selfTime, maxTime), className, objectName, \
+                stats in totals:
+            label = '{0}("{1}")'.format(className, objectName)
+            item = _EventStatItem(self, (label, count, _ms(total),
+                                         _ms(selfTime), _ms(maxTime)), root)
+            root.appendChild(item)
+            stats.sort(key=lambda stat: (stat["selfTime"], stat["count"]),
+                       reverse=True)
+            for stat in stats:
+                item.appendChild(_EventStatItem(self, (
+                    stat["event"], stat["count"], _ms(stat["time"]),
+                    _ms(stat["selfTime"]), _ms(stat["maxTime"])), item))
+
+
+class EventProfilerToolBar(BaseToolBar):
+    """Internal widget providing the event profiler controls to be placed in
+    a _QToolArea"""
+
+    startToggled = QtCore.Signal(bool)
+    clearTriggered = QtCore.Signal()
+    exportTriggered = QtCore.Signal()
+
+    def __init__(self, view=None, parent=None, designMode=False):
+        BaseToolBar.__init__(self, name="Event profiler toolbar", view=view,
+                             parent=parent, designMode=designMode)
+        self._startAction = Action("Record", parent=self,
+                                   icon=getIcon("media-record"),
+                                   tooltip="Start/stop recording events",
+                                   toggled=self.onStartToggled)
+        self._clearAction = Action("Clear", parent=self,
+                                   icon=getIcon("edit-clear"),
+                                   tooltip="Forget the recorded events",
+                                   triggered=self.onClear)
+        self._exportAction = Action("Export", parent=self,
+                                    icon=getIcon("document-save"),
+                                    tooltip="Export the recorded events to "
+                                            "a JSON file",
+                                    triggered=self.onExport)
+        self.addAction(self._startAction)
+        self.addAction(self._clearAction)
+        self.addAction(self._exportAction)
+
+    def startAction(self):
+        return self._startAction
+
+    def onStartToggled(self, start):
+        self.startToggled.emit(start)
+
+    def onClear(self):
+        self.clearTriggered.emit()
+
+    def onExport(self):
+        self.exportTriggered.emit()
+
+
+class EventProfilerWidget(BaseTreeWidget):
+    """A tree of the hot spots recorded by an :class:`EventProfiler`. It is
+    refreshed every :meth:`refreshInterval` ms while the profiler runs."""
+
+    KnownPerspectives = {
+        "Default": {
+            "label":   "Default perspecive",
+            "tooltip": "Events per object",
+            "icon":    "",
+            "model":   [EventProfileModel],
+        },
+    }
+
+    DftPerspective = "Default"
+
+    #: default time (ms) between refreshes while the profiler runs
+    DftRefreshInterval = 1000
+
+    def __init__(self, parent=None, with_navigation_bar=False,
+                 with_filter_widget=True, perspective=None, proxy=None,
+                 profiler=None):
+        BaseTreeWidget.__init__(self, parent,
+                                with_navigation_bar=with_navigation_bar,
+                                with_filter_widget=with_filter_widget,
+                                perspective=perspective, proxy=proxy)
+        if profiler is None:
+            profiler = EventProfiler(self)
+        self._profiler = profiler
+        self._refreshTimer = timer = QtCore.QTimer(self)
+        timer.setInterval(self.DftRefreshInterval)
+        timer.timeout.connect(self.refreshProfile)
+
+        p_bar = self._profilerBar = EventProfilerToolBar(view=self,
+                                                         parent=self)
+        p_bar.startAction().setChecked(profiler.isRunning())
+        p_bar.startToggled.connect(self.onStartToggled)
+        p_bar.clearTriggered.connect(self.onClear)
+        p_bar.exportTriggered.connect(self.onExport)
+        self.insertToolBar(0, p_bar)
+
+        self.getBaseQModel().setDataSource(profiler)
+        if profiler.isRunning():
+            timer.start()
+
+    def profiler(self):
+        return self._profiler
+
+    def setRefreshInterval(self, interval):
+        """Sets the time between refreshes while the profiler runs
+
+        :param interval: interval (ms)
+        :type interval: int
+        """
+        self._refreshTimer.setInterval(interval)
+
+    def getRefreshInterval(self):
+        """Returns the time between refreshes while the profiler runs
+
+        :return: interval (ms)
+        :rtype: int
+        """
+        return self._refreshTimer.interval()
+
+    def resetRefreshInterval(self):
+        """Resets the refresh interval to :attr:`DftRefreshInterval`"""
+        self.setRefreshInterval(self.DftRefreshInterval)
+
+    def refreshProfile(self):
+        self.getBaseQModel().refresh()
+        profiler = self._profiler
+        msg = "{0} events in {1:.1f}s".format(
+            sum(stat["count"] for stat in profiler.statistics()),
+            profiler.duration())
+        if not profiler.isTiming():
+            msg += " (counting only)"
+        self.statusBar().showMessage(msg)
+
+    def onStartToggled(self, start):
+        if start:
+            self._profiler.start()
+            self._refreshTimer.start()
+        else:
+            self._profiler.stop()
+            self._refreshTimer.stop()
+        self.refreshProfile()
+
+    def onClear(self):
+        self._profiler.clear()
+        self.refreshProfile()
+
+    def onExport(self):
+        filename = QtGui.QFileDialog.getSaveFileName(
+            self, "Export recorded events", "events.json",
+            "JSON files (*.json)")
+        # Qt 5 returns a (file name, filter) tuple
+        if isinstance(filename, tuple):
+            filename = filename[0]
+        if filename:
+            self._profiler.exportJSON(filename)
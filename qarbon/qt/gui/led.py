@@ -37,9 +37,10 @@ status::
     app.exec_()
 """
 
-__all__ = ["LedColor", "LedStatus", "Led"]
+__all__ = ["LedColor", "LedStatus", "Led", "toLedColor", "toLedStatus"]
 
 from qarbon.config import NAMESPACE
+from qarbon.meta import enumLookup
 from qarbon.external.enum import Enum
 from qarbon.external.qt import QtCore, QtGui
 from qarbon.qt.gui.pixmapwidget import PixmapWidget
@@ -58,6 +59,13 @@ class LedStatus(Enum):
     Off, On = range(2)
 
 
+#: fast conversion from value to :class:`LedColor`
+toLedColor = enumLookup(LedColor)
+
+#: fast conversion from value to :class:`LedStatus`
+toLedStatus = enumLookup(LedStatus)
+
+
 class Led(PixmapWidget):
     """A LED (light-emitting diode) like widget"""
 
@@ -131,9 +139,8 @@ class Led(PixmapWidget):
         """internal usage only"""
         self.__ledName = self.toLedName()
 
-        pixmap = QtGui.QPixmap(self.__ledName)
-        self.setPixmap(pixmap)
-        return self.update()
+        # setPixmap only repaints if the pixmap actually changed
+        self.setPixmap(QtGui.QPixmap(self.__ledName))
 
     #--------------------------------------------------------------------------
     # QT property definition
@@ -176,7 +183,7 @@ class Led(PixmapWidget):
         """Sets the led status
         :param status: the new status
         :type  status: bool"""
-        self.__ledStatus = LedStatus(status)
+        self.__ledStatus = toLedStatus(status)
         self._refresh()
 
     def resetLedStatus(self):
@@ -217,7 +224,7 @@ class Led(PixmapWidget):
         """Sets the led color
         :param status: the new color
         :type  status: LedColor"""
-        self.__ledColor = LedColor(color)
+        self.__ledColor = toLedColor(color)
         self._refresh()
 
     def resetLedColor(self):
@@ -0,0 +1,357 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+"""Helper functions to export the items of a
+:class:`~qarbon.qt.gui.basemodel.BaseModel` to JSON Lines or CSV.
+
+The items are walked iteratively (no recursion limit) and streamed one row
+at a time, so the memory used does not depend on the size of the tree::
+
+    with open("tree.csv", "w") as f:
+        exportModel(model, f, format="csv")
+
+To write the file on a worker thread (from a snapshot taken on the GUI
+thread) and be notified on the GUI thread::
+
+    export = exportModelAsync(model, "tree.jsonl")
+    export.finished.connect(onExported)
+    export.failed.connect(onExportFailed)
+"""
+
+__all__ = ["modelHeader", "iterModelRows", "snapshotModel",
+           "writeJSONLines", "writeCSV", "exportModel", "exportModelAsync",
+           "ModelExport"]
+
+import io
+import csv
+import json
+import threading
+import collections
+
+from qarbon import log
+from qarbon.external.qt import QtCore
+
+#: separator of the names in the path column
+PathSeparator = "/"
+
+_JSONTypes = (bool, int, float, type(None)) + \
+    tuple(set((type(""), type(u""))))
+
+
+def _toValue(value):
+    if isinstance(value, _JSONTypes):
+        return value
+    return "{0}".format(value)
+
+
+def modelHeader(model):
+    """Returns the column names of the rows given by :func:`iterModelRows`:
+    "depth", "path" followed by the model column names
+
+    :param model: the model
+    :type model: BaseModel
+    :return: the column names
+    :rtype: tuple<str>
+    """
+    names = [model.headerData(column, QtCore.Qt.Horizontal)
+             for column in range(model.columnCount())]
+    return ("depth", "path") + tuple("{0}".format(name) for name in names)
+
+
+def iterModelRows(model, role=QtCore.Qt.DisplayRole, fetch=False):
+    """Generator of one row per item of the model, in tree order. A row is a
+    tuple (depth, path, value of column 0, value of column 1, ...) where
+    depth starts at 0 for the top level items and path is the
+    :data:`PathSeparator` separated column 0 values from the top level item.
+
+    Must be used from the thread of the model (see :func:`snapshotModel`).
+
+    :param model: the model
+    :type model: BaseModel
+    :param role: the role of the exported values [default: DisplayRole]
+    :type role: int
+    :param fetch: build the children not yet fetched by a lazy model
+                  [default: False]
+    :type fetch: bool
+    """
+    if fetch:
+        model.fetchAll()
+    root = model._rootItem
+    if root is None:
+        return
+    createIndex, data = model.createIndex, model.pyData
+    columns = range(model.columnCount())
+    # one (children iterator, path) per level: memory grows with the depth
+    # of the tree, not with its size
+    stack = [(enumerate(root._childItems), ())]
+    while stack:
+        children, path = stack[-1]
+        for row, item in children:
+            values = [_toValue(data(createIndex(row, column, item), role))
+                      for column in columns]
+            itemPath = path + ("{0}".format(values[0]),)
+            yield (len(path), PathSeparator.join(itemPath)) + tuple(values)
+            if item._childItems:
+                stack.append((enumerate(item._childItems), itemPath))
+                break
+        else:
+            stack.pop()
+
+
+def snapshotModel(model, role=QtCore.Qt.DisplayRole, fetch=False):
+    """Returns the header and all the rows of the model (see
+    :func:`iterModelRows`). The snapshot holds plain python values so it can
+    be written from any thread while the model keeps changing.
+
+    :param model: the model
+    :type model: BaseModel
+    :param role: the role of the exported values [default: DisplayRole]
+    :type role: int
+    :param fetch: build the children not yet fetched by a lazy model
+                  [default: False]
+    :type fetch: bool
+    :return: the header and the rows
+    :rtype: tuple<tuple<str>, list<tuple>>
+    """
+    return modelHeader(model), list(iterModelRows(model, role, fetch))
+
+
+def writeJSONLines(header, rows, stream):
+    """Writes the rows to the stream in JSON Lines format: one JSON object
+    per row, the keys being the header names
+
+    :param header: the column names
+    :type header: seq<str>
+    :param rows: the rows (any iterable)
+    :type rows: iter<tuple>
+    :param stream: a text stream
+    :return: the number of rows written
+    :rtype: int
+    """
+    n = 0
+    for row in rows:
+        stream.write(json.dumps(collections.OrderedDict(zip(header, row))))
+        stream.write("\n")
+        n += 1
+    return n
+
+
+def writeCSV(header, rows, stream, **kwargs):
+    """Writes the header and the rows to the stream in CSV format
+
+    :param header: the column names
+    :type header: seq<str>
+    :param rows: the rows (any iterable)
+    :type rows: iter<tuple>
+    :param stream: a text stream
+    :param kwargs: extra keyword arguments for :func:`csv.writer`
+    :return: the number of rows written
+    :rtype: int
+    """
+    writer = csv.writer(stream, **kwargs)
+    writer.writerow(header)
+    n = 0
+    for row in rows:
+        writer.writerow(row)
+        n += 1
+    return n
+
+
+_Writers = {
+    "jsonl": writeJSONLines,
+    "csv": writeCSV,
+}
+
+
+def _getWriter(format):
+    try:
+        return _Writers[format]
+    except KeyError:
+        raise ValueError("unknown export format '{0}' (expected one of {1})"
+                         .format(format, ", ".join(sorted(_Writers))))
+
+
+def exportModel(model, stream, format="jsonl", role=QtCore.Qt.DisplayRole,
+                fetch=False):
+    """Streams all the items of the model to the given stream
+
+    :param model: the model
+    :type model: BaseModel
+    :param stream: a text stream
+    :param format: 'jsonl' (JSON Lines) or 'csv' [default: 'jsonl']
+    :type format: str
+    :param role: the role of the exported values [default: DisplayRole]
+    :type role: int
+    :param fetch: build the children not yet fetched by a lazy model
+                  [default: False]
+    :type fetch: bool
+    :return: the number of rows written
+    :rtype: int
+    """
+    writer = _getWriter(format)
+    return writer(modelHeader(model), iterModelRows(model, role, fetch),
+                  stream)
+
+
+class _TextStream(object):
+    """io text files only accept unicode (which python 2 str is not)"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        if not isinstance(text, type(u"")):
+            text = text.decode("utf-8")
+        return self._stream.write(text)
+
+
+class ModelExport(QtCore.QObject):
+    """An export started by :func:`exportModelAsync`. Its signals are
+    emitted in the thread it belongs to (the GUI thread) once the file has
+    been written, so they can be connected after the export started."""
+
+    #: emitted with the number of rows written when the export succeeds
+    finished = QtCore.Signal(int)
+
+    #: emitted with the error message when the export fails
+    failed = QtCore.Signal(str)
+
+    # emitted by the worker thread with (rows written, error message)
+    _done = QtCore.Signal(int, str)
+
+    def __init__(self, filename, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self._filename = filename
+        self._job = None
+        self._result = None
+        self._written = threading.Event()
+        self._done.connect(self._onDone, QtCore.Qt.QueuedConnection)
+
+    def filename(self):
+        """Returns the name of the file written
+
+        :return: the file name
+        :rtype: str
+        """
+        return self._filename
+
+    def isDone(self):
+        """Tells if the export is over (and its signals emitted)
+
+        :return: True if the export is over or False otherwise
+        :rtype: bool
+        """
+        return self._result is not None
+
+    def error(self):
+        """Returns the error message of a failed export
+
+        :return: the error message (None if the export did not fail)
+        :rtype: str
+        """
+        if self._result is None or not self._result[1]:
+            return None
+        return self._result[1]
+
+    def wait(self, timeout=None):
+        """Blocks until the file is written and emits the signals (without
+        waiting for the event loop)
+
+        :param timeout: maximum time to wait (s) [default: None, meaning
+                        forever]
+        :type timeout: float
+        :return: True if the export is over or False on timeout
+        :rtype: bool
+        """
+        if not self._written.wait(timeout):
+            return False
+        QtCore.QCoreApplication.sendPostedEvents(self,
+                                                 QtCore.QEvent.MetaCall)
+        return True
+
+    # a real slot: the queued call is posted to this object (see wait)
+    @QtCore.Slot(int, str)
+    def _onDone(self, rows, error):
+        if self._result is not None:
+            return
+        self._result = rows, error
+        self._job = None
+        _runningExports.discard(self)
+        if error:
+            self.failed.emit(error)
+        else:
+            self.finished.emit(rows)
+
+
+# the exports kept alive until they are over
+_runningExports = set()
+
+
+class _ExportJob(QtCore.QRunnable):
+    """Internal job which writes the snapshot of a model on a worker
+    thread"""
+
+    def __init__(self, export, writer, header, rows):
+        QtCore.QRunnable.__init__(self)
+        self.setAutoDelete(False)
+        self.export = export
+        self.writer = writer
+        self.header = header
+        self.rows = rows
+
+    def run(self):
+        export = self.export
+        filename = export.filename()
+        written, error = -1, ""
+        try:
+            # newline="" lets the csv module choose the line endings
+            with io.open(filename, "w", newline="") as stream:
+                written = self.writer(self.header, self.rows,
+                                      _TextStream(stream))
+        except Exception as e:
+            error = "{0}: {1}".format(type(e).__name__, e)
+            log.error("Failed to export model to %s: %s", filename, error)
+            log.debug("Details:", exc_info=1)
+        try:
+            export._done.emit(written, error)
+        except RuntimeError:
+            # the export has been destroyed in the meantime
+            pass
+        export._written.set()
+
+
+def exportModelAsync(model, filename, format="jsonl",
+                     role=QtCore.Qt.DisplayRole, fetch=False):
+    """Writes all the items of the model to the given file on a worker
+    thread of the global QThreadPool. The snapshot of the model (see
+    :func:`snapshotModel`) is taken before returning, the file is written
+    in the background.
+
+    :param model: the model
+    :type model: BaseModel
+    :param filename: name of the file to write
+    :type filename: str
+    :param format: 'jsonl' (JSON Lines) or 'csv' [default: 'jsonl']
+    :type format: str
+    :param role: the role of the exported values [default: DisplayRole]
+    :type role: int
+    :param fetch: build the children not yet fetched by a lazy model
+                  [default: False]
+    :type fetch: bool
+    :return: the (started) export, which emits *finished* or *failed*
+    :rtype: ModelExport
+    """
+    writer = _getWriter(format)
+    header, rows = snapshotModel(model, role, fetch)
+    export = ModelExport(filename)
+    export._job = job = _ExportJob(export, writer, header, rows)
+    _runningExports.add(export)
+    QtCore.QThreadPool.globalInstance().start(job)
+    return export
@@ -43,21 +43,38 @@ __all__ = ["ObjectInfoWidget"]
 
 from qarbon.external.qt import QtCore, QtGui
 from qarbon.qt.gui.icon import Icon
+from qarbon.qt.gui.action import Action
 from qarbon.qt.gui.propertyeditor import PropertyEditor
 from qarbon.qt.gui.treeqobject import TreeQObjectWidget
+from qarbon.qt.gui.paintprofiler import getPaintHeatmap
 
 
 class ObjectInfoWidget(QtGui.QWidget):
-    """A widget which displays/edits information about a QObject."""
+    """A widget which displays/edits information about a QObject.
+
+    Its tool bar toggles the application repaint heatmap (see
+    :mod:`~qarbon.qt.gui.paintprofiler`)."""
 
     def __init__(self, parent=None, qobject=None):
         super(ObjectInfoWidget, self).__init__(parent)
         self.setWindowIcon(Icon("applications-development"))
         self.setWindowTitle("QObject Inspector")
-        layout = QtGui.QHBoxLayout()
+        layout = QtGui.QVBoxLayout()
         self.setLayout(layout)
         layout.setSpacing(0)
         layout.setMargin(0)
+
+        heatmap = getPaintHeatmap()
+        self.__toolBar = toolBar = QtGui.QToolBar("Inspector tool bar", self)
+        self.__heatmapAction = heatmapAction = Action("Paint heatmap",
+            parent=self, icon="applications-graphics",
+            tooltip="Show/hide the repaint rate of every widget",
+            toggled=heatmap.setEnabled)
+        heatmapAction.setChecked(heatmap.isEnabled())
+        heatmap.enabledChanged.connect(heatmapAction.setChecked)
+        toolBar.addAction(heatmapAction)
+        layout.addWidget(toolBar)
+
         self.__splitter = splitter = QtGui.QSplitter(QtCore.Qt.Horizontal,
                                                      self)
         layout.addWidget(splitter)
@@ -86,6 +103,9 @@ class ObjectInfoWidget(QtGui.QWidget):
         self.__tree.getBaseQModel().setDataSource(qobject)
         self.__form.setQObject(qobject)
 
+    def heatmapAction(self):
+        return self.__heatmapAction
+
 
 def buildGUI():
     mw = QtGui.QMainWindow()
@@ -0,0 +1,465 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+"""A repaint heatmap (for development purposes).
+
+While enabled, the paint time and the repaint rate of every widget are
+recorded and drawn as a translucent heatmap over each window: the more
+often a widget repaints, the redder it gets. It helps finding out which
+widgets of a sluggish panel repaint too much.
+
+Toggle it at runtime with :func:`setPaintHeatmapEnabled` (or from the
+:class:`~qarbon.qt.gui.objectinfowidget.ObjectInfoWidget` tool bar), or
+start the application with the ``QARBON_PAINT_HEATMAP`` environment
+variable set to 1. While disabled nothing is installed, so it costs nothing.
+
+The heatmap is drawn in separate translucent windows (so that refreshing
+the heatmap does not repaint the widgets below it). On X11 this needs a
+compositing window manager.
+
+Example::
+
+    from qarbon.qt.gui.application import Application
+    from qarbon.qt.gui.paintprofiler import setPaintHeatmapEnabled
+
+    app = Application()
+    panel = buildPanel()
+    panel.show()
+    setPaintHeatmapEnabled(True)
+    app.exec_()
+"""
+
+__all__ = ["PaintProfiler", "PaintOverlay", "PaintHeatmap",
+           "getPaintHeatmap", "setPaintHeatmapEnabled",
+           "isPaintHeatmapEnabled"]
+
+import time
+import weakref
+import collections
+
+from qarbon.external.qt import QtCore, QtGui
+
+from qarbon.qt.gui.application import Application
+
+# the most precise clock available
+_clock = getattr(time, "perf_counter", time.time)
+
+_Paint = QtCore.QEvent.Paint
+
+
+class _PaintStat(object):
+
+    __slots__ = ("count", "time", "maxTime", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.maxTime = 0.0
+        # (end time, paint time) of the paints inside the rate window
+        self.recent = collections.deque()
+
+
+class PaintProfiler(QtCore.QObject):
+    """Records, per widget, how often it is painted and how long its
+    paint events take.
+
+    While running, an application event filter delivers the paint events
+    itself to time them. Nothing is installed while stopped. The painted
+    widgets are only weakly referenced: the statistics of a widget are
+    dropped when it is collected or deleted."""
+
+    #: default time window (s) over which the repaint rates are computed
+    DftRateWindow = 2.0
+
+    def __init__(self, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self._stats = weakref.WeakKeyDictionary()
+        self._stack = []
+        self._app = None
+        self._rateWindow = self.DftRateWindow
+
+    def start(self):
+        """Starts recording the paint events"""
+        if self.isRunning():
+            return
+        self._app = app = Application()
+        app.installEventFilter(self)
+
+    def stop(self):
+        """Stops recording the paint events"""
+        if not self.isRunning():
+            return
+        app, self._app = self._app, None
+        app.removeEventFilter(self)
+
+    def isRunning(self):
+        """Tells if the profiler is recording the paint events
+
+        :return: True if the profiler is recording or False otherwise
+        :rtype: bool
+        """
+        return self._app is not None
+
+    def clear(self):
+        """Forgets all the recorded paint events"""
+        self._stats.clear()
+
+    def setRateWindow(self, window):
+        """Sets the time window over which the repaint rates are computed
+
+        :param window: time window (s)
+        :type window: float
+        """
+        self._rateWindow = window
+
+    def getRateWindow(self):
+        """Returns the time window over which the repaint rates are computed
+
+        :return: time window (s)
+        :rtype: float
+        """
+        return self._rateWindow
+
+    def resetRateWindow(self):
+        """Resets the rate window to :attr:`DftRateWindow`"""
+        self.setRateWindow(self.DftRateWindow)
+
+    def eventFilter(self, obj, event):
+        if event.type() != _Paint:
+            return False
+        stack = self._stack
+        # the paint event we are delivering ourselves
+        if stack and stack[-1] is obj:
+            return False
+        if not obj.isWidgetType() or isinstance(obj, PaintOverlay):
+            return False
+        # an event filter cannot tell when the event has been handled: send
+        # it again (through the other filters) and block the original one
+        stack.append(obj)
+        start = _clock()
+        try:
+            QtCore.QCoreApplication.sendEvent(obj, event)
+        finally:
+            end = _clock()
+            stack.pop()
+            self._record(obj, end, end - start)
+        return True
+
+    def _record(self, widget, end, elapsed):
+        stat = self._stats.get(widget)
+        if stat is None:
+            stat = self._stats[widget] = _PaintStat()
+        stat.count += 1
+        stat.time += elapsed
+        if elapsed > stat.maxTime:
+            stat.maxTime = elapsed
+        recent = stat.recent
+        recent.append((end, elapsed))
+        start = end - self._rateWindow
+        while recent[0][0] < start:
+            recent.popleft()
+
+    def statistics(self):
+        """Returns the recorded statistics, one dict per widget with keys:
+        *widget*, *className*, *objectName*, *count*, *time* (total paint
+        time, s), *maxTime* (s), *rate* (paints per second over the rate
+        window) and *meanTime* (mean paint time over the rate window, s)
+
+        :return: the statistics
+        :rtype: list<dict>
+        """
+        window = self._rateWindow
+        start = _clock() - window
+        result = []
+        for widget, stat in list(self._stats.items()):
+            try:
+                className = type(widget).__name__
+                objectName = widget.objectName()
+            except RuntimeError:
+                # deleted in C++ while its python object is still alive
+                del self._stats[widget]
+                continue
+            recent = stat.recent
+            while recent and recent[0][0] < start:
+                recent.popleft()
+            n = len(recent)
+            meanTime = sum(elapsed for end, elapsed in recent) / n if n \
+                else 0.0
+            result.append(dict(widget=widget, className=className,
+                               objectName=objectName, count=stat.count,
+                               time=stat.time, maxTime=stat.maxTime,
+                               rate=n / window, meanTime=meanTime))
+        return result
+
+
+class PaintOverlay(QtGui.QWidget):
+    """A translucent window, over its target window, which draws the repaint
+    heatmap of the widgets of the target window. Its own paint events are
+    not recorded."""
+
+    def __init__(self, target):
+        flags = QtCore.Qt.Tool | QtCore.Qt.FramelessWindowHint | \
+            getattr(QtCore.Qt, "WindowTransparentForInput", 0)
+        QtGui.QWidget.__init__(self, target, flags)
+        self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(QtCore.Qt.WA_ShowWithoutActivating)
+        self.setAttribute(QtCore.Qt.WA_QuitOnClose, False)
+        self._target = target
+        self._cells = []
+        self._maxRate = PaintHeatmap.DftMaxRate
+
+    def target(self):
+        return self._target
+
+    def cells(self):
+        """Returns what is drawn: one (rectangle, rate, mean paint time)
+        per widget recently painted
+
+        :return: the heatmap cells
+        :rtype: list<tuple<QRect, float, float>>
+        """
+        return self._cells
+
+    def followTarget(self):
+        """Moves and resizes to cover the target window"""
+        target = self._target
+        self.setGeometry(QtCore.QRect(target.mapToGlobal(QtCore.QPoint()),
+                                      target.size()))
+
+    def setStatistics(self, stats, maxRate):
+        """Updates the heatmap
+
+        :param stats: the statistics (see :meth:`PaintProfiler.statistics`)
+        :type stats: list<dict>
+        :param maxRate: the repaint rate drawn in red (paints/s)
+        :type maxRate: float
+        """
+        target, origin = self._target, QtCore.QPoint()
+        cells = []
+        for stat in stats:
+            if not stat["rate"]:
+                continue
+            widget = stat["widget"]
+            try:
+                if widget.window() is not target or not widget.isVisible():
+                    continue
+                rect = QtCore.QRect(widget.mapTo(target, origin),
+                                    widget.size())
+            except RuntimeError:
+                continue  # the widget has been deleted
+            cells.append((rect, stat["rate"], stat["meanTime"]))
+        # children are drawn over their parents
+        cells.sort(key=lambda cell: cell[0].width() * cell[0].height(),
+                   reverse=True)
+        self._cells = cells
+        self._maxRate = maxRate
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        metrics = painter.fontMetrics()
+        for rect, rate, meanTime in self._cells:
+            heat = min(1.0, rate / self._maxRate)
+            # from green (rare repaints) to red (maxRate or more)
+            color = QtGui.QColor.fromHsvF((1.0 - heat) / 3.0, 1.0, 1.0,
+                                          0.15 + 0.45 * heat)
+            painter.fillRect(rect, color)
+            color.setAlphaF(1.0)
+            painter.setPen(color)
+            painter.drawRect(rect.adjusted(0, 0, -1, -1))
+            if rect.height() >= 2 * metrics.height():
+                painter.setPen(QtCore.Qt.black)
+                painter.drawText(rect, QtCore.Qt.AlignCenter,
+                                 "{0:.0f}/s\n{1:.1f} ms".format(
+                                     rate, 1000 * meanTime))
+
+
+class PaintHeatmap(QtCore.QObject):
+    """Draws a :class:`PaintOverlay` over each visible window, refreshed
+    every :meth:`getRefreshInterval` ms from a :class:`PaintProfiler`, while
+    enabled. Use :func:`getPaintHeatmap` to get the application heatmap."""
+
+    enabledChanged = QtCore.Signal(bool)
+
+    #: default time (ms) between heatmap refreshes
+    DftRefreshInterval = 500
+
+    #: default repaint rate (paints/s) drawn in red
+    DftMaxRate = 25.0
+
+    def __init__(self, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self._profiler = PaintProfiler(self)
+        self._overlays = {}
+        self._maxRate = self.DftMaxRate
+        self._refreshTimer = timer = QtCore.QTimer(self)
+        timer.setInterval(self.DftRefreshInterval)
+        timer.timeout.connect(self.refresh)
+
+    def profiler(self):
+        return self._profiler
+
+    def setEnabled(self, enabled):
+        """Enables/disables the heatmap. Disabling it removes everything it
+        installed and forgets the recorded paint events.
+
+        :param enabled: True to enable or False to disable
+        :type enabled: bool
+        """
+        enabled = bool(enabled)
+        if enabled == self.isEnabled():
+            return
+        if enabled:
+            self._profiler.start()
+            self._refreshTimer.start()
+            self.refresh()
+        else:
+            self._profiler.stop()
+            self._profiler.clear()
+            self._refreshTimer.stop()
+            for target in list(self._overlays):
+                self._removeOverlay(target)
+        self.enabledChanged.emit(enabled)
+
+    def isEnabled(self):
+        """Tells if the heatmap is enabled
+
+        :return: True if enabled or False otherwise
+        :rtype: bool
+        """
+        return self._profiler.isRunning()
+
+    def setRefreshInterval(self, interval):
+        """Sets the time between heatmap refreshes
+
+        :param interval: interval (ms)
+        :type interval: int
+        """
+        self._refreshTimer.setInterval(interval)
+
+    def getRefreshInterval(self):
+        """Returns the time between heatmap refreshes
+
+        :return: interval (ms)
+        :rtype: int
+        """
+        return self._refreshTimer.interval()
+
+    def resetRefreshInterval(self):
+        """Resets the refresh interval to :attr:`DftRefreshInterval`"""
+        self.setRefreshInterval(self.DftRefreshInterval)
+
+    def setMaxRate(self, rate):
+        """Sets the repaint rate drawn in red
+
+        :param rate: repaint rate (paints/s)
+        :type rate: float
+        """
+        self._maxRate = rate
+
+    def getMaxRate(self):
+        """Returns the repaint rate drawn in red
+
+        :return: repaint rate (paints/s)
+        :rtype: float
+        """
+        return self._maxRate
+
+    def resetMaxRate(self):
+        """Resets the maximum repaint rate to :attr:`DftMaxRate`"""
+        self.setMaxRate(self.DftMaxRate)
+
+    def overlays(self):
+        """Returns the overlays currently drawn
+
+        :return: the overlays
+        :rtype: list<PaintOverlay>
+        """
+        return list(self._overlays.values())
+
+    @staticmethod
+    def _isTarget(widget):
+        if isinstance(widget, PaintOverlay) or not widget.isVisible():
+            return False
+        return widget.windowType() not in (QtCore.Qt.Popup,
+                                           QtCore.Qt.ToolTip)
+
+    def refresh(self):
+        """Updates the overlays from the recorded paint events"""
+        if not self.isEnabled():
+            return
+        stats = self._profiler.statistics()
+        overlays = self._overlays
+        targets = set()
+        for widget in QtGui.QApplication.topLevelWidgets():
+            if self._isTarget(widget):
+                targets.add(widget)
+        for target in list(overlays):
+            if target not in targets:
+                self._removeOverlay(target)
+        for target in targets:
+            overlay = overlays.get(target)
+            if overlay is None:
+                overlay = overlays[target] = PaintOverlay(target)
+                target.installEventFilter(self)
+                overlay.followTarget()
+                overlay.show()
+            overlay.setStatistics(stats, self._maxRate)
+
+    def _removeOverlay(self, target):
+        overlay = self._overlays.pop(target)
+        try:
+            target.removeEventFilter(self)
+            overlay.hide()
+            overlay.deleteLater()
+        except RuntimeError:
+            # the target window (and so its overlay) has been deleted
+            pass
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QtCore.QEvent.Move, QtCore.QEvent.Resize):
+            overlay = self._overlays.get(obj)
+            if overlay is not None:
+                overlay.followTarget()
+        return False
+
+
+_paintHeatmap = None
+
+
+def getPaintHeatmap():
+    """Returns the application paint heatmap (created on first call)
+
+    :return: the paint heatmap
+    :rtype: PaintHeatmap
+    """
+    global _paintHeatmap
+    if _paintHeatmap is None:
+        _paintHeatmap = PaintHeatmap(Application())
+    return _paintHeatmap
+
+
+def setPaintHeatmapEnabled(enabled):
+    """Enables/disables the application paint heatmap
+
+    :param enabled: True to enable or False to disable
+    :type enabled: bool
+    """
+    getPaintHeatmap().setEnabled(enabled)
+
+
+def isPaintHeatmapEnabled():
+    """Tells if the application paint heatmap is enabled
+
+    :return: True if enabled or False otherwise
+    :rtype: bool
+    """
+    return _paintHeatmap is not None and _paintHeatmap.isEnabled()
@@ -13,6 +13,30 @@
 You can adjust properties like the aligment inside the widget space, aspect
 ratio and transformation mode (quality).
 
+For big images (ex.: detector images) the smooth transformation may take a
+long time. In *progressive* mode the widget displays immediately a fast
+transformed preview while the smooth scaling is done on a worker thread.
+
+Camera frames can be streamed directly from numpy arrays (or bytes) with
+:meth:`PixmapWidget.setFrame`. The array buffer is wrapped by a QImage
+without copying. If frames arrive faster than the widget is repainted, only
+the most recent one is displayed::
+
+    import numpy
+    frame = numpy.random.randint(0, 4096, (1024, 1024)).astype(numpy.uint16)
+    img.setFrameLevels((0, 4095))
+    img.setFrame(frame)
+    print(img.getFrameStatistics())
+
+Images too big to fit in a pixmap (ex.: mosaics of tens of thousands of
+pixels on a side) can be displayed in *tiled* mode with
+:meth:`PixmapWidget.setTiledImage`. A multi-resolution pyramid of tiles is
+built on demand and only the tiles intersecting the exposed area are drawn,
+at the level of detail matching the current zoom. Use the mouse wheel to
+zoom and drag with the left button to pan::
+
+    img.setTiledImage("/data/mosaic.npy")  # memory-mapped
+
 Example::
 
     from qarbon.external.qt import QtGui
@@ -34,9 +58,216 @@ Example::
 
 __all__ = ["PixmapWidget"]
 
+import sys
+import math
+import tempfile
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from qarbon.external.ordereddict import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from qarbon.util import isString
 from qarbon.external.qt import QtCore, QtGui
 
 
+#: LRU cache of scaled small pixmaps
+#: dict<(cache key, width, height, aspect ratio, transformation), QPixmap>
+_scaledCache = OrderedDict()
+_SCALED_CACHE_SIZE = 256
+_SCALED_CACHE_AREA = 128 * 128
+
+
+def _grayColorTable():
+    return [QtGui.qRgb(i, i, i) for i in range(256)]
+
+
+def _lutToColorTable(lut):
+    """Converts a 256 entry LUT (gray: shape (256,), color: shape (256, 3)
+    or (256, 4)) into a QImage color table"""
+    if lut is None:
+        return _grayColorTable()
+    lut = numpy.asarray(lut, dtype=numpy.uint8)
+    if len(lut) != 256:
+        raise ValueError("LUT must have 256 entries (has %d)" % len(lut))
+    if lut.ndim == 1:
+        return [QtGui.qRgb(v, v, v) for v in lut.tolist()]
+    if lut.ndim == 2 and lut.shape[1] == 3:
+        return [QtGui.qRgb(*rgb) for rgb in lut.tolist()]
+    if lut.ndim == 2 and lut.shape[1] == 4:
+        return [QtGui.qRgba(*rgba) for rgba in lut.tolist()]
+    raise ValueError("Unsupported LUT shape %s" % (lut.shape,))
+
+
+def _levelsTable(dtype, levels):
+    """Returns a uint8 table with one entry per possible value of the given
+    (8 or 16 bit) integer dtype which maps values linearly from levels
+    (low, high) to [0, 255]"""
+    low, high = levels
+    values = numpy.arange(numpy.iinfo(dtype).max + 1, dtype=numpy.float32)
+    values -= low
+    values *= 255.0 / max(high - low, 1)
+    numpy.clip(values, 0, 255, out=values)
+    return values.astype(numpy.uint8)
+
+
+def _scaledSize(size, target, aspectRatioMode):
+    """Returns the size resulting of scaling size to target (QSize.scaled
+    doesn't exist in Qt 4)"""
+    size = QtCore.QSize(size)
+    size.scale(target, aspectRatioMode)
+    return size
+
+
+def _isRowContiguous(frame):
+    """Determines if each row of the frame is contiguous in memory (rows
+    themselves may be padded, ex.: a region of interest of a bigger frame)"""
+    strides, itemsize = frame.strides, frame.itemsize
+    channels = frame.shape[2] if frame.ndim == 3 else 1
+    if strides[0] <= 0 or strides[1] != itemsize * channels:
+        return False
+    return frame.ndim == 2 or strides[2] == itemsize
+
+
+def _downsample(block):
+    """Halves the resolution of the given block by averaging each 2x2 pixel
+    neighbourhood (odd borders are replicated)"""
+    h, w = block.shape[:2]
+    if h % 2 or w % 2:
+        pad = [(0, h % 2), (0, w % 2)] + [(0, 0)] * (block.ndim - 2)
+        block = numpy.pad(block, pad, mode="edge")
+    total = block[0::2, 0::2].astype(numpy.uint32)
+    total += block[1::2, 0::2]
+    total += block[0::2, 1::2]
+    total += block[1::2, 1::2]
+    total += 2
+    total >>= 2
+    return total.astype(block.dtype)
+
+
+class _TilePyramid(object):
+    """Internal multi-resolution pyramid of square tiles over a 2D (mono) or
+    3D (RGB/RGBA) numpy array.
+
+    Level 0 is the source itself. Level *k* has half the resolution of
+    level *k-1*. Tiles of levels > 0 are calculated on demand (from the
+    tiles of the previous level) and kept: in a temporary memory-mapped file
+    if the source is memory-mapped or in memory otherwise. Note that the
+    first display of a coarse level reads the whole source once."""
+
+    def __init__(self, source, tileSize=256):
+        if isString(source):
+            source = numpy.load(source, mmap_mode="r")
+        self.source = source
+        self.tileSize = tileSize
+        self.mapped = isinstance(source, numpy.memmap)
+        self._levels = [source]
+        h, w = source.shape[:2]
+        while max(h, w) > tileSize:
+            h, w = (h + 1) // 2, (w + 1) // 2
+            shape = (h, w) + source.shape[2:]
+            if self.mapped:
+                level = numpy.memmap(tempfile.TemporaryFile(), mode="w+",
+                                     dtype=source.dtype, shape=shape)
+            else:
+                level = numpy.empty(shape, dtype=source.dtype)
+            self._levels.append(level)
+        # which tiles of each level have already been calculated
+        self._done = [None] + [numpy.zeros(self.tileCount(i), dtype=bool)
+                               for i in range(1, len(self._levels))]
+
+    def levelCount(self):
+        return len(self._levels)
+
+    def levelShape(self, level):
+        return self._levels[level].shape[:2]
+
+    def tileCount(self, level):
+        """Returns the number of tiles (rows, columns) of the given level"""
+        h, w = self.levelShape(level)
+        t = self.tileSize
+        return (h + t - 1) // t, (w + t - 1) // t
+
+    def levelForZoom(self, zoom):
+        """Returns the coarsest level which still has at least one pixel for
+        each displayed pixel at the given zoom"""
+        if zoom >= 1:
+            return 0
+        level = int(math.floor(math.log(1.0 / zoom, 2) + 1e-9))
+        return min(level, len(self._levels) - 1)
+
+    def tile(self, level, row, column):
+        """Returns the array of the given tile"""
+        t = self.tileSize
+        array = self._levels[level]
+        y0, x0 = row * t, column * t
+        y1, x1 = min(y0 + t, array.shape[0]), min(x0 + t, array.shape[1])
+        if level > 0 and not self._done[level][row, column]:
+            rows, columns = self.tileCount(level - 1)
+            for r in range(2 * row, min(2 * row + 2, rows)):
+                for c in range(2 * column, min(2 * column + 2, columns)):
+                    self.tile(level - 1, r, c)
+            previous = self._levels[level - 1]
+            block = previous[2 * y0:2 * y1, 2 * x0:2 * x1]
+            array[y0:y1, x0:x1] = _downsample(numpy.asarray(block))
+            self._done[level][row, column] = True
+        return array[y0:y1, x0:x1]
+
+    def coarsest(self):
+        """Returns the (fully calculated) coarsest level array"""
+        level = len(self._levels) - 1
+        rows, columns = self.tileCount(level)
+        for r in range(rows):
+            for c in range(columns):
+                self.tile(level, r, c)
+        return self._levels[level]
+
+
+class _ScaleJobSignals(QtCore.QObject):
+    """Internal signal holder for :class:`_ScaleJob`"""
+
+    #: emited with (generation, QImage or None) when the job finishes
+    finished = QtCore.Signal(int, object)
+
+
+class _ScaleJob(QtCore.QRunnable):
+    """Internal job which smoothly scales a QImage on a worker thread"""
+
+    def __init__(self, generation, image, size, aspectRatioMode, signals):
+        QtCore.QRunnable.__init__(self)
+        self.setAutoDelete(False)
+        self.generation = generation
+        self.image = image
+        self.size = size
+        self.aspectRatioMode = aspectRatioMode
+        self.signals = signals
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def run(self):
+        result = None
+        if not self._cancelled:
+            result = self.image.scaled(self.size, self.aspectRatioMode,
+                                       QtCore.Qt.SmoothTransformation)
+        if self._cancelled:
+            result = None
+        try:
+            self.signals.finished.emit(self.generation, result)
+        except RuntimeError:
+            # widget has been destroyed in the meantime
+            pass
+
+
 class PixmapWidget(QtGui.QWidget):
     """This widget displays an image (pixmap). By default the pixmap is
     scaled to the widget size and the aspect ratio is kept.
@@ -46,6 +277,9 @@ class PixmapWidget(QtGui.QWidget):
     DefaultAlignment = QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter
     DefaultAspectRatioMode = QtCore.Qt.KeepAspectRatio
     DefaultTransformationMode = QtCore.Qt.SmoothTransformation
+    DefaultProgressive = False
+    DefaultTileSize = 256
+    DefaultTileCacheSize = 256
 
     #: Signal emited when pixmap source changes
     pixmapChanged = QtCore.Signal()
@@ -56,54 +290,560 @@ class PixmapWidget(QtGui.QWidget):
         self._alignment = self.DefaultAlignment
         self._pixmapAspectRatioMode = self.DefaultAspectRatioMode
         self._pixmapTransformationMode = self.DefaultTransformationMode
+        self._progressive = self.DefaultProgressive
+        self._image = None
+        self._scaleJob = None
+        self._scaleGeneration = 0
+        self._pendingFrame = None
+        self._frameLevels = None
+        self._frameLut = None
+        self._frameTables = {}
+        self._frameStats = dict(received=0, displayed=0, dropped=0)
+        self._tiles = None
+        self._tileCache = OrderedDict()
+        self._tileLevels = None
+        self._tileZoom = 1.0
+        self._tileOrigin = QtCore.QPointF()
+        self._panStart = None
+        self._pixmapOffset = None
+        self._opaque = False
 
         QtGui.QWidget.__init__(self, parent)
 
+        self._scaleSignals = _ScaleJobSignals(self)
+        self._scaleSignals.finished.connect(self._onScaleJobFinished)
+
     def _getPixmap(self):
+        if self._pendingFrame is not None:
+            self._displayFrame()
         if self._pixmapDrawn is None:
-            self._pixmapDrawn = self.recalculatePixmap()
+            if self._needsProgressiveScale():
+                self._pixmapDrawn = \
+                    self.recalculatePixmap(QtCore.Qt.FastTransformation)
+                self._requestSmoothPixmap()
+            else:
+                self._pixmapDrawn = self.recalculatePixmap()
         return self._pixmapDrawn
 
-    def recalculatePixmap(self):
+    def recalculatePixmap(self, transformationMode=None):
         origPixmap = self._pixmap
         if origPixmap.isNull():
             return origPixmap
-        return origPixmap.scaled(self.size(), self._pixmapAspectRatioMode,
-                                 self._pixmapTransformationMode)
+        if transformationMode is None:
+            transformationMode = self._pixmapTransformationMode
+        size = self.size()
+        # small pixmaps (ex.: leds, icons) are shared by many widgets: keep
+        # the scaled versions around
+        cache = origPixmap.width() * origPixmap.height() <= _SCALED_CACHE_AREA
+        if cache:
+            key = (origPixmap.cacheKey(), size.width(), size.height(),
+                   int(self._pixmapAspectRatioMode), int(transformationMode))
+            pixmap = _scaledCache.pop(key, None)
+            if pixmap is not None:
+                _scaledCache[key] = pixmap
+                return pixmap
+        pixmap = origPixmap.scaled(size, self._pixmapAspectRatioMode,
+                                   transformationMode)
+        if cache:
+            while len(_scaledCache) >= _SCALED_CACHE_SIZE:
+                _scaledCache.popitem(last=False)
+            _scaledCache[key] = pixmap
+        return pixmap
+
+    def _getImage(self):
+        if self._image is None:
+            self._image = self._pixmap.toImage()
+        return self._image
+
+    def _needsProgressiveScale(self):
+        if not self._progressive or self._pixmap.isNull():
+            return False
+        if self._pixmapTransformationMode != QtCore.Qt.SmoothTransformation:
+            return False
+        size = self._pixmap.size()
+        return _scaledSize(size, self.size(),
+                           self._pixmapAspectRatioMode) != size
+
+    def _requestSmoothPixmap(self):
+        # only one job at a time: if a (stale) job is still running, a new
+        # one is started when it finishes
+        if self._scaleJob is None:
+            self._startScaleJob()
+
+    def _startScaleJob(self):
+        job = _ScaleJob(self._scaleGeneration, self._getImage(), self.size(),
+                        self._pixmapAspectRatioMode, self._scaleSignals)
+        self._scaleJob = job
+        QtCore.QThreadPool.globalInstance().start(job)
+
+    def _cancelScaleJob(self):
+        if self._scaleJob is not None:
+            self._scaleJob.cancel()
+
+    def _onScaleJobFinished(self, generation, image):
+        self._scaleJob = None
+        if generation == self._scaleGeneration:
+            if image is not None:
+                self._pixmapDrawn = QtGui.QPixmap.fromImage(image)
+                self.update()
+        elif self._pixmapDrawn is not None and self._needsProgressiveScale():
+            # a preview for a newer size is displayed: scale it now
+            self._startScaleJob()
 
     def _setDirty(self):
         self._pixmapDrawn = None
+        self._pixmapOffset = None
+        self._updateOpaque()
+        self._scaleGeneration += 1
+        self._cancelScaleJob()
 
     def paintEvent(self, paintEvent):
         """Overwrite the paintEvent from QWidget to draw the pixmap"""
+        if self._tiles is not None:
+            return self._paintTiles(paintEvent.rect())
+
         pixmap = self._getPixmap()
+        if pixmap.isNull():
+            return
+        offset = self._getPixmapOffset()
+        # only blit the exposed part of the pixmap
+        target = paintEvent.rect() & QtCore.QRect(offset, pixmap.size())
+        if target.isEmpty():
+            return
+        painter = QtGui.QPainter(self)
+        painter.drawPixmap(target, pixmap, target.translated(-offset))
+
+    def _getPixmapOffset(self):
+        if self._pixmapOffset is None:
+            self._pixmapOffset = self._calcPixmapOffset(self._getPixmap())
+        return self._pixmapOffset
 
+    def _calcPixmapOffset(self, pixmap):
         w, h = self.width(), self.height()
-        painter = QtGui.QPainter(self)
-        painter.setRenderHint(QtGui.QPainter.Antialiasing)
         pw, ph = pixmap.width(), pixmap.height()
         align = self._alignment
         hAlign = align & QtCore.Qt.AlignHorizontal_Mask
         vAlign = align & QtCore.Qt.AlignVertical_Mask
         x, y = 0, 0
         if hAlign & QtCore.Qt.AlignHCenter:
-            x = (w - pw) / 2
+            x = (w - pw) // 2
         elif hAlign & QtCore.Qt.AlignRight:
             x = w - pw
         if vAlign & QtCore.Qt.AlignVCenter:
-            y = (h - ph) / 2
+            y = (h - ph) // 2
         elif vAlign & QtCore.Qt.AlignBottom:
             y = h - ph
-        x, y = max(0, x), max(0, y)
-        painter.drawPixmap(x, y, pixmap)
+        return QtCore.QPoint(max(0, x), max(0, y))
+
+    def _updateOpaque(self):
+        # if the pixmap covers the whole widget and has no transparency, Qt
+        # doesn't need to paint the background before calling paintEvent
+        pixmap, opaque = self._pixmap, False
+        if self._tiles is None and not pixmap.isNull() and \
+           not pixmap.hasAlphaChannel():
+            size = _scaledSize(pixmap.size(), self.size(),
+                               self._pixmapAspectRatioMode)
+            opaque = size.width() >= self.width() and \
+                size.height() >= self.height()
+        if opaque != self._opaque:
+            self._opaque = opaque
+            self.setAttribute(QtCore.Qt.WA_OpaquePaintEvent, opaque)
 
     def resizeEvent(self, event):
         self._setDirty()
         return QtGui.QWidget.resizeEvent(self, event)
 
     def sizeHint(self):
+        if self._tiles is not None:
+            t = self._tiles.tileSize
+            return QtCore.QSize(t, t)
         return self._pixmap.size()
 
+    def wheelEvent(self, event):
+        if self._tiles is None:
+            return QtGui.QWidget.wheelEvent(self, event)
+        if hasattr(event, "angleDelta"):
+            delta = event.angleDelta().y()
+        else:
+            delta = event.delta()
+        factor = 1.25 ** (delta / 120.0)
+        anchor = QtCore.QPointF(event.pos())
+        self.setZoom(self._tileZoom * factor, anchor=anchor)
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if self._tiles is not None and event.button() == QtCore.Qt.LeftButton:
+            self._panStart = event.pos()
+            self.setCursor(QtCore.Qt.ClosedHandCursor)
+            event.accept()
+        else:
+            QtGui.QWidget.mousePressEvent(self, event)
+
+    def mouseMoveEvent(self, event):
+        if self._panStart is not None:
+            pos = event.pos()
+            delta = pos - self._panStart
+            self._panStart = pos
+            self.pan(delta.x(), delta.y())
+            event.accept()
+        else:
+            QtGui.QWidget.mouseMoveEvent(self, event)
+
+    def mouseReleaseEvent(self, event):
+        if self._panStart is not None:
+            self._panStart = None
+            self.setCursor(QtCore.Qt.OpenHandCursor)
+            event.accept()
+        else:
+            QtGui.QWidget.mouseReleaseEvent(self, event)
+
+    #--------------------------------------------------------------------------
+    # tiled mode
+    #--------------------------------------------------------------------------
+
+    def setTiledImage(self, image, tileSize=None):
+        """Enables tiled mode to display the given image. The image can be
+        a numpy array (preferably a numpy.memmap) of the same types accepted
+        by :meth:`~PixmapWidget.setFrame` or the file name of a numpy (.npy)
+        file, which will be memory-mapped. Setting it to None disables tiled
+        mode.
+
+        :param image: the image
+        :type  image: numpy.ndarray or str
+        :param tileSize: tile size in pixels [default: 256]
+        :type  tileSize: int"""
+        self._clearTileCache()
+        self._tileLevels = None
+        if image is None:
+            self._tiles = None
+            self.unsetCursor()
+        else:
+            if numpy is None:
+                raise ImportError("numpy is required to display tiled images")
+            if tileSize is None:
+                tileSize = self.DefaultTileSize
+            self._tiles = _TilePyramid(image, tileSize=tileSize)
+            self.setCursor(QtCore.Qt.OpenHandCursor)
+            self.zoomToFit()
+        self._updateOpaque()
+        self.updateGeometry()
+        self.update()
+
+    def getTiledImage(self):
+        """Returns the image displayed in tiled mode or None if tiled mode is
+        disabled.
+
+        :return: the tiled image
+        :rtype: numpy.ndarray"""
+        if self._tiles is None:
+            return None
+        return self._tiles.source
+
+    def resetTiledImage(self):
+        """Disables tiled mode"""
+        self.setTiledImage(None)
+
+    def isTiled(self):
+        """Returns True if the widget is in tiled mode.
+
+        :return: True if the widget is in tiled mode or False otherwise
+        :rtype: bool"""
+        return self._tiles is not None
+
+    def getZoom(self):
+        """Returns the tiled mode zoom (number of widget pixels per image
+        pixel).
+
+        :return: the current zoom
+        :rtype: float"""
+        return self._tileZoom
+
+    def setZoom(self, zoom, anchor=None):
+        """Sets the tiled mode zoom (number of widget pixels per image
+        pixel). The image point under *anchor* (in widget coordinates,
+        default is the widget center) stays in place.
+
+        :param zoom: the new zoom
+        :type  zoom: float
+        :param anchor: the zoom anchor point
+        :type  anchor: QtCore.QPointF"""
+        zoom = min(max(zoom, 1e-4), 64.0)
+        if anchor is None:
+            anchor = QtCore.QPointF(self.width() / 2.0, self.height() / 2.0)
+        old = self._tileZoom
+        self._tileOrigin += anchor / old - anchor / zoom
+        self._tileZoom = zoom
+        self.update()
+
+    def pan(self, dx, dy):
+        """Moves the tiled image by the given amount of widget pixels
+
+        :param dx: horizontal displacement
+        :type  dx: float
+        :param dy: vertical displacement
+        :type  dy: float"""
+        self._tileOrigin -= QtCore.QPointF(dx, dy) / self._tileZoom
+        self.scroll(int(dx), int(dy))
+
+    def zoomToFit(self):
+        """Zooms and pans the tiled image so it fits the widget (according
+        to the current alignment)"""
+        if self._tiles is None:
+            return
+        h, w = self._tiles.levelShape(0)
+        zoom = min(self.width() / float(w), self.height() / float(h))
+        if zoom <= 0:
+            zoom = 1.0
+        self._tileZoom = zoom
+        x, y = 0.0, 0.0
+        align = self._alignment
+        if align & QtCore.Qt.AlignHCenter:
+            x = (self.width() - w * zoom) / 2.0
+        elif align & QtCore.Qt.AlignRight:
+            x = self.width() - w * zoom
+        if align & QtCore.Qt.AlignVCenter:
+            y = (self.height() - h * zoom) / 2.0
+        elif align & QtCore.Qt.AlignBottom:
+            y = self.height() - h * zoom
+        self._tileOrigin = QtCore.QPointF(-x / zoom, -y / zoom)
+        self.update()
+
+    def _clearTileCache(self):
+        self._tileCache = OrderedDict()
+
+    def _getTilePixmap(self, level, row, column):
+        key = level, row, column
+        cache = self._tileCache
+        pixmap = cache.pop(key, None)
+        if pixmap is None:
+            tiles = self._tiles
+            levels = self._frameLevels
+            if levels == "auto":
+                # same levels for all tiles: take them from the coarsest level
+                if self._tileLevels is None:
+                    coarsest = tiles.coarsest()
+                    self._tileLevels = coarsest.min(), coarsest.max()
+                levels = self._tileLevels
+            tile = tiles.tile(level, row, column)
+            image = self._frameToImage(tile, levels=levels)
+            pixmap = QtGui.QPixmap.fromImage(image)
+            while len(cache) >= self.DefaultTileCacheSize:
+                cache.popitem(last=False)
+        cache[key] = pixmap
+        return pixmap
+
+    def _paintTiles(self, rect):
+        tiles, zoom, origin = self._tiles, self._tileZoom, self._tileOrigin
+        level = tiles.levelForZoom(zoom)
+        rows, columns = tiles.tileCount(level)
+        # size of a tile in image (level 0) pixels
+        size = float(tiles.tileSize * 2 ** level)
+        x0 = origin.x() + rect.left() / zoom
+        x1 = origin.x() + (rect.right() + 1) / zoom
+        y0 = origin.y() + rect.top() / zoom
+        y1 = origin.y() + (rect.bottom() + 1) / zoom
+        c0, c1 = max(0, int(x0 // size)), min(columns - 1, int(x1 // size))
+        r0, r1 = max(0, int(y0 // size)), min(rows - 1, int(y1 // size))
+
+        painter = QtGui.QPainter(self)
+        painter.setClipRect(rect)
+        smooth = self._pixmapTransformationMode == \
+            QtCore.Qt.SmoothTransformation
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, smooth)
+        scale = 2 ** level * zoom
+        for row in range(r0, r1 + 1):
+            for column in range(c0, c1 + 1):
+                pixmap = self._getTilePixmap(level, row, column)
+                target = QtCore.QRectF((column * size - origin.x()) * zoom,
+                                       (row * size - origin.y()) * zoom,
+                                       pixmap.width() * scale,
+                                       pixmap.height() * scale)
+                painter.drawPixmap(target, pixmap,
+                                   QtCore.QRectF(pixmap.rect()))
+
+    #--------------------------------------------------------------------------
+    # frame streaming
+    #--------------------------------------------------------------------------
+
+    def setFrame(self, frame, shape=None, dtype="uint8"):
+        """Sets a new frame to be displayed. The frame is only converted when
+        the widget is repainted: if a new frame arrives before the previous
+        one has been displayed, the previous one is dropped.
+        :attr:`pixmapChanged` is emitted when the frame is displayed.
+
+        Supported frames are numpy arrays of shape (height, width) (uint8 or
+        uint16 mono), (height, width, 3) (uint8 RGB) or (height, width, 4)
+        (uint8 RGBA). Bytes like objects are also accepted if *shape* is
+        given. Frames whose rows are contiguous in memory are wrapped without
+        copying, so the buffer must not be modified until the frame is
+        displayed.
+
+        Mono frames are stretched according to the
+        :meth:`~PixmapWidget.setFrameLevels` and colored according to the
+        :meth:`~PixmapWidget.setFrameLut`.
+
+        :param frame: the frame
+        :type  frame: numpy.ndarray or bytes
+        :param shape: frame shape (only used if frame is bytes like)
+        :type  shape: tuple<int>
+        :param dtype: frame data type (only used if frame is bytes like)
+        :type  dtype: str or numpy.dtype"""
+        if numpy is None:
+            raise ImportError("numpy is required to display frames")
+        if not isinstance(frame, numpy.ndarray):
+            if shape is None:
+                raise ValueError("shape is required for bytes like frames")
+            frame = numpy.frombuffer(frame, dtype=dtype).reshape(shape)
+        if frame.ndim not in (2, 3) or \
+           frame.dtype not in (numpy.uint8, numpy.uint16) or \
+           (frame.ndim == 3 and (frame.dtype != numpy.uint8 or
+                                 frame.shape[2] not in (3, 4))):
+            raise ValueError("Unsupported frame (shape=%s, dtype=%s)"
+                             % (frame.shape, frame.dtype))
+        stats = self._frameStats
+        stats["received"] += 1
+        if self._pendingFrame is not None:
+            stats["dropped"] += 1
+        self._pendingFrame = frame
+        self.update()
+
+    def getFrameLevels(self):
+        """Returns the levels used to stretch the frame contrast.
+
+        :return: the frame levels (low, high), 'auto' or None (full range)
+        :rtype: tuple<float, float> or str"""
+        return self._frameLevels
+
+    def setFrameLevels(self, levels):
+        """Sets the levels (low, high) used to stretch the frame contrast:
+        *low* is displayed as 0 and *high* as 255. None means the full
+        range of the frame data type and 'auto' means the minimum and
+        maximum of each frame.
+
+        :param levels: the frame levels
+        :type  levels: tuple<float, float> or str"""
+        if levels is not None and levels != "auto":
+            levels = tuple(levels)
+        self._frameLevels = levels
+        self._frameTables = {}
+        self._clearTileCache()
+        self.update()
+
+    def resetFrameLevels(self):
+        """Resets the frame levels to full data type range"""
+        self.setFrameLevels(None)
+
+    def getFrameLut(self):
+        """Returns the LUT used to display mono frames.
+
+        :return: the LUT or None (gray scale)
+        :rtype: numpy.ndarray"""
+        return self._frameLut
+
+    def setFrameLut(self, lut):
+        """Sets the LUT used to display mono frames. It must have 256 entries
+        and can be gray (shape (256,)), RGB (shape (256, 3)) or RGBA
+        (shape (256, 4)). None means gray scale.
+
+        :param lut: the LUT
+        :type  lut: numpy.ndarray"""
+        self._frameLut = lut
+        self._frameTables = {}
+        self._clearTileCache()
+        self.update()
+
+    def resetFrameLut(self):
+        """Resets the frame LUT to gray scale"""
+        self.setFrameLut(None)
+
+    def getFrameStatistics(self):
+        """Returns the number of frames received, displayed and dropped.
+
+        :return: dict with keys 'received', 'displayed' and 'dropped'
+        :rtype: dict"""
+        return dict(self._frameStats)
+
+    def resetFrameStatistics(self):
+        """Resets the frame statistics"""
+        self._frameStats = dict(received=0, displayed=0, dropped=0)
+
+    def _getFrameTables(self, dtype, levels):
+        key = dtype.str, levels
+        tables = self._frameTables.get(key)
+        if tables is None:
+            if len(self._frameTables) > 16:  # 'auto' levels change a lot
+                self._frameTables = {}
+            colorTable = _lutToColorTable(self._frameLut)
+            levelsTable = None
+            if levels is not None:
+                levelsTable = _levelsTable(dtype, levels)
+            tables = self._frameTables[key] = levelsTable, colorTable
+        return tables
+
+    def _frameToImage(self, frame, levels=None):
+        if not _isRowContiguous(frame):
+            frame = numpy.ascontiguousarray(frame)
+
+        if levels is None:
+            levels = self._frameLevels
+        if levels == "auto":
+            levels = frame.min(), frame.max()
+        elif levels is None and frame.dtype == numpy.uint16:
+            levels = 0, 0xFFFF
+        levelsTable, colorTable = self._getFrameTables(frame.dtype, levels)
+
+        height, width = frame.shape[:2]
+        if frame.ndim == 2:
+            if frame.dtype == numpy.uint16:
+                frame = levelsTable.take(frame)
+            elif levelsTable is not None:
+                # fold the contrast stretch into the color table (no copy)
+                colorTable = [colorTable[i] for i in levelsTable.tolist()]
+            fmt = QtGui.QImage.Format_Indexed8
+        else:
+            if levelsTable is not None:
+                frame = levelsTable.take(frame)
+            if frame.shape[2] == 3:
+                fmt = QtGui.QImage.Format_RGB888
+            elif hasattr(QtGui.QImage, "Format_RGBA8888"):
+                fmt = QtGui.QImage.Format_RGBA8888
+            else:
+                # old Qt: ARGB32 is stored as native endian 32 bit integers
+                if sys.byteorder == "little":
+                    frame = frame[..., [2, 1, 0, 3]]
+                else:
+                    frame = frame[..., [3, 0, 1, 2]]
+                fmt = QtGui.QImage.Format_ARGB32
+        if frame.flags.c_contiguous:
+            data = frame.data
+        else:
+            # padded rows (ex.: region of interest): wrap the buffer address
+            data = frame.ctypes.data
+        try:
+            image = QtGui.QImage(data, width, height, frame.strides[0], fmt)
+        except TypeError:
+            # Qt binding doesn't accept raw addresses
+            frame = numpy.ascontiguousarray(frame)
+            image = QtGui.QImage(frame.data, width, height, frame.strides[0],
+                                 fmt)
+        if fmt == QtGui.QImage.Format_Indexed8:
+            image.setColorTable(colorTable)
+        # keep the buffer alive as long as the image
+        image._frame = frame
+        return image
+
+    def _displayFrame(self):
+        frame, self._pendingFrame = self._pendingFrame, None
+        image = self._frameToImage(frame)
+        oldSize = self._pixmap.size()
+        self._pixmap = QtGui.QPixmap.fromImage(image)
+        self._image = None
+        self._frameStats["displayed"] += 1
+        self._setDirty()
+        if oldSize != self._pixmap.size():
+            self.updateGeometry()
+        self.pixmapChanged.emit()
+
     #--------------------------------------------------------------------------
     # QT property definition
     #--------------------------------------------------------------------------
@@ -120,10 +860,17 @@ class PixmapWidget(QtGui.QWidget):
 
         :param pixmap: the new pixmap
         :type  pixmap: QtGui.QPixmap"""
+        if pixmap is None:
+            pixmap = QtGui.QPixmap()
+        if pixmap.cacheKey() == self._pixmap.cacheKey() and \
+           self._pendingFrame is None:
+            return
         # make sure to make a copy because of bug in PyQt 4.4. This is actually
         # not copying the internal bitmap, just the qpixmap, so there is no
         # performance penalty here
         self._pixmap = QtGui.QPixmap(pixmap)
+        self._image = None
+        self._pendingFrame = None
         self._setDirty()
         self.update()
         self.pixmapChanged.emit()
@@ -185,6 +932,7 @@ class PixmapWidget(QtGui.QWidget):
         :param pixmap: the new alignment
         :type  pixmap: QtCore.Qt.Alignment"""
         self._alignment = alignment
+        self._pixmapOffset = None
         self.update()
 
     def resetAlignment(self):
@@ -192,6 +940,30 @@ class PixmapWidget(QtGui.QWidget):
         QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter"""
         self.setAlignment(self.DefaultAlignment)
 
+    def getProgressive(self):
+        """Returns if the pixmap is scaled progressively (fast preview first,
+        smooth scaling on a worker thread).
+
+        :return: True if progressive scaling is enabled or False otherwise
+        :rtype: bool"""
+        return self._progressive
+
+    def setProgressive(self, progressive):
+        """Enables/disables progressive scaling. When enabled and the
+        transformation mode is SmoothTransformation, a fast transformed
+        preview is drawn right away and the smooth scaled pixmap replaces it
+        as soon as it has been calculated on a worker thread.
+
+        :param progressive: True to enable progressive scaling
+        :type  progressive: bool"""
+        self._progressive = bool(progressive)
+        self._setDirty()
+        self.update()
+
+    def resetProgressive(self):
+        """Resets progressive scaling to False"""
+        self.setProgressive(self.DefaultProgressive)
+
     #: This property holds the widget's pixmap
     #:
     #: **Access functions:**
@@ -240,6 +1012,17 @@ class PixmapWidget(QtGui.QWidget):
                                 resetAlignment,
                                 doc="the widget's pixmap alignment")
 
+    #: This property holds the widget's progressive scaling mode
+    #:
+    #: **Access functions:**
+    #:
+    #:     * :meth:`PixmapWidget.getProgressive`
+    #:     * :meth:`PixmapWidget.setProgressive`
+    #:     * :meth:`PixmapWidget.resetProgressive`
+    progressive = QtCore.Property(bool, getProgressive, setProgressive,
+                                  resetProgressive,
+                                  doc="the widget's progressive scaling mode")
+
 
 def main():
     import sys
@@ -276,11 +1059,13 @@ def main():
             transformation_widget = QtGui.QComboBox()
             halign_widget = QtGui.QComboBox()
             valign_widget = QtGui.QComboBox()
+            progressive_widget = QtGui.QCheckBox()
             control_l.addRow("pixmap:", pixmap_widget)
             control_l.addRow("Aspect ratio mode:", ratio_widget)
             control_l.addRow("Transformation mode:", transformation_widget)
             control_l.addRow("Horiz. alignment:", halign_widget)
             control_l.addRow("Vert. alignment:", valign_widget)
+            control_l.addRow("Progressive:", progressive_widget)
 
             panel_l.addWidget(display_panel, 1)
             panel_l.addWidget(control_panel, 0)
@@ -300,6 +1085,7 @@ def main():
             ratio_widget.currentIndexChanged.connect(self.changeAspectRatio)
             halign_widget.currentIndexChanged.connect(self.changeAlignment)
             valign_widget.currentIndexChanged.connect(self.changeAlignment)
+            progressive_widget.toggled.connect(w.setProgressive)
 
             self.w = w
             self.w_pixmap = pixmap_widget
@@ -47,8 +47,12 @@ Example::
 """
 
 __all__ = ["QObjectRepresentation", "getQObjectTree", "getQObjectTreeStr",
-           "TreeQObjectInfoModel", "TreeQObjectWidget"]
+           "getQObjectIcon", "registerQObjectIcon", "unregisterQObjectIcon",
+           "TreeQObjectInfoModel", "TreeQObjectWidget", "QObjectSnapshot",
+           "QObjectLeakSampler"]
 
+import gc
+import time
 import weakref
 
 from qarbon import log
@@ -80,11 +84,16 @@ def _filter(qobject):
 
 def _buildQObjectsAsDict(qobject, container, ffilter=_filter):
 
-    container[qobject] = childs = {}
-    for child in qobject.children():
-        # Filter
-        if not ffilter(child) is None:
-            _buildQObjectsAsDict(child, childs, ffilter=ffilter)
+    # iterative (deep hierarchies would hit the recursion limit). Children
+    # are pushed in reverse order so they are visited in order
+    nodes = [(qobject, container)]
+    while nodes:
+        qobject, container = nodes.pop()
+        container[qobject] = childs = {}
+        for child in reversed(qobject.children()):
+            # Filter
+            if not ffilter(child) is None:
+                nodes.append((child, childs))
 
 
 def getQObjectTreeAsDict(qobject=None, ffilter=_filter):
@@ -103,14 +112,27 @@ def getQObjectTreeAsDict(qobject=None, ffilter=_filter):
     return tree
 
 
+def _getQObjectChildren(qobject, ffilter=_filter):
+    return [child for child in qobject.children()
+            if not ffilter(child) is None]
+
+
+def _getQObjectChildRefs(qobject, ffilter=_filter):
+    return [weakref.ref(child) for child in qobject.children()
+            if not ffilter(child) is None]
+
+
 def _buildQObjectsAsList(qobject, container, ffilter=_filter):
 
-    children = qobject.children()
-    node = qobject, []
-    container.append(node)
-    for child in children:
-        if not ffilter(child) is None:
-            _buildQObjectsAsList(child, node[1], ffilter=ffilter)
+    nodes = [(qobject, container)]
+    while nodes:
+        qobject, container = nodes.pop()
+        children = qobject.children()
+        node = qobject, []
+        container.append(node)
+        for child in reversed(children):
+            if not ffilter(child) is None:
+                nodes.append((child, node[1]))
 
 
 def getQObjectTreeAsList(qobject=None, ffilter=_filter):
@@ -160,18 +182,18 @@ def _buildQObjectStr(node, str_tree,
                        representation=QObjectRepresentation.ClassName,
                        ffilter=_filter):
 
-    qobject, children = node
-    str_node = _getQObjectStr(qobject, representation)
-    str_children = []
-    if len(children):
-        str_tree.append((str_node, str_children))
-        for child in children:
-            if ffilter(child):
-                _buildQObjectStr(child, str_children,
-                                   representation=representation,
-                                   ffilter=ffilter)
-    else:
-        str_tree.append(str_node)
+    nodes = [(node, str_tree)]
+    while nodes:
+        (qobject, children), str_tree = nodes.pop()
+        str_node = _getQObjectStr(qobject, representation)
+        if len(children):
+            str_children = []
+            str_tree.append((str_node, str_children))
+            for child in reversed(children):
+                if ffilter(child):
+                    nodes.append((child, str_children))
+        else:
+            str_tree.append(str_node)
 
 
 def getQObjectTreeStr(qobject=None,
@@ -197,83 +219,122 @@ def _getWidgetLayout(widget):
     return layout
 
 
+def _designerIcon(name):
+    return ":/designer/" + name + ".png"
+
+
+#: icon (name or QIcon) of the QObjects of a class (and of its subclasses
+#: without their own icon). See :func:`registerQObjectIcon`
+_QObjectIcons = {
+    QtGui.QWidget: _designerIcon("widget"),
+    QtGui.QLabel: _designerIcon("label"),
+    QtGui.QComboBox: _designerIcon("combobox"),
+    QtGui.QDoubleSpinBox: _designerIcon("doublespinbox"),
+    QtGui.QDateEdit: _designerIcon("dateedit"),
+    QtGui.QTimeEdit: _designerIcon("timeedit"),
+    QtGui.QDateTimeEdit: _designerIcon("datetimeedit"),
+    QtGui.QLineEdit: _designerIcon("linedit"),
+    QtGui.QPlainTextEdit: _designerIcon("plaintextedit"),
+    QtGui.QTextEdit: _designerIcon("textedit"),
+    QtGui.QTabWidget: _designerIcon("tabwidget"),
+    QtGui.QRadioButton: _designerIcon("radiobutton"),
+    QtGui.QPushButton: _designerIcon("pushbutton"),
+    QtGui.QToolButton: _designerIcon("toolbutton"),
+    QtGui.QCheckBox: _designerIcon("checkbox"),
+    QtGui.QToolBox: _designerIcon("toolbox"),
+    QtGui.QTreeView: _designerIcon("tree"),
+    QtGui.QTableView: _designerIcon("table"),
+    QtGui.QListView: _designerIcon("listbox"),
+    QtGui.QStackedWidget: _designerIcon("widgetstack"),
+    QtGui.QDockWidget: _designerIcon("dockwidget"),
+    QtGui.QCalendarWidget: _designerIcon("calendarwidget"),
+    QtGui.QDialogButtonBox: _designerIcon("dialogbuttonbox"),
+    QtGui.QFrame: _designerIcon("frame"),
+    QtGui.QAbstractSpinBox: _designerIcon("spinbox"),
+    QtGui.QAbstractButton: _designerIcon("pushbutton"),
+    QtGui.QAbstractSlider: _designerIcon("hslider"),
+    QtGui.QLayout: _designerIcon("editform"),
+    QtGui.QVBoxLayout: _designerIcon("editvlayout"),
+    QtGui.QHBoxLayout: _designerIcon("edithlayout"),
+    QtGui.QGridLayout: _designerIcon("editgrid"),
+    QtGui.QFormLayout: _designerIcon("editform"),
+    QtCore.QCoreApplication: "applications-development",
+}
+
+_DftQObjectIcon = "emblem-system"
+
+#: class -> QIcon, filled by getQObjectIcon
+_QObjectIconCache = {}
+
+#: icon name -> QIcon (classes sharing an icon name share the QIcon)
+_QObjectIconsByName = {}
+
+
+def registerQObjectIcon(klass, icon):
+    """Registers the icon of the QObjects of the given class. It is also
+    used for the subclasses without their own icon.
+
+    Example::
+
+        registerQObjectIcon(MyMotorWidget, ":/objects/motor.png")
+
+    :param klass: a QObject class
+    :type klass: type
+    :param icon: icon name (see :func:`~qarbon.qt.gui.icon.getIcon`) or
+                 QIcon
+    :type icon: str or QtGui.QIcon
+    """
+    _QObjectIcons[klass] = icon
+    _QObjectIconCache.clear()
+
+
+def unregisterQObjectIcon(klass):
+    """Unregisters the icon of the QObjects of the given class (see
+    :func:`registerQObjectIcon`)
+
+    :param klass: a QObject class
+    :type klass: type
+    """
+    _QObjectIcons.pop(klass, None)
+    _QObjectIconCache.clear()
+
+
 def getQObjectIcon(qo):
-    if isinstance(qo, QtGui.QWidget):
-        name = "widget"
-        if isinstance(qo, QtGui.QLabel):
-            name = "label"
-        elif isinstance(qo, QtGui.QComboBox):
-            name = "combobox"
-        elif isinstance(qo, QtGui.QDoubleSpinBox):
-            name = "doublespinbox"
-        elif isinstance(qo, QtGui.QDateEdit):
-            name = "dateedit"
-        elif isinstance(qo, QtGui.QTimeEdit):
-            name = "timeedit"
-        elif isinstance(qo, QtGui.QDateTimeEdit):
-            name = "datetimeedit"
-        elif isinstance(qo, QtGui.QLineEdit):
-            name = "linedit"
-        elif isinstance(qo, QtGui.QPlainTextEdit):
-            name = "plaintextedit"
-        elif isinstance(qo, QtGui.QTextEdit):
-            name = "textedit"
-        elif isinstance(qo, QtGui.QTabWidget):
-            name = "tabwidget"
-        elif isinstance(qo, QtGui.QRadioButton):
-            name = "radiobutton"
-        elif isinstance(qo, QtGui.QPushButton):
-            name = "pushbutton"
-        elif isinstance(qo, QtGui.QToolButton):
-            name = "toolbutton"
-        elif isinstance(qo, QtGui.QCheckBox):
-            name = "checkbox"
-        elif isinstance(qo, QtGui.QToolBox):
-            name = "toolbox"
-        elif isinstance(qo, QtGui.QTreeView):
-            name = "tree"
-        elif isinstance(qo, QtGui.QTableView):
-            name = "table"
-        elif isinstance(qo, QtGui.QListView):
-            name = "listbox"
-        elif isinstance(qo, QtGui.QStackedWidget):
-            name = "widgetstack"
-        elif isinstance(qo, QtGui.QDockWidget):
-            name = "dockwidget"
-        elif isinstance(qo, QtGui.QDockWidget):
-            name = "dockwidget"
-        elif isinstance(qo, QtGui.QCalendarWidget):
-            name = "calendarwidget"
-        elif isinstance(qo, QtGui.QDialogButtonBox):
-            name = "dialogbuttonbox"
-        elif isinstance(qo, QtGui.QFrame):
-            name = "frame"
-        elif isinstance(qo, QtGui.QAbstractSpinBox):
-            name = "spinbox"
-        elif isinstance(qo, QtGui.QAbstractButton):
-            name = "pushbutton"
-        elif isinstance(qo, QtGui.QAbstractSlider):
-            name = "hslider"
-        return Icon(":/designer/" + name + ".png")
-    elif isinstance(qo, QtGui.QLayout):
-        name = "editform"
-        if isinstance(qo, QtGui.QVBoxLayout):
-            name = "editvlayout"
-        elif isinstance(qo, QtGui.QHBoxLayout):
-            name = "edithlayout"
-        elif isinstance(qo, QtGui.QGridLayout):
-            name = "editgrid"
-        elif isinstance(qo, QtGui.QFormLayout):
-            name = "editform"
-    elif isinstance(qo, QtCore.QCoreApplication):
-        return Icon("applications-development")
-    return Icon("emblem-system")
+    """Returns the icon representing the given QObject. The icon is looked up
+    (through the class MRO, see :func:`registerQObjectIcon`) and loaded only
+    once per class.
+
+    :param qo: the QObject
+    :type qo: QtCore.QObject
+    :return: the QObject icon
+    :rtype: QtGui.QIcon
+    """
+    klass = type(qo)
+    icon = _QObjectIconCache.get(klass)
+    if icon is None:
+        for base in klass.__mro__:
+            name = _QObjectIcons.get(base)
+            if name is not None:
+                break
+        else:
+            name = _DftQObjectIcon
+        if isinstance(name, QtGui.QIcon):
+            icon = name
+        else:
+            icon = _QObjectIconsByName.get(name)
+            if icon is None:
+                icon = _QObjectIconsByName[name] = Icon(name)
+        _QObjectIconCache[klass] = icon
+    return icon
 
 
 class TreeQObjecttInfoItem(BaseTreeItem):
 
+    __slots__ = ("qobject", "__key", "__toolTip", "__icon")
+
     def __init__(self, model, data, parent=None):
         BaseTreeItem.__init__(self, model, data, parent=parent)
+        self.__key = id(data)
         if data is not None:
             self.qobject = weakref.ref(data)
             dat = (_getQObjectStr(data, QR.ClassName),
@@ -282,6 +343,38 @@ class TreeQObjecttInfoItem(BaseTreeItem):
         self.__toolTip = _getQObjectStr(data, QR.FullName)
         self.__icon = getQObjectIcon(data)
 
+    def key(self):
+        return self.__key
+
+    def updateQObject(self):
+        """Updates the displayed names and tool tip from the QObject (after
+        its object name changed, for example)"""
+        qobject = self.qobject()
+        if qobject is None:
+            return
+        self.setData(0, (_getQObjectStr(qobject, QR.ClassName),
+                         _getQObjectStr(qobject, QR.ObjectName)))
+        self.__toolTip = _getQObjectStr(qobject, QR.FullName)
+
+    def createChild(self, source):
+        qobject = source()
+        if qobject is None:
+            return None
+        try:
+            children = _getQObjectChildRefs(qobject)
+        except RuntimeError:
+            return None  # deleted before being fetched
+        item = TreeQObjecttInfoItem(self._model, qobject, self)
+        item.setPendingChildren(children)
+        return item
+
+    def updateFrom(self, other):
+        changed = BaseTreeItem.updateFrom(self, other)
+        self.qobject = other.qobject
+        self.__toolTip = other.__toolTip
+        self.__icon = other.__icon
+        return changed
+
     def toolTip(self, index):
         return self.__toolTip
 
@@ -290,13 +383,258 @@ class TreeQObjecttInfoItem(BaseTreeItem):
             return self.__icon
 
 
+class _QObjectTracker(QtCore.QObject):
+    """Event filter which reports the changes of the tracked QObjects to a
+    :class:`TreeQObjectInfoModel`"""
+
+    ChildEvents = frozenset((QtCore.QEvent.ChildAdded,
+                             QtCore.QEvent.ChildRemoved))
+
+    #: Qt 4 only: Qt 5 emits objectNameChanged instead (None if missing)
+    NameChangeEvent = getattr(QtCore.QEvent, "ObjectNameChange", None)
+
+    def __init__(self, model):
+        QtCore.QObject.__init__(self, model)
+        self._model = model
+
+    def eventFilter(self, qobject, event):
+        eventType = event.type()
+        if eventType in self.ChildEvents:
+            self._model._onQObjectChildrenChanged(qobject)
+        elif eventType == self.NameChangeEvent:
+            self._model._onQObjectNameChanged(qobject)
+        return False
+
+
 class TreeQObjectInfoModel(BaseModel):
 
     ColumnNames = "Class", "Object name"
     ColumnRoles = (QR.ClassName,), QR.ObjectName
 
+    DftLazy = True
+
+    #: default live mode (see :meth:`setLive`)
+    DftLive = False
+
+    #: default time (ms) during which QObject hierarchy changes are collected
+    #: before updating the model in live mode
+    DftLiveUpdateInterval = 100
+
     def __init__(self, parent=None, data=None):
+        self._live = False
+        self._tracker = None
+        self._tracked = {}
+        self._dirty = set()
         BaseModel.__init__(self, parent=parent, data=data)
+        self._liveTimer = timer = QtCore.QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(self.DftLiveUpdateInterval)
+        timer.timeout.connect(self._syncLive)
+        self.modelAboutToBeReset.connect(self._onAboutToBeReset)
+        self.modelReset.connect(self._onReset)
+        self.rowsInserted.connect(self._onRowsInserted)
+        self.rowsAboutToBeRemoved.connect(self._onRowsAboutToBeRemoved)
+        if self.DftLive:
+            self.setLive(True)
+
+    def setLive(self, live):
+        """Sets the live mode. In live mode the model follows the changes of
+        the QObject hierarchy (children added or removed, object names
+        changed) through event filters installed on the QObjects of the
+        model items and updates only the affected rows.
+
+        :param live: True to follow the QObject hierarchy changes
+        :type live: bool
+        """
+        live = bool(live)
+        if live == self._live:
+            return
+        self._live = live
+        if live:
+            self._tracker = _QObjectTracker(self)
+            self._trackItem(self._rootItem)
+        else:
+            self._untrackAll()
+            self._tracker.setParent(None)
+            self._tracker = None
+
+    def isLive(self):
+        """Tells if the model follows the QObject hierarchy changes
+
+        :return: True if the model is in live mode or False otherwise
+        :rtype: bool
+        """
+        return self._live
+
+    def setLiveUpdateInterval(self, interval):
+        """Sets the time during which QObject hierarchy changes are collected
+        before updating the model in live mode
+
+        :param interval: interval (ms)
+        :type interval: int
+        """
+        self._liveTimer.setInterval(interval)
+
+    def getLiveUpdateInterval(self):
+        """Returns the time during which QObject hierarchy changes are
+        collected before updating the model in live mode
+
+        :return: interval (ms)
+        :rtype: int
+        """
+        return self._liveTimer.interval()
+
+    def resetLiveUpdateInterval(self):
+        """Resets the live update interval to
+        :attr:`DftLiveUpdateInterval`"""
+        self.setLiveUpdateInterval(self.DftLiveUpdateInterval)
+
+    def _trackItem(self, item):
+        """Installs the event filter on the QObjects of the given item and
+        of all its descendants"""
+        if item is None:
+            return
+        tracker, tracked = self._tracker, self._tracked
+        items = [item]
+        while items:
+            item = items.pop()
+            items.extend(item._childItems)
+            ref = getattr(item, "qobject", None)
+            qobject = ref and ref()
+            if qobject is None:
+                continue
+            if qobject not in tracked:
+                try:
+                    qobject.installEventFilter(tracker)
+                except RuntimeError:
+                    continue  # already deleted
+                # Qt 5 emits objectNameChanged instead of sending an
+                # ObjectNameChange event
+                nameChanged = getattr(qobject, "objectNameChanged", None)
+                if nameChanged is not None:
+                    nameChanged.connect(self._onObjectNameChanged)
+            # also keeps the python object (and its id, the item key) alive
+            tracked[qobject] = item
+
+    def _untrackItem(self, item):
+        tracked = self._tracked
+        items = [item]
+        while items:
+            item = items.pop()
+            items.extend(item._childItems)
+            ref = getattr(item, "qobject", None)
+            qobject = ref and ref()
+            if tracked.pop(qobject, None) is None:
+                continue
+            self._dirty.discard(qobject)
+            self._untrackQObject(qobject)
+
+    def _untrackQObject(self, qobject):
+        try:
+            qobject.removeEventFilter(self._tracker)
+            nameChanged = getattr(qobject, "objectNameChanged", None)
+            if nameChanged is not None:
+                nameChanged.disconnect(self._onObjectNameChanged)
+        except (RuntimeError, TypeError):
+            pass  # already deleted
+
+    def _untrackAll(self):
+        for qobject in self._tracked:
+            self._untrackQObject(qobject)
+        self._tracked.clear()
+        self._dirty.clear()
+
+    def _onAboutToBeReset(self):
+        if self._live:
+            self._untrackAll()
+
+    def _onReset(self):
+        if self._live:
+            self._trackItem(self._rootItem)
+
+    def _parentItem(self, parent):
+        if parent.isValid():
+            return parent.internalPointer()
+        return self._rootItem
+
+    def _onRowsInserted(self, parent, first, last):
+        if self._live:
+            children = self._parentItem(parent)._childItems
+            for row in range(first, last + 1):
+                self._trackItem(children[row])
+
+    def _onRowsAboutToBeRemoved(self, parent, first, last):
+        if self._live:
+            children = self._parentItem(parent)._childItems
+            for row in range(first, last + 1):
+                self._untrackItem(children[row])
+
+    def _onQObjectChildrenChanged(self, qobject):
+        # the new child may not be completely built yet: the children are
+        # synchronized later (which also merges bursts of changes)
+        if qobject in self._tracked:
+            self._dirty.add(qobject)
+            if not self._liveTimer.isActive():
+                self._liveTimer.start()
+
+    def _onQObjectNameChanged(self, qobject):
+        item = self._tracked.get(qobject)
+        if item is not None:
+            item.updateQObject()
+            self.itemChanged(item)
+
+    def _onObjectNameChanged(self, name):
+        self._onQObjectNameChanged(self.sender())
+
+    def _syncLive(self):
+        dirty, self._dirty = self._dirty, set()
+        for qobject in dirty:
+            item = self._tracked.get(qobject)
+            if item is not None and self._isAttached(item):
+                self._syncChildren(item, qobject)
+
+    def _syncChildren(self, item, qobject):
+        """Updates the children of the given item to match the children of
+        its QObject, with the corresponding row insertions and removals"""
+        try:
+            current = _getQObjectChildren(qobject)
+        except RuntimeError:
+            return  # deleted: its parent will remove it
+        currentKeys = set(id(child) for child in current)
+        parent = self.createIndex(item.row(), 0, item)
+
+        children = item._childItems
+        for row in range(len(children) - 1, -1, -1):
+            if children[row].key() not in currentKeys:
+                self.beginRemoveRows(parent, row, row)
+                item.removeChild(row)
+                self.endRemoveRows()
+
+        known = set(child.key() for child in item._childItems)
+        pending = []
+        for ref in item._pending or ():
+            child = ref()
+            if child is not None and id(child) in currentKeys:
+                pending.append(ref)
+                known.add(id(child))
+        new = [child for child in current if id(child) not in known]
+        if pending:
+            # not shown yet: they will be built when fetched
+            item.setPendingChildren(pending +
+                                    [weakref.ref(child) for child in new])
+            return
+        item.setPendingChildren(())
+        if not new:
+            return
+        first = item.childCount()
+        self.beginInsertRows(parent, first, first + len(new) - 1)
+        for child in new:
+            if self.isLazy():
+                item.appendChild(item.createChild(weakref.ref(child)))
+            else:
+                for node in getQObjectTree(qobject=child):
+                    TreeQObjectInfoModel._build_qobject_item(self, item, node)
+        self.endInsertRows()
 
     def role(self, column, depth=0):
         if column == 0:
@@ -314,17 +652,24 @@ class TreeQObjectInfoModel(BaseModel):
 
     @staticmethod
     def _build_qobject_item(model, parent, node):
-        qobject, children = node
-        item = TreeQObjecttInfoItem(model, qobject, parent)
-        parent.appendChild(item)
-        for child in children:
-            TreeQObjectInfoModel._build_qobject_item(model, item, child)
+        nodes = [(parent, node)]
+        while nodes:
+            parent, (qobject, children) = nodes.pop()
+            item = TreeQObjecttInfoItem(model, qobject, parent)
+            parent.appendChild(item)
+            nodes.extend((item, child) for child in reversed(children))
 
     def setupModelData(self, qobject):
         if qobject is None:
             return
-        data = getQObjectTree(qobject=qobject)
         rootItem = self._rootItem
+        if self.isLazy():
+            if not _filter(qobject) is None:
+                item = TreeQObjecttInfoItem(self, qobject, rootItem)
+                item.setPendingChildren(_getQObjectChildRefs(qobject))
+                rootItem.appendChild(item)
+            return
+        data = getQObjectTree(qobject=qobject)
         for node in data:
             TreeQObjectInfoModel._build_qobject_item(self, rootItem, node)
 
@@ -349,13 +694,320 @@ class TreeQObjectWidget(BaseTreeWidget):
 
     def __init__(self, parent=None, with_navigation_bar=True,
                  with_filter_widget=True, perspective=None, proxy=None,
-                 qobject=None):
+                 qobject=None, live=False):
         BaseTreeWidget.__init__(self, parent,
                                 with_navigation_bar=with_navigation_bar,
                                 with_filter_widget=with_filter_widget,
                                 perspective=perspective, proxy=proxy)
         qmodel = self.getQModel()
         qmodel.setDataSource(qobject)
+        if live:
+            self.getBaseQModel().setLive(True)
+
+
+_QObjectClassNames = {}
+
+
+def _qobjectClassName(klass):
+    name = _QObjectClassNames.get(klass)
+    if name is None:
+        name = _QObjectClassNames[klass] = "{0}.{1}".format(
+            klass.__module__, klass.__name__)
+    return name
+
+
+class QObjectSnapshot(object):
+    """A snapshot of the live QObjects: the QObject hierarchy of the given
+    object (or of the application and all its top level widgets) walked
+    iteratively. For each QObject it keeps its class, object name, parent
+    and a weak reference (a snapshot never keeps QObjects alive).
+
+    Comparing snapshots taken at different times shows the classes which
+    grew, which helps finding "zombie" QObjects::
+
+        before = QObjectSnapshot()
+        open_and_close_some_dialog()
+        after = QObjectSnapshot()
+        print(after.report(before))
+
+    .. note:: weak references to QObjects created in C++ (not from python)
+              may die as soon as their python wrapper is released even if
+              the QObject is still alive. Counts are not affected.
+
+    :param qobject: the QObject to walk [default: None, meaning the
+                    application and all the top level widgets]
+    :type qobject: QtCore.QObject
+    :param orphans: also walk the parentless QObjects known to the python
+                    garbage collector (slower) [default: False]
+    :type orphans: bool
+    """
+
+    def __init__(self, qobject=None, orphans=False):
+        self._time = time.time()
+        refs, classes, names, parents = [], [], [], []
+        self._refs, self._classes = refs, classes
+        self._names, self._parents = names, parents
+        if qobject is None:
+            app = Application()
+            roots = [app] + app.topLevelWidgets()
+        else:
+            roots = [qobject]
+        if orphans:
+            roots += [obj for obj in gc.get_objects()
+                      if isinstance(obj, QtCore.QObject)
+                      and self._isOrphan(obj)]
+        seen = set()
+        nodes = [(root, -1) for root in reversed(roots)]
+        while nodes:
+            qobject, parent = nodes.pop()
+            if id(qobject) in seen:
+                continue
+            seen.add(id(qobject))
+            try:
+                name = qobject.objectName()
+                children = qobject.children()
+            except RuntimeError:
+                continue  # deleted in the meantime
+            index = len(refs)
+            refs.append(weakref.ref(qobject))
+            classes.append(_qobjectClassName(type(qobject)))
+            names.append(name)
+            parents.append(parent)
+            nodes.extend((child, index) for child in reversed(children))
+        counts = self._counts = {}
+        for klass in classes:
+            counts[klass] = counts.get(klass, 0) + 1
+
+    @staticmethod
+    def _isOrphan(qobject):
+        try:
+            return qobject.parent() is None
+        except RuntimeError:
+            return False
+
+    def __len__(self):
+        return len(self._refs)
+
+    def time(self):
+        """Returns when the snapshot was taken
+
+        :return: time (seconds since the epoch)
+        :rtype: float
+        """
+        return self._time
+
+    def counts(self):
+        """Returns the number of QObjects per class
+
+        :return: class name -> number of QObjects
+        :rtype: dict<str, int>
+        """
+        return dict(self._counts)
+
+    def entries(self, className=None):
+        """Generator of (qobject, class name, object name, parent chain) for
+        every QObject of the snapshot (or only the ones of the given class).
+        qobject is None if it is gone. The parent chain is the list of
+        'class("object name")' of the parents, the closest first.
+
+        :param className: class name (as in :meth:`counts`)
+                          [default: None, meaning all]
+        :type className: str
+        """
+        classes, names = self._classes, self._names
+        for i, ref in enumerate(self._refs):
+            if className is None or classes[i] == className:
+                yield ref(), classes[i], names[i], self.parentChain(i)
+
+    def parentChain(self, index):
+        """Returns the parent chain of the QObject at the given snapshot
+        index (see :meth:`entries`)
+
+        :param index: the snapshot index
+        :type index: int
+        :return: the 'class("object name")' of the parents, the closest
+                 first
+        :rtype: list<str>
+        """
+        chain = []
+        index = self._parents[index]
+        while index >= 0:
+            chain.append('{0}("{1}")'.format(self._classes[index],
+                                             self._names[index]))
+            index = self._parents[index]
+        return chain
+
+    def objects(self, className=None):
+        """Returns the QObjects of the snapshot which are still alive (or
+        only the ones of the given class)
+
+        :param className: class name (as in :meth:`counts`)
+                          [default: None, meaning all]
+        :type className: str
+        :return: the live QObjects
+        :rtype: list<QtCore.QObject>
+        """
+        classes, result = self._classes, []
+        for i, ref in enumerate(self._refs):
+            if className is None or classes[i] == className:
+                qobject = ref()
+                if qobject is not None:
+                    result.append(qobject)
+        return result
+
+    def newEntries(self, older):
+        """Generator of the :meth:`entries` of the QObjects of this snapshot
+        which were not in the older one (only for the QObjects still alive)
+
+        :param older: the older snapshot
+        :type older: QObjectSnapshot
+        """
+        known = set(id(qobject) for qobject in older.objects())
+        for entry in self.entries():
+            qobject = entry[0]
+            if qobject is not None and id(qobject) not in known:
+                yield entry
+
+    def diff(self, older):
+        """Compares the number of QObjects per class with an older snapshot
+
+        :param older: the older snapshot
+        :type older: QObjectSnapshot
+        :return: (class name, older count, count) for the classes which
+                 count changed, the ones that grew most first
+        :rtype: list<tuple<str, int, int>>
+        """
+        before, after = older._counts, self._counts
+        result = []
+        for klass in set(before) | set(after):
+            b, a = before.get(klass, 0), after.get(klass, 0)
+            if a != b:
+                result.append((klass, b, a))
+        result.sort(key=lambda item: (item[1] - item[2], item[0]))
+        return result
+
+    def report(self, older, limit=20):
+        """Returns a text table of the classes which grew since the older
+        snapshot
+
+        :param older: the older snapshot
+        :type older: QObjectSnapshot
+        :param limit: maximum number of classes [default: 20]
+        :type limit: int
+        :return: the growth report
+        :rtype: str
+        """
+        grown = [item for item in self.diff(older) if item[2] > item[1]]
+        lines = ["QObjects: {0} -> {1} in {2:.1f}s".format(
+            len(older), len(self), self._time - older._time)]
+        for klass, b, a in grown[:limit]:
+            lines.append("{0:>+8d} {1:>8d} {2}".format(a - b, a, klass))
+        if len(grown) > limit:
+            lines.append("     ... {0} more classes grew"
+                         .format(len(grown) - limit))
+        return "\n".join(lines)
+
+
+class QObjectLeakSampler(QtCore.QObject):
+    """Takes a :class:`QObjectSnapshot` periodically and logs the classes
+    which grew since the previous one::
+
+        sampler = QObjectLeakSampler()
+        sampler.start(60000)  # every minute
+    """
+
+    #: emited after each sample with the snapshot and its diff with the
+    #: previous snapshot (see :meth:`QObjectSnapshot.diff`)
+    sampled = QtCore.Signal(object, object)
+
+    #: default sampling interval (ms)
+    DftInterval = 10000
+
+    def __init__(self, qobject=None, orphans=False, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        if qobject is not None:
+            qobject = weakref.ref(qobject)
+        self._qobject = qobject
+        self._orphans = orphans
+        self._snapshot = None
+        self._timer = timer = QtCore.QTimer(self)
+        timer.setInterval(self.DftInterval)
+        timer.timeout.connect(self.sample)
+
+    def start(self, interval=None):
+        """Takes a first snapshot and starts sampling. Does nothing if the
+        sampled object has been destroyed.
+
+        :param interval: sampling interval (ms)
+                         [default: None, meaning :attr:`DftInterval`]
+        :type interval: int
+        """
+        if interval is None:
+            interval = self.DftInterval
+        snapshot = self._takeSnapshot()
+        if snapshot is None:
+            log.warning("Cannot sample QObjects: the sampled object has "
+                        "been destroyed")
+            return
+        self._snapshot = snapshot
+        self._timer.start(interval)
+
+    def stop(self):
+        """Stops sampling"""
+        self._timer.stop()
+
+    def isRunning(self):
+        """Tells if the sampler is running
+
+        :return: True if the sampler is running or False otherwise
+        :rtype: bool
+        """
+        return self._timer.isActive()
+
+    def snapshot(self):
+        """Returns the last snapshot
+
+        :return: the last snapshot (None if never sampled)
+        :rtype: QObjectSnapshot
+        """
+        return self._snapshot
+
+    def _takeSnapshot(self):
+        """Returns a new snapshot or None if the sampled object is gone
+        (a None object would snapshot the whole application)"""
+        qobject = self._qobject
+        if qobject is not None:
+            qobject = qobject()
+            try:
+                qobject.objectName()
+            except (AttributeError, RuntimeError):
+                # python object collected or Qt object deleted
+                return None
+        return QObjectSnapshot(qobject=qobject, orphans=self._orphans)
+
+    def sample(self):
+        """Takes a snapshot, logs the classes which grew since the previous
+        one and emits :attr:`sampled`. If the sampled object has been
+        destroyed, the sampler stops instead.
+
+        :return: the new snapshot (None if the sampled object is gone)
+        :rtype: QObjectSnapshot
+        """
+        snapshot = self._takeSnapshot()
+        if snapshot is None:
+            log.warning("Stopped sampling QObjects: the sampled object has "
+                        "been destroyed")
+            self.stop()
+            return None
+        previous, self._snapshot = self._snapshot, snapshot
+        if previous is None:
+            diff = []
+        else:
+            diff = snapshot.diff(previous)
+            if any(a > b for klass, b, a in diff):
+                log.info("%s", snapshot.report(previous))
+        self.sampled.emit(snapshot, diff)
+        return snapshot
 
 
 def buildGUI():
@@ -11,6 +11,8 @@
 from unittest import TestCase
 
 from qarbon.qt.gui.application import Application
+from qarbon.external.qt import QtCore, QtGui
+from qarbon.qt.gui.basemodel import BaseModel, BaseTreeItem
 
 
 class QarbonBaseTest(TestCase):
@@ -20,3 +22,30 @@ class QarbonBaseTest(TestCase):
 
     def tearDown(self):
         pass
+
+
+class TreeModel(BaseModel):
+    """A model with data branches of data leaves each"""
+
+    ColumnNames = "Name",
+    ColumnRoles = ("Root", "Branch", "Leaf"),
+
+    def roleIcon(self, role):
+        return QtGui.QIcon()
+
+    def roleSize(self, role):
+        return QtCore.QSize(100, 24)
+
+    def roleToolTip(self, role):
+        return role
+
+    def setupModelData(self, data):
+        if data is None:
+            return
+        root = self._rootItem
+        for i in range(data):
+            branch = BaseTreeItem(self, ("branch %d" % i,), root)
+            root.appendChild(branch)
+            for j in range(data):
+                branch.appendChild(BaseTreeItem(self, ("leaf %d" % j,),
+                                                branch))
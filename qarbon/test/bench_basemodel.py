@@ -0,0 +1,193 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+"""Benchmark of :class:`~qarbon.qt.gui.basemodel.BaseModel` on a flat tree
+with many siblings.
+
+Run it with::
+
+    python -m qarbon.test.bench_basemodel [number of siblings]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from qarbon.external.qt import QtCore, QtGui
+from qarbon.qt.gui.application import Application
+from qarbon.qt.gui.basemodel import BaseModel, BaseTreeItem, BaseProxyModel
+
+
+class FlatModel(BaseModel):
+    """A model with one top level node holding *data* siblings, each of
+    them with one leaf node"""
+
+    ColumnNames = "Name",
+    ColumnRoles = ("Root", "Top", "Item", "Leaf"),
+
+    def roleIcon(self, role):
+        return QtGui.QIcon()
+
+    def roleSize(self, role):
+        return QtCore.QSize(200, 24)
+
+    def roleToolTip(self, role):
+        return role
+
+    def setupModelData(self, data):
+        if data is None:
+            return
+        root = self._rootItem
+        top = BaseTreeItem(self, ("top",), root)
+        root.appendChild(top)
+        for i in range(data):
+            item = BaseTreeItem(self, ("item %d" % i,), top)
+            top.appendChild(item)
+            item.appendChild(BaseTreeItem(self, ("leaf %d" % i,), item))
+
+
+def timeit(name, func, *args):
+    t0 = time.time()
+    result = func(*args)
+    print("{0:>40}: {1:10.3f} ms".format(name, (time.time() - t0) * 1e3))
+    return result
+
+
+def walkParents(model, parent, n):
+    """Calls model.parent() for every child of parent (what a view does
+    while scrolling through all rows)"""
+    index, parentOf = model.index, model.parent
+    for row in range(n):
+        parentOf(index(row, 0, parent))
+
+
+def walkLeafParents(model, parent, n):
+    """Calls model.parent() for the leaf of every sibling (the parent row
+    has to be found among all siblings)"""
+    index, parentOf = model.index, model.parent
+    for row in range(n):
+        parentOf(index(0, 0, index(row, 0, parent)))
+
+
+def richToolTip(item, index):
+    return "<html><b>{0}</b><br/>depth: {1}, row: {2}</html>".format(
+        item.data(index), item.depth(), item.row())
+
+
+def walkData(model, indexes, roles):
+    """Calls model.data() for every index and the given roles"""
+    data = model.data
+    for index in indexes:
+        for role in roles:
+            data(index, role)
+
+
+def updateEach(model, items):
+    """Updates every item emitting dataChanged for each one"""
+    createIndex, emit = model.createIndex, model.dataChanged.emit
+    for row, item in enumerate(items):
+        item.setData(None, ("new %d" % row,))
+        emit(createIndex(row, 0, item), createIndex(row, 0, item))
+
+
+def updateBatched(model, items):
+    """Updates every item through BaseModel.setItemData"""
+    setItemData = model.setItemData
+    for row, item in enumerate(items):
+        setItemData(item, ("new %d" % row,))
+    model.flushChanges()
+
+
+def main(n=100000):
+    app = Application()
+    model = timeit("build %d siblings" % n, FlatModel, None, n)
+    top = model.index(0, 0)
+    timeit("parent() of every sibling", walkParents, model, top, n)
+    timeit("parent() of every leaf", walkLeafParents, model, top, n)
+    item = top.internalPointer()
+    timeit("row() of every sibling",
+           lambda: [child.row() for child in item._childItems])
+    timeit("insertChild(0) + row() of last sibling",
+           lambda: (item.insertChild(0, BaseTreeItem(model, ("new",), item)),
+                    item.child(n).row()))
+    timeit("row() of every sibling (after insert)",
+           lambda: [child.row() for child in item._childItems])
+    roles = (QtCore.Qt.DisplayRole, QtCore.Qt.DecorationRole,
+             QtCore.Qt.ToolTipRole, QtCore.Qt.FontRole)
+    indexes = [model.index(row, 0, top) for row in range(n)]
+    timeit("data() x 4 roles of every sibling", walkData, model, indexes,
+           roles)
+    model.setRoleHandler(QtCore.Qt.ToolTipRole, richToolTip)
+    timeit("same with a rich tool tip", walkData, model, indexes, roles)
+    model.setRoleCacheEnabled(True)
+    timeit("same, filling the role cache", walkData, model, indexes, roles)
+    timeit("same, from the role cache", walkData, model, indexes, roles)
+    model.setRoleCacheEnabled(False)
+    print("{0:>40}: {1}".format("data() calls per role",
+                                model.getRoleStatistics()))
+
+    items = top.internalPointer()._childItems
+    signals = []
+    model.dataChanged.connect(lambda *args: signals.append(1))
+    timeit("update every sibling, one dataChanged each", updateEach,
+           model, items)
+    print("{0:>40}: {1}".format("dataChanged signals", len(signals)))
+    del signals[:]
+    timeit("update every sibling, batched", updateBatched, model, items)
+    print("{0:>40}: {1}".format("dataChanged signals", len(signals)))
+
+    proxy = BaseProxyModel()
+    proxy.setSourceModel(model)
+    filterView = QtGui.QTreeView()
+    filterView.setModel(proxy)
+    filterView.expandAll()
+    for text in ("item 1", "item 12", "item 123", "item 1"):
+        proxy.setFilterText(text)
+        timeit("text filter '%s'" % text, proxy.applyFilter)
+    proxy.setFilterSubstring(True)
+    for text in ("1", "12", "123"):
+        proxy.setFilterText(text)
+        timeit("sub-string text filter '%s'" % text, proxy.applyFilter)
+    filterView.setModel(None)
+    proxy.setSourceModel(None)
+
+    index = model.searchIndex()
+    timeit("build the search index", index.build)
+    for text in ("new", "new 1", "new 12345", "leaf 99"):
+        timeit("search '%s' (%d matches)" % (text, len(index.search(text))),
+               index.search, text)
+    timeit("update 1 sibling + re-index it",
+           lambda: (model.setItemData(items[0], ("renamed",)),
+                    model.flushChanges()))
+
+    view = QtGui.QTreeView()
+    view.setModel(model)
+    view.show()
+
+    def refresh(incremental):
+        model.refresh(incremental=incremental)
+        if not incremental:
+            # a reset collapses everything
+            view.expand(model.index(0, 0))
+        app.processEvents()
+
+    model._data_src = n + 1
+    timeit("reset refresh + expand, 1 new", refresh, False)
+    model._data_src = n
+    timeit("incremental refresh, 1 removed", refresh, True)
+    timeit("incremental refresh, no change", refresh, True)
+    print("{0:>40}: {1}".format("still expanded",
+                                view.isExpanded(model.index(0, 0))))
+    return app
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
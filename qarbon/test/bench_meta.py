@@ -0,0 +1,50 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+"""Micro benchmark of enumeration member lookup and comparison.
+
+Run it with::
+
+    python -m qarbon.test.bench_meta
+"""
+
+from __future__ import print_function
+
+import timeit
+
+
+SETUP = """
+from qarbon.meta import State, DataType, toState
+from qarbon.qt.gui.led import LedStatus, toLedStatus
+state = State.Moving
+"""
+
+STATEMENTS = (
+    ("State(6)", "State(6)"),
+    ("toState(6)", "toState(6)"),
+    ("toState(member)", "toState(state)"),
+    ("LedStatus(1)", "LedStatus(1)"),
+    ("toLedStatus(1)", "toLedStatus(1)"),
+    ("DataType.toDataType('int')", "DataType.toDataType('int')"),
+    ("DataType.toDataType(member)",
+     "DataType.toDataType(DataType.Float)"),
+    ("member == State.Moving", "state == State.Moving"),
+    ("member is State.Moving", "state is State.Moving"),
+)
+
+
+def main(n=200000):
+    for name, stmt in STATEMENTS:
+        dt = min(timeit.repeat(stmt, setup=SETUP, number=n, repeat=3))
+        print("{0:>30}: {1:8.3f} us".format(name, dt / n * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+"""Paint benchmark of a grid of :class:`~qarbon.qt.gui.led.Led`.
+
+Run it with::
+
+    python -m qarbon.test.bench_paint [rows] [columns]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from qarbon.external.qt import QtCore, QtGui
+from qarbon.qt.gui.application import Application
+from qarbon.qt.gui.led import Led, LedStatus
+
+
+def timeit(f, n):
+    start = time.time()
+    for _ in range(n):
+        f()
+    return (time.time() - start) / n
+
+
+def buildPanel(rows, columns):
+    panel = QtGui.QWidget()
+    layout = QtGui.QGridLayout(panel)
+    layout.setContentsMargins(0, 0, 0, 0)
+    layout.setSpacing(1)
+    leds = []
+    for row in range(rows):
+        for column in range(columns):
+            led = Led()
+            layout.addWidget(led, row, column)
+            leds.append(led)
+    panel.resize(columns * 24, rows * 24)
+    return panel, leds
+
+
+def main(rows=40, columns=40, n=20):
+    app = Application()
+    panel, leds = buildPanel(rows, columns)
+    panel.show()
+    app.processEvents()
+
+    def full_repaint():
+        panel.repaint()
+
+    def partial_repaint():
+        for led in leds:
+            led.repaint(QtCore.QRect(0, 0, 4, 4))
+
+    def toggle():
+        for led in leds:
+            led.toggleLedStatus()
+        app.processEvents()
+
+    def set_same_status():
+        for led in leds:
+            led.setLedStatus(LedStatus.On)
+        app.processEvents()
+
+    print("{0} leds ({1}x{2})".format(len(leds), rows, columns))
+    for name, f in (("full repaint", full_repaint),
+                    ("partial repaint (4x4 px)", partial_repaint),
+                    ("toggle status", toggle),
+                    ("set same status", set_same_status)):
+        dt = timeit(f, n)
+        print("{0:>26}: {1:8.3f} ms".format(name, dt * 1000))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,83 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+"""Memory benchmark of :class:`~qarbon.qt.gui.basemodel.BaseTreeItem`.
+
+Builds a leaf heavy tree (*n* nodes, *fanout* leaves per branch) and
+reports the number of bytes per node. It needs :mod:`tracemalloc`
+(python >= 3.4).
+
+Run it with::
+
+    python -m qarbon.test.bench_treeitem [number of nodes [fanout]]
+"""
+
+from __future__ import print_function
+
+import gc
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from qarbon.qt.gui.basemodel import BaseTreeItem
+
+
+class DictTreeItem(BaseTreeItem):
+    """A node with an instance dictionary and a list of children even when
+    it is a leaf (the layout :class:`BaseTreeItem` used to have)"""
+
+    def __init__(self, model, data, parent=None):
+        BaseTreeItem.__init__(self, model, data, parent=parent)
+        self._childItems = []
+
+
+def buildTree(klass, n, fanout):
+    root = klass(None, ("root",))
+    branch = None
+    for i in range(n):
+        if i % fanout == 0:
+            branch = klass(None, ("branch %d" % i,), root)
+            root.appendChild(branch)
+        leaf = klass(None, ("leaf %d" % i,), branch)
+        leaf.display()
+        branch.appendChild(leaf)
+    return root
+
+
+def measure(klass, n, fanout):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.time()
+    root = buildTree(klass, n, fanout)
+    dt = time.time() - t0
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # item data and display strings are the same for every class
+    nodes = n + n // fanout + 1
+    print("{0:>14}: {1:8.1f} bytes/node ({2:.0f} MB, built in {3:.2f} s)"
+          .format(klass.__name__, float(size) / nodes, size / 2.0 ** 20, dt))
+    return root
+
+
+def main(n=1000000, fanout=1000):
+    if tracemalloc is None:
+        print("tracemalloc not available")
+        return 1
+    print("{0} nodes, {1} leaves per branch".format(n, fanout))
+    for klass in (DictTreeItem, BaseTreeItem):
+        measure(klass, n, fanout)
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
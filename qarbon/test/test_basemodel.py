@@ -0,0 +1,416 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+import time
+
+from qarbon.test.base import QarbonBaseTest
+from qarbon.external.qt import QtCore, QtGui
+from qarbon.qt.gui.basemodel import BaseModel, BaseTreeItem, BaseProxyModel
+
+
+class SimpleModel(BaseModel):
+
+    ColumnNames = "Name",
+    ColumnRoles = ("Name", "Name"),
+
+    def setupModelData(self, data):
+        if data is None:
+            return
+        root = self._rootItem
+        for name in data:
+            root.appendChild(BaseTreeItem(self, (name,), root))
+
+
+class ListDataModel(SimpleModel):
+    """Items hold their data in a list (unhashable)"""
+
+    def setupModelData(self, data):
+        if data is None:
+            return
+        root = self._rootItem
+        for name in data:
+            root.appendChild(BaseTreeItem(self, [name], root))
+
+
+class NestedModel(SimpleModel):
+    """Data is a sequence of (name, sequence of child names)"""
+
+    def setupModelData(self, data):
+        if data is None:
+            return
+        root = self._rootItem
+        for name, childNames in data:
+            item = BaseTreeItem(self, (name,), root)
+            root.appendChild(item)
+            for childName in childNames:
+                item.appendChild(BaseTreeItem(self, (childName,), item))
+
+
+class LazyModel(SimpleModel):
+
+    DftLazy = True
+
+    def setupModelData(self, data):
+        if data is None:
+            return
+        root = self._rootItem
+        root.setPendingChildren([(name,) for name in data])
+
+
+class AsyncModel(SimpleModel):
+
+    def buildModelData(self, rootItem, data):
+        if data is None:
+            return
+        for i, name in enumerate(data):
+            time.sleep(0.001)
+            rootItem.appendChild(BaseTreeItem(self, (name,), rootItem))
+            self.reportProgress(i + 1, len(data))
+
+
+class FailingModel(AsyncModel):
+
+    def buildModelData(self, rootItem, data):
+        if data == "fail":
+            raise ValueError("cannot build")
+        AsyncModel.buildModelData(self, rootItem, data)
+
+
+class TestBaseModel(QarbonBaseTest):
+
+    def assertRows(self, item):
+        for row in range(item.childCount()):
+            self.assertEquals(item.child(row).row(), row)
+
+    def test_row(self):
+        model = SimpleModel(data=["a", "b", "c"])
+        root = model._rootItem
+        self.assertRows(root)
+        root.insertChild(0, BaseTreeItem(model, ("z",), root))
+        root.insertChild(2, BaseTreeItem(model, ("y",), root))
+        self.assertRows(root)
+        removed = root.removeChild(1)
+        self.assertEquals(removed.itemData(), ("a",))
+        self.assertRows(root)
+        root.appendChild(BaseTreeItem(model, ("x",), root))
+        self.assertRows(root)
+        for row in range(root.childCount()):
+            index = model.index(row, 0)
+            self.assertEquals(index.row(), row)
+            self.assertEquals(model.parent(index).isValid(), False)
+
+    def test_incrementalRefresh(self):
+        model = SimpleModel(data=["a", "b", "c", "d"])
+        model.setIncrementalRefresh(True)
+        self.assertEquals(model.isIncrementalRefresh(), True)
+        signals = []
+
+        def recorder(name):
+            return lambda *args: signals.append(name)
+
+        for name in ("modelReset", "rowsInserted", "rowsRemoved",
+                     "rowsMoved", "dataChanged"):
+            getattr(model, name).connect(recorder(name))
+        model.setDataSource(["a", "b", "c", "d"])
+        self.assertEquals(signals, ["modelReset"])
+        del signals[:]
+        persistent = QtCore.QPersistentModelIndex(model.index(2, 0))
+        model._data_src = ["x", "c", "a", "d", "e"]
+        model.refresh()
+        self.assertTrue("modelReset" not in signals)
+        self.assertEquals([model.data(model.index(row, 0))
+                           for row in range(model.rowCount())],
+                          ["x", "c", "a", "d", "e"])
+        self.assertEquals(persistent.row(), 1)
+        self.assertEquals(persistent.data(), "c")
+        self.assertRows(model._rootItem)
+
+        # list item data is matched as a tuple
+        model = ListDataModel(data=["a", "b"])
+        model.setIncrementalRefresh(True)
+        model._data_src = ["b", "c"]
+        model.refresh()
+        self.assertEquals([model.data(model.index(row, 0))
+                           for row in range(model.rowCount())], ["b", "c"])
+        del signals[:]
+        model.refresh()
+        self.assertEquals(signals, [])
+
+    def test_lazy(self):
+        model = LazyModel(data="abcde")
+        model.setFetchChunkSize(2)
+        self.assertEquals(model.isLazy(), True)
+        root = QtCore.QModelIndex()
+        self.assertEquals(model.rowCount(), 0)
+        self.assertEquals(model.hasChildren(), True)
+        self.assertEquals(model.canFetchMore(root), True)
+        model.fetchMore(root)
+        self.assertEquals(model.rowCount(), 2)
+        self.assertEquals(model.hasPendingChildren(), True)
+        model.fetchAll()
+        self.assertEquals(model.hasPendingChildren(), False)
+        self.assertEquals(model.rowCount(), 5)
+        self.assertEquals(model.canFetchMore(root), False)
+        self.assertEquals(model.data(model.index(4, 0)), "e")
+        self.assertRows(model._rootItem)
+
+        # the text filter fetches the lazy children when it is applied
+        model = LazyModel(data="abcde")
+        proxy = BaseProxyModel()
+        proxy.setSourceModel(model)
+        proxy.setFilterText("e")
+        self.assertEquals(model.rowCount(), 0)
+        proxy.applyFilter()
+        self.assertEquals(model.hasPendingChildren(), False)
+        self.assertEquals(proxy.rowCount(), 1)
+
+    def test_lazyQObject(self):
+        from qarbon.qt.gui.treeqobject import TreeQObjectInfoModel
+        w = QtGui.QWidget()
+        layout = QtGui.QVBoxLayout(w)
+        for i in range(3):
+            layout.addWidget(QtGui.QLabel(str(i)))
+        eager = TreeQObjectInfoModel()
+        eager.setLazy(False)
+        eager.setDataSource(w)
+        lazy = TreeQObjectInfoModel(data=w)
+        top = lazy.index(0, 0)
+        self.assertEquals(lazy.rowCount(top), 0)
+        self.assertEquals(lazy.hasChildren(top), True)
+        lazy.fetchAll()
+        self.assertEquals(lazy.rowCount(top), eager.rowCount(eager.index(0, 0)))
+        self.assertEquals(lazy.rowCount(top), 4)
+
+    def test_compactItem(self):
+        item = BaseTreeItem(None, ("a",))
+        self.assertEquals(hasattr(item, "__dict__"), False)
+        self.assertEquals(item.hasChildren(), False)
+        self.assertEquals(item.display(), "('a',)")
+        self.assertEquals(item.updateFrom(BaseTreeItem(None, ("b",))), True)
+        self.assertEquals(item.display(), "('b',)")
+        item.appendChild(BaseTreeItem(None, ("c",), item))
+        self.assertEquals(item.childCount(), 1)
+        self.assertEquals(item.child(0).parent(), item)
+
+    def test_roleCache(self):
+        Qt = QtCore.Qt
+        calls = []
+
+        def display(item, index):
+            calls.append(item)
+            return item.data(index)
+
+        model = SimpleModel(data=["a", "b"])
+        model.setRoleHandler(Qt.DisplayRole, display)
+        model.setRoleCacheEnabled(True)
+        self.assertEquals(model.isRoleCacheEnabled(), True)
+        index = model.index(0, 0)
+        for i in range(3):
+            self.assertEquals(model.data(index), "a")
+        self.assertEquals(len(calls), 1)
+        self.assertEquals(model.data(index, Qt.UserRole),
+                          index.internalPointer())
+        self.assertEquals(model.data(index, Qt.WhatsThisRole), None)
+        model._setData(index, ("z",))
+        self.assertEquals(model.data(index), "z")
+        self.assertEquals(len(calls), 2)
+        stats = model.getRoleStatistics()
+        self.assertEquals(stats[Qt.DisplayRole], 4)
+        self.assertEquals(stats[Qt.UserRole], 1)
+        model.resetRoleStatistics()
+        self.assertEquals(model.getRoleStatistics(), {})
+        model.setRoleCacheEnabled(False)
+        model.data(index)
+        self.assertEquals(len(calls), 3)
+
+    def test_proxyFilter(self):
+        names = ["item %d" % i for i in range(1000)]
+        model = SimpleModel(data=names)
+        proxy = BaseProxyModel()
+        proxy.setSourceModel(model)
+        proxy.setFilterDelay(0)
+        finished = []
+        proxy.filterFinished.connect(lambda: finished.append(1))
+
+        proxy.setFilterText("Item 99")
+        self.assertEquals(proxy.isFiltering(), True)
+        proxy.applyFilter()
+        self.assertEquals(proxy.isFiltering(), False)
+        self.assertEquals(len(finished), 1)
+        self.assertEquals(proxy.rowCount(),
+                          len([n for n in names if n.startswith("item 99")]))
+
+        proxy.setFilterSubstring(True)
+        for text in ("9", "99", "199"):
+            proxy.setFilterText(text)
+            proxy.applyFilter()
+            self.assertEquals(proxy.rowCount(),
+                              len([n for n in names if text in n]))
+
+        proxy.setFilterText("")
+        proxy.applyFilter()
+        self.assertEquals(proxy.rowCount(), len(names))
+
+    def test_proxyFilterTree(self):
+        model = LazyModel(data=["a", "b"])
+        model.fetchAll()
+        root = model._rootItem
+        leaf = BaseTreeItem(model, ("leaf",), root.child(1))
+        root.child(1).appendChild(leaf)
+        proxy = BaseProxyModel()
+        proxy.setSourceModel(model)
+        proxy.setFilterText("lea")
+        proxy.applyFilter()
+        # the parent of the match is kept
+        self.assertEquals(proxy.rowCount(), 1)
+        parent = proxy.index(0, 0)
+        self.assertEquals(proxy.data(parent), "b")
+        self.assertEquals(proxy.rowCount(parent), 1)
+
+    def test_proxyFilterUpdate(self):
+        model = NestedModel(data=[("a", ["a1", "a2"]), ("b", ["b1"])])
+        model.setIncrementalRefresh(True)
+        proxy = BaseProxyModel()
+        proxy.setSourceModel(model)
+        proxy.setFilterDelay(0)
+        proxy.setFilterText("x")
+        proxy.applyFilter()
+        self.assertEquals(proxy.rowCount(), 0)
+        keys = proxy._filterKeys
+
+        # an inserted match accepts its parent
+        model._data_src = [("a", ["a1", "a2"]), ("b", ["b1", "x1"])]
+        model.refresh()
+        self.assertEquals(proxy.rowCount(), 1)
+        branch = proxy.index(0, 0)
+        self.assertEquals(proxy.data(branch), "b")
+        self.assertEquals(proxy.data(proxy.index(0, 0, branch)), "x1")
+
+        # a changed item
+        model.setItemData(model._rootItem.child(0).child(1), ("x2",))
+        model.flushChanges()
+        self.assertEquals(proxy.rowCount(), 2)
+
+        # a removed match rejects its parent
+        model._data_src = [("a", ["a1", "x2"]), ("b", ["b1"])]
+        model.refresh()
+        self.assertEquals(proxy.rowCount(), 1)
+        self.assertEquals(proxy.data(proxy.index(0, 0)), "a")
+
+        # neither the filter keys nor the filter were rebuilt
+        self.assertEquals(proxy._filterKeys is keys, True)
+        self.assertEquals(proxy.isFiltering(), False)
+        self.assertEquals(sorted(keys.values()),
+                          ["a", "a1", "b", "b1", "x2"])
+
+        # the sorted keys follow the changes
+        proxy.setFilterText("b")
+        proxy.applyFilter()
+        model._data_src = [("a", ["a1", "x2"]), ("b", ["b1", "b2"])]
+        model.refresh()
+        self.assertEquals(proxy._sortedFilterKeys[0],
+                          ["a", "a1", "b", "b1", "b2", "x2"])
+        self.assertEquals(proxy.rowCount(proxy.index(0, 0)), 2)
+
+    def test_refreshAsync(self):
+        model = AsyncModel(data=["a", "b"])
+        self.assertEquals(model.hasItemBuilder(), True)
+        self.assertEquals(model.rowCount(), 2)
+        progress, finished = [], []
+        model.refreshProgress.connect(lambda d, t: progress.append((d, t)))
+        model.refreshFinished.connect(lambda: finished.append(1))
+        model._data_src = ["x%d" % i for i in range(200)]
+        model.refreshAsync()
+        self.assertEquals(model.isRefreshing(), True)
+        # supersedes the previous one
+        model._data_src = ["y", "z", "w"]
+        model.refreshAsync()
+        # still showing the old items
+        self.assertEquals(model.rowCount(), 2)
+        t0 = time.time()
+        while model.isRefreshing() and time.time() - t0 < 10:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertEquals(finished, [1])
+        self.assertEquals([model.data(model.index(row, 0))
+                           for row in range(model.rowCount())],
+                          ["y", "z", "w"])
+        self.assertEquals(progress[-1], (3, 3))
+        self.assertEquals(SimpleModel().hasItemBuilder(), False)
+
+        model = FailingModel(data=["a"])
+        failed, finished = [], []
+        model.refreshFailed.connect(failed.append)
+        model.refreshFinished.connect(lambda: finished.append(1))
+        model._data_src = "fail"
+        model.refreshAsync()
+        t0 = time.time()
+        while model.isRefreshing() and time.time() - t0 < 10:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertEquals(failed, ["ValueError: cannot build"])
+        self.assertEquals(finished, [])
+        # the old items are kept
+        self.assertEquals(model.data(model.index(0, 0)), "a")
+
+    def test_itemChanged(self):
+        model = SimpleModel(data=["a", "b", "c", "d", "e"])
+        changed = []
+        model.dataChanged.connect(
+            lambda tl, br, *args: changed.append(((tl.row(), tl.column()),
+                                                  (br.row(), br.column()))))
+        root = model._rootItem
+        for row in (0, 1, 3):
+            model.setItemData(root.child(row), ("x%d" % row,))
+        model.itemChanged(root.child(4), columns=(0,))
+        model.itemChanged(root.child(3))
+        self.assertEquals(changed, [])
+        self.app.processEvents()
+        self.assertEquals(sorted(changed), [((0, 0), (1, 0)),
+                                            ((3, 0), (3, 0)),
+                                            ((4, 0), (4, 0))])
+        self.assertEquals(model.data(model.index(1, 0)), "x1")
+
+        del changed[:]
+        model.setUpdateInterval(50)
+        self.assertEquals(model.updateInterval(), 50)
+        model.itemChanged(root.child(2))
+        removed = root.removeChild(1)
+        model.itemChanged(removed)
+        model.flushChanges()
+        self.assertEquals(changed, [((1, 0), (1, 0))])
+
+    def test_searchIndex(self):
+        model = SimpleModel(data=["motor 1", "motor 12", "counter 1",
+                                  "<b>Motor</b> 2"])
+        model.setIncrementalRefresh(True)
+        index = model.searchIndex()
+        self.assertEquals(model.searchIndex() is index, True)
+        names = lambda items: [item.itemData()[0] for item in items]
+        self.assertEquals(names(index.search("MOT 1")),
+                          ["motor 1", "motor 12"])
+        self.assertEquals(names(index.search("mot")),
+                          ["motor 1", "motor 12", "<b>Motor</b> 2"])
+        self.assertEquals(index.search("b"), [])
+        self.assertEquals(index.search(""), [])
+
+        # incremental updates
+        model._data_src = ["counter 1", "motor 12", "motor 3"]
+        model.refresh()
+        self.assertEquals(index.isBuilt(), True)
+        self.assertEquals(names(index.search("motor")),
+                          ["motor 12", "motor 3"])
+        model.setItemData(model._rootItem.child(0), ("motor 0",))
+        model.flushChanges()
+        self.assertEquals(names(index.search("mo")),
+                          ["motor 0", "motor 12", "motor 3"])
+        model.setDataSource(["motor 4"])
+        self.assertEquals(index.isBuilt(), False)
+        self.assertEquals(names(index.search("motor")), ["motor 4"])
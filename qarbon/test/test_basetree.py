@@ -0,0 +1,199 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+from qarbon.test.base import QarbonBaseTest, TreeModel
+from qarbon.external.qt import QtCore
+from qarbon.qt.gui.basemodel import BaseProxyModel
+from qarbon.qt.gui.basetree import BaseTreeWidget
+
+
+class TreeWidget(BaseTreeWidget):
+
+    KnownPerspectives = {
+        "Default": {
+            "label": "Default",
+            "tooltip": "",
+            "icon": "",
+            "model": [TreeModel],
+        },
+    }
+
+    DftPerspective = "Default"
+
+
+class TwoPerspectivesWidget(TreeWidget):
+
+    KnownPerspectives = dict(TreeWidget.KnownPerspectives, Other={
+        "label": "Other",
+        "tooltip": "",
+        "icon": "",
+        "model": [TreeModel],
+    })
+
+
+class TestBaseTree(QarbonBaseTest):
+
+    def test_expandAll(self):
+        w = TreeWidget()
+        w.getQModel().setDataSource(10)
+        w.setExpandChunkSize(3)
+        w.show()
+        tree, model = w.treeView(), w.getQModel()
+
+        w.expandAllTree()
+        self.assertEquals(w.isExpandingAll(), True)
+        w._expandStep()
+        expanded = [row for row in range(10)
+                    if tree.isExpanded(model.index(row, 0))]
+        self.assertEquals(len(expanded), 3)
+        # a second trigger cancels
+        w.expandAllTree()
+        self.assertEquals(w.isExpandingAll(), False)
+
+        w.collapseAllTree()
+        w.expandAllTree()
+        for i in range(10):
+            if not w.isExpandingAll():
+                break
+            w._expandStep()
+        self.assertEquals(w.isExpandingAll(), False)
+        self.assertEquals(all([tree.isExpanded(model.index(row, 0))
+                               for row in range(10)]), True)
+
+        # the rows visited per step are bounded too, breadth first
+        w.collapseAllTree()
+        w.MaxExpandStepRows = 4
+        w.expandAllTree()
+        w._expandStep()
+        self.assertEquals([entry[1] for entry in w._expandQueue],
+                          [4, 0, 0, 0, 0])
+        w._expandStep()
+        self.assertEquals([entry[1] for entry in w._expandQueue],
+                          [8, 0, 0, 0, 0, 0, 0, 0, 0])
+        self.assertEquals(tree.isExpanded(model.index(0, 0)), False)
+        for i in range(100):
+            if not w.isExpandingAll():
+                break
+            w._expandStep()
+        self.assertEquals(w.isExpandingAll(), False)
+        self.assertEquals(all([tree.isExpanded(model.index(row, 0))
+                               for row in range(10)]), True)
+
+    def test_resizeColumns(self):
+        w = TreeWidget()
+        w.getQModel().setDataSource(50)
+        w.show()
+        tree, model = w.treeView(), w.getQModel()
+        tree.expand(model.index(0, 0))
+        header = tree.header()
+        header.setStretchLastSection(False)
+        if hasattr(header, "setSectionResizeMode"):
+            header.setSectionResizeMode(0, header.Interactive)
+        else:
+            header.setResizeMode(0, header.Interactive)
+        self.assertEquals(len(w._sampleRows()) <= 2 * w.MaxSampledRows, True)
+
+        width = w.estimateColumnWidth(0)
+        self.assertEquals(width >= header.sectionSizeHint(0), True)
+        # columns are only widened
+        tree.setColumnWidth(0, width + 100)
+        w.resizeColumns()
+        self.assertEquals(tree.columnWidth(0), width + 100)
+        tree.setColumnWidth(0, 1)
+        w.resizeColumns()
+        self.assertEquals(tree.columnWidth(0), width)
+
+    def test_perspectiveCache(self):
+        w = TwoPerspectivesWidget()
+        w.getBaseQModel().setDataSource(5)
+        tree = w.treeView()
+        model = default = w.getBaseQModel()
+        tree.expand(model.index(2, 0))
+        tree.setCurrentIndex(model.index(1, 0, model.index(2, 0)))
+
+        w.onSwitchPerspective("Other")
+        other = w.getBaseQModel()
+        self.assertEquals(other is default, False)
+        # the data source follows the perspective switch
+        self.assertEquals(other.dataSource(), 5)
+
+        # switching back reuses the model and its view state
+        w.onSwitchPerspective("Default")
+        self.assertEquals(w.getBaseQModel() is default, True)
+        self.assertEquals(tree.isExpanded(model.index(2, 0)), True)
+        self.assertEquals(tree.currentIndex(),
+                          model.index(1, 0, model.index(2, 0)))
+        self.assertEquals(w.cachedPerspectives(), ["Other", "Default"])
+
+        # a cached model built from another data source is rebuilt
+        w.onSwitchPerspective("Other")
+        w.onSwitchPerspective("Default")
+        other.setDataSource(3)
+        w.onSwitchPerspective("Other")
+        self.assertEquals(w.getBaseQModel() is other, True)
+        self.assertEquals(other.rowCount(), 5)
+
+        # refreshing the current model (the data source may have changed in
+        # place) refreshes the models of the other perspectives when
+        # switching back to them, once
+        refreshed = []
+        default.refreshFinished.connect(lambda: refreshed.append(True))
+        w.onSwitchPerspective("Default")
+        self.assertEquals(refreshed, [])
+        w.onSwitchPerspective("Other")
+        other.refresh()
+        self.assertEquals(w.cachedPerspectives(), ["Default", "Other"])
+        w.onSwitchPerspective("Default")
+        self.assertEquals(w.getBaseQModel() is default, True)
+        self.assertEquals(refreshed, [True])
+        self.assertEquals(default.rowCount(), 5)
+        w.onSwitchPerspective("Other")
+        w.onSwitchPerspective("Default")
+        self.assertEquals(refreshed, [True])
+
+        w.setModelCacheSize(1)
+        self.assertEquals(w.cachedPerspectives(), ["Default"])
+        w.onSwitchPerspective("Other")
+        self.assertEquals(w.getBaseQModel() is other, False)
+
+    def test_perspectiveCacheSharedProxy(self):
+        w = TwoPerspectivesWidget(proxy=BaseProxyModel())
+        w.getBaseQModel().setDataSource(5)
+        w.onSwitchPerspective("Other")
+        w.setModelCacheSize(1)
+        # the evicted model is deleted, not the one shown through the proxy
+        QtCore.QCoreApplication.sendPostedEvents(
+            None, QtCore.QEvent.DeferredDelete)
+        self.assertEquals(w.cachedPerspectives(), ["Other"])
+        self.assertEquals(w.getQModel().rowCount(), 5)
+        self.assertEquals(w.getBaseQModel().rowCount(), 5)
+
+    def test_search(self):
+        w = TreeWidget()
+        w.getBaseQModel().setDataSource(4)
+        tree, model = w.treeView(), w.getBaseQModel()
+        w.getSearchBar().setSearchText("leaf 2")
+        self.assertEquals(w.searchText(), "leaf 2")
+        self.assertEquals(len(w.searchMatches()), 4)
+
+        item = w.findNext()
+        self.assertEquals(item is model._rootItem.child(0).child(2), True)
+        # only the ancestors of the match are expanded
+        self.assertEquals([tree.isExpanded(model.index(row, 0))
+                           for row in range(4)], [True, False, False, False])
+        self.assertEquals(tree.currentIndex().internalPointer() is item, True)
+        self.assertEquals(w.findNext() is model._rootItem.child(1).child(2),
+                          True)
+        self.assertEquals(w.findPrevious() is item, True)
+        # wraps around
+        self.assertEquals(w.findPrevious() is
+                          model._rootItem.child(3).child(2), True)
+        w.setSearchText("nothing")
+        self.assertEquals(w.findNext(), None)
@@ -0,0 +1,86 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+from qarbon.test.base import QarbonBaseTest
+from qarbon.external.qt import QtGui
+from qarbon.meta import State
+from qarbon.color import getColorFromState, getCSSColorFromState, \
+    registerStateColor, getRGBAFromStates, getBgFgRGBAFromStates
+from qarbon.qt.gui.color import getStateStyle, getBgQColorFromState, \
+    getFgQColorFromState, getQPaletteFromState
+
+
+class TestStateColor(QarbonBaseTest):
+
+    def setUp(self):
+        QarbonBaseTest.setUp(self)
+        self._orig = getColorFromState(State.Alarm)
+
+    def tearDown(self):
+        registerStateColor(State.Alarm, *self._orig)
+        QarbonBaseTest.tearDown(self)
+
+    def test_stateStyle(self):
+        for state in list(State) + [None]:
+            bg, fg = getColorFromState(state)
+            style = getStateStyle(state)
+            self.assertEquals(style.css, getCSSColorFromState(state))
+            self.assertEquals(style.bg.getRgb(), bg)
+            self.assertEquals(style.fg.getRgb(), fg)
+            self.assertEquals(getBgQColorFromState(state), style.bg)
+            self.assertEquals(getFgQColorFromState(state), style.fg)
+            self.assertEquals(style.bgBrush.color(), style.bg)
+            palette = getQPaletteFromState(state)
+            self.assertEquals(palette.color(QtGui.QPalette.Window), style.bg)
+            self.assertEquals(palette.color(QtGui.QPalette.WindowText),
+                              style.fg)
+        self.assert_(getStateStyle(State.On) is getStateStyle(State.On),
+                     "State style rebuilt!")
+
+    def test_registerStateColor(self):
+        style = getStateStyle(State.Alarm)
+        registerStateColor(State.Alarm, (1, 2, 3, 255), (4, 5, 6, 255))
+        self.assertEquals(getCSSColorFromState(State.Alarm),
+                          "background-color: rgba(1, 2, 3, 255); "
+                          "color: rgba(4, 5, 6, 255);")
+        new_style = getStateStyle(State.Alarm)
+        self.assert_(new_style is not style, "State style not rebuilt!")
+        self.assertEquals(new_style.bg.getRgb(), (1, 2, 3, 255))
+        self.assertEquals(new_style.fg.getRgb(), (4, 5, 6, 255))
+
+    def test_RGBAFromStates(self):
+        try:
+            import numpy
+        except ImportError:
+            return
+
+        states = numpy.array([[State.On.value, State.Fault.value],
+                              [-1, 1000]], dtype=numpy.int16)
+        bg = getRGBAFromStates(states)
+        self.assertEquals(bg.shape, (2, 2, 4))
+        self.assertEquals(bg.dtype, numpy.uint8)
+        self.assertEquals(tuple(bg[0, 0]), getColorFromState(State.On)[0])
+        self.assertEquals(tuple(bg[0, 1]), getColorFromState(State.Fault)[0])
+        invalid = getColorFromState(State._Invalid)[0]
+        self.assertEquals(tuple(bg[1, 0]), invalid)
+        self.assertEquals(tuple(bg[1, 1]), invalid)
+
+        out = numpy.zeros((2, 2, 4), dtype=numpy.uint8)
+        fg = getRGBAFromStates(states, foreground=True, out=out)
+        self.assert_(fg is out, "Result not written to out!")
+        self.assertEquals(tuple(fg[0, 0]), getColorFromState(State.On)[1])
+
+        bg, fg = getBgFgRGBAFromStates([State.Moving, None])
+        self.assertEquals(tuple(bg[0]), getColorFromState(State.Moving)[0])
+        self.assertEquals(tuple(fg[1]), getColorFromState(None)[1])
+
+        registerStateColor(State.Alarm, (1, 2, 3, 255), (4, 5, 6, 255))
+        bg = getRGBAFromStates([State.Alarm.value])
+        self.assertEquals(tuple(bg[0]), (1, 2, 3, 255))
@@ -0,0 +1,99 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import shutil
+import tempfile
+
+from qarbon.test.base import QarbonBaseTest
+from qarbon.external.qt import QtCore
+from qarbon.qt.gui.eventprofiler import EventProfiler, EventProfilerWidget, \
+    getEventTypeName
+
+
+class Sender(QtCore.QObject):
+    """Sends a nested event to its target when receiving a user event"""
+
+    def __init__(self, target):
+        QtCore.QObject.__init__(self)
+        self.setObjectName("sender")
+        self.target = target
+
+    def event(self, event):
+        if event.type() == QtCore.QEvent.User:
+            QtCore.QCoreApplication.sendEvent(
+                self.target, QtCore.QEvent(QtCore.QEvent.User))
+            return True
+        return QtCore.QObject.event(self, event)
+
+
+class TestEventProfiler(QarbonBaseTest):
+
+    def test_eventTypeName(self):
+        self.assertEquals(getEventTypeName(QtCore.QEvent.Paint), "Paint")
+        self.assertEquals(getEventTypeName(int(QtCore.QEvent.User) + 3),
+                          "User+3")
+
+    def test_count(self):
+        profiler = EventProfiler()
+        target = QtCore.QObject()
+        target.setObjectName("target")
+        profiler.start()
+        self.assertEquals(profiler.isRunning(), True)
+        for i in range(3):
+            self.app.sendEvent(target, QtCore.QEvent(QtCore.QEvent.User))
+        profiler.stop()
+        self.app.sendEvent(target, QtCore.QEvent(QtCore.QEvent.User))
+        stats = [stat for stat in profiler.statistics()
+                 if stat["objectName"] == "target"]
+        self.assertEquals(len(stats), 1)
+        self.assertEquals((stats[0]["event"], stats[0]["className"],
+                           stats[0]["count"]), ("User", "QObject", 3))
+        profiler.clear()
+        self.assertEquals(profiler.statistics(), [])
+
+    def test_time(self):
+        # what ProfilingApplication.notify does
+        profiler = EventProfiler()
+        profiler.start()
+        profiler.stop()
+        sender = Sender(QtCore.QObject())
+        for i in range(2):
+            profiler._notify(self.app, sender,
+                             QtCore.QEvent(QtCore.QEvent.User))
+        stats = profiler.hotSpots(sortBy="time")
+        self.assertEquals(stats[0]["objectName"], "sender")
+        self.assertEquals(stats[0]["count"], 2)
+        self.assertTrue(stats[0]["time"] >= stats[0]["selfTime"] >= 0)
+        self.assertTrue(stats[0]["maxTime"] <= stats[0]["time"])
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "events.json")
+            profiler.exportJSON(filename)
+            with open(filename) as f:
+                data = json.load(f)
+            self.assertEquals(data["statistics"][0]["event"], "User")
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_widget(self):
+        profiler = EventProfiler()
+        w = EventProfilerWidget(profiler=profiler)
+        target = QtCore.QObject()
+        target.setObjectName("target")
+        w.onStartToggled(True)
+        self.app.sendEvent(target, QtCore.QEvent(QtCore.QEvent.User))
+        w.onStartToggled(False)
+        model = w.getBaseQModel()
+        labels = [model.data(model.index(row, 0))
+                  for row in range(model.rowCount())]
+        self.assertTrue('QObject("target")' in labels)
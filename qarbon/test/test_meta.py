@@ -0,0 +1,37 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from qarbon.meta import State, DataType, DataAccess, toState, toDataAccess
+
+
+class TestMeta(TestCase):
+
+    def test_enumLookup(self):
+        for state in State:
+            self.assert_(toState(state.value) is state, "Wrong state!")
+            self.assert_(toState(state) is state, "Wrong state!")
+        self.assert_(toDataAccess(3) is DataAccess.ReadWrite,
+                     "Wrong data access!")
+        self.assertEquals(len(toState.table), len(State))
+        self.assertRaises(ValueError, toState, -1)
+        self.assertRaises(ValueError, toState, len(State))
+        self.assertRaises(ValueError, toState, None)
+
+    def test_toDataType(self):
+        self.assert_(DataType.toDataType("Int") is DataType.Integer,
+                     "Wrong data type!")
+        self.assert_(DataType.toDataType(float) is DataType.Float,
+                     "Wrong data type!")
+        self.assert_(DataType.toDataType(DataType.String) is DataType.String,
+                     "Wrong data type!")
+        self.assert_(DataType.toPythonType("double") is float,
+                     "Wrong python type!")
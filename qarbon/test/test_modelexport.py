@@ -0,0 +1,76 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+import os
+import csv
+import json
+import shutil
+import tempfile
+
+from qarbon.test.base import QarbonBaseTest, TreeModel
+from qarbon.qt.gui.modelexport import iterModelRows, exportModel, \
+    exportModelAsync
+
+
+class _Stream(object):
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, text):
+        self.lines.append(text)
+
+
+class TestModelExport(QarbonBaseTest):
+
+    def test_iterModelRows(self):
+        model = TreeModel(data=2)
+        self.assertEquals(list(iterModelRows(model)), [
+            (0, "branch 0", "branch 0"),
+            (1, "branch 0/leaf 0", "leaf 0"),
+            (1, "branch 0/leaf 1", "leaf 1"),
+            (0, "branch 1", "branch 1"),
+            (1, "branch 1/leaf 0", "leaf 0"),
+            (1, "branch 1/leaf 1", "leaf 1")])
+
+    def test_exportModel(self):
+        model = TreeModel(data=3)
+        stream = _Stream()
+        self.assertEquals(exportModel(model, stream), 12)
+        lines = "".join(stream.lines).splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEquals(rows[1], {"depth": 1, "path": "branch 0/leaf 0",
+                                    "Name": "leaf 0"})
+        self.assertRaises(ValueError, exportModel, model, stream, "xml")
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "tree.csv")
+            export = exportModelAsync(model, filename, format="csv")
+            finished = []
+            export.finished.connect(finished.append)
+            self.assertEquals(export.wait(10), True)
+            self.assertEquals(finished, [12])
+            self.assertEquals(export.isDone(), True)
+            with open(filename) as f:
+                rows = list(csv.reader(f))
+            self.assertEquals(rows[0], ["depth", "path", "Name"])
+            self.assertEquals(rows[-1], ["1", "branch 2/leaf 2", "leaf 2"])
+            self.assertEquals(len(rows), 13)
+
+            export = exportModelAsync(model, os.path.join(tmpdir, "no",
+                                                          "tree.csv"))
+            failed = []
+            export.failed.connect(failed.append)
+            export.wait(10)
+            self.assertEquals(len(failed), 1)
+            self.assertEquals(export.error(), failed[0])
+        finally:
+            shutil.rmtree(tmpdir)
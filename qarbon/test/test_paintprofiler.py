@@ -0,0 +1,121 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+import gc
+import weakref
+
+from qarbon.test.base import QarbonBaseTest
+from qarbon.external.qt import QtCore, QtGui
+from qarbon.qt.gui.paintprofiler import PaintProfiler, PaintHeatmap, \
+    PaintOverlay
+
+
+class PaintCounter(QtGui.QWidget):
+
+    def __init__(self, parent=None):
+        QtGui.QWidget.__init__(self, parent)
+        self.setObjectName("counter")
+        self.setMinimumSize(100, 100)
+        self.painted = 0
+
+    def paintEvent(self, event):
+        self.painted += 1
+
+
+class TestPaintProfiler(QarbonBaseTest):
+
+    def test_profiler(self):
+        w = PaintCounter()
+        w.show()
+        self.app.processEvents()
+        profiler = PaintProfiler()
+        profiler.start()
+        for i in range(3):
+            w.repaint()
+        profiler.stop()
+        self.assertEquals(profiler.isRunning(), False)
+        w.repaint()
+        # the widget is painted once per paint event
+        self.assertEquals(w.painted >= 4, True)
+        stats = [stat for stat in profiler.statistics()
+                 if stat["widget"] is w]
+        self.assertEquals(len(stats), 1)
+        stat = stats[0]
+        self.assertEquals((stat["className"], stat["objectName"],
+                           stat["count"]), ("PaintCounter", "counter", 3))
+        self.assertEquals(stat["rate"], 3 / profiler.getRateWindow())
+        self.assertTrue(stat["time"] >= stat["maxTime"] >= 0)
+        profiler.clear()
+        self.assertEquals(profiler.statistics(), [])
+
+    def test_profilerReleasesWidgets(self):
+        w = PaintCounter()
+        w.show()
+        self.app.processEvents()
+        profiler = PaintProfiler()
+        profiler.start()
+        w.repaint()
+        profiler.stop()
+        self.assertEquals(len(profiler.statistics()), 1)
+        w.close()
+        ref = weakref.ref(w)
+        del w
+        gc.collect()
+        # the profiler does not keep the painted widget alive
+        self.assertEquals(ref(), None)
+        self.assertEquals(profiler.statistics(), [])
+
+    def test_profilerDeletedWidget(self):
+        heatmap = PaintHeatmap()
+        w = QtGui.QWidget()
+        counter = PaintCounter(w)
+        w.show()
+        self.app.processEvents()
+        heatmap.setEnabled(True)
+        counter.repaint()
+        # deleted in C++ while the python objects are kept
+        w.deleteLater()
+        QtCore.QCoreApplication.sendPostedEvents(
+            None, QtCore.QEvent.DeferredDelete)
+        heatmap.refresh()
+        self.assertEquals([stat for stat in heatmap.profiler().statistics()
+                           if stat["widget"] in (w, counter)], [])
+        heatmap.setEnabled(False)
+        overlay = PaintOverlay(QtGui.QWidget())
+        overlay.setStatistics([dict(widget=counter, rate=1.0,
+                                    meanTime=0.0)], 25.0)
+        self.assertEquals(overlay.cells(), [])
+
+    def test_heatmap(self):
+        heatmap = PaintHeatmap()
+        enabled = []
+        heatmap.enabledChanged.connect(enabled.append)
+        w = QtGui.QWidget()
+        counter = PaintCounter(w)
+        w.show()
+        heatmap.setEnabled(True)
+        counter.repaint()
+        heatmap.refresh()
+        overlays = [overlay for overlay in heatmap.overlays()
+                    if overlay.target() is w]
+        self.assertEquals(len(overlays), 1)
+        overlay = overlays[0]
+        self.assertEquals(overlay.geometry().size(), w.size())
+        self.assertTrue(counter.geometry() in
+                        [cell[0] for cell in overlay.cells()])
+        # the overlay itself is not recorded
+        overlay.repaint()
+        self.assertEquals([stat for stat in heatmap.profiler().statistics()
+                           if isinstance(stat["widget"], PaintOverlay)], [])
+
+        heatmap.setEnabled(False)
+        self.assertEquals(heatmap.profiler().isRunning(), False)
+        self.assertEquals(heatmap.overlays(), [])
+        self.assertEquals(enabled, [True, False])
@@ -0,0 +1,168 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+from qarbon.test.base import QarbonBaseTest
+from qarbon.external.qt import QtCore, QtGui
+from qarbon.qt.gui.pixmapwidget import PixmapWidget
+
+
+class TestPixmapWidget(QarbonBaseTest):
+
+    def _waitScale(self, w):
+        QtCore.QThreadPool.globalInstance().waitForDone()
+        self.app.processEvents()
+
+    def test_progressive(self):
+        pixmap = QtGui.QPixmap(400, 300)
+        pixmap.fill(QtGui.QColor(255, 0, 0))
+
+        w = PixmapWidget()
+        w.progressive = True
+        w.setPixmap(pixmap)
+        w.resize(200, 200)
+        w.show()
+
+        preview = w._getPixmap()
+        self.assertEquals(preview.size(), QtCore.QSize(200, 150),
+                          "Preview has wrong size!")
+        self.assert_(w._scaleJob is not None, "No smooth scaling started!")
+
+        self._waitScale(w)
+        self.assert_(w._scaleJob is None, "Smooth scaling not finished!")
+        smooth = w._getPixmap()
+        self.assert_(smooth is not preview, "Preview not replaced!")
+        self.assertEquals(smooth.size(), QtCore.QSize(200, 150),
+                          "Smooth pixmap has wrong size!")
+
+    def test_progressive_stale(self):
+        pixmap = QtGui.QPixmap(400, 300)
+        pixmap.fill(QtGui.QColor(255, 0, 0))
+
+        w = PixmapWidget()
+        w.progressive = True
+        w.setPixmap(pixmap)
+        w.resize(200, 200)
+        w.show()
+        w._getPixmap()
+        job = w._scaleJob
+        w.resize(100, 100)
+        self.assert_(job.isCancelled(), "Stale job not cancelled!")
+
+        w._getPixmap()
+        self._waitScale(w)
+        self._waitScale(w)
+        self.assertEquals(w._getPixmap().size(), QtCore.QSize(100, 75),
+                          "Smooth pixmap has wrong size!")
+
+    def test_setFrame(self):
+        try:
+            import numpy
+        except ImportError:
+            return
+
+        w = PixmapWidget()
+        w.resize(64, 32)
+
+        frame = numpy.zeros((32, 64), dtype=numpy.uint8)
+        frame[:, 32:] = 255
+        changed = []
+        w.pixmapChanged.connect(lambda: changed.append(w.getPixmap()))
+        w.setFrame(frame)
+        w.setFrame(frame)
+        self.assertEquals(w.getFrameStatistics(),
+                          dict(received=2, displayed=0, dropped=1))
+        w._getPixmap()
+        self.assertEquals(w.getFrameStatistics(),
+                          dict(received=2, displayed=1, dropped=1))
+        # listeners see the displayed frame
+        self.assertEquals(len(changed), 1)
+        self.assertEquals(changed[0].size(), QtCore.QSize(64, 32))
+        image = w.getPixmap().toImage()
+        self.assertEquals(image.size(), QtCore.QSize(64, 32))
+        self.assertEquals(QtGui.qGray(image.pixel(0, 0)), 0)
+        self.assertEquals(QtGui.qGray(image.pixel(63, 0)), 255)
+
+        frame = numpy.zeros((16, 16), dtype=numpy.uint16)
+        frame[0, 0] = 4095
+        w.setFrameLevels((0, 4095))
+        w.setFrame(frame)
+        w._getPixmap()
+        image = w.getPixmap().toImage()
+        self.assertEquals(QtGui.qGray(image.pixel(0, 0)), 255)
+        self.assertEquals(QtGui.qGray(image.pixel(1, 0)), 0)
+
+        frame = numpy.zeros((8, 8, 4), dtype=numpy.uint8)
+        frame[..., 2] = 255
+        frame[..., 3] = 255
+        w.resetFrameLevels()
+        w.setFrame(frame.tobytes(), shape=frame.shape)
+        w._getPixmap()
+        image = w.getPixmap().toImage()
+        self.assertEquals(QtGui.QColor(image.pixel(0, 0)).blue(), 255)
+        self.assertEquals(QtGui.QColor(image.pixel(0, 0)).red(), 0)
+
+        self.assertRaises(ValueError, w.setFrame, b"1234")
+
+    def test_tiledImage(self):
+        try:
+            import numpy
+        except ImportError:
+            return
+
+        image = numpy.zeros((1000, 600), dtype=numpy.uint8)
+        image[:500] = 200
+
+        w = PixmapWidget()
+        w.resize(100, 100)
+        w.setTiledImage(image, tileSize=64)
+        self.assert_(w.isTiled(), "Tiled mode not enabled!")
+        tiles = w._tiles
+        self.assertEquals(tiles.levelCount(), 5)
+        self.assertEquals(tiles.levelShape(4), (63, 38))
+        self.assertEquals(tiles.levelForZoom(w.getZoom()), 3)
+
+        tile = tiles.tile(4, 0, 0)
+        self.assertEquals(tile.shape, (63, 38))
+        self.assertEquals(tile[0, 0], 200)
+        self.assertEquals(tile[-1, 0], 0)
+
+        w.setZoom(1.0, anchor=QtCore.QPointF(0, 0))
+        self.assertEquals(tiles.levelForZoom(w.getZoom()), 0)
+        pixmap = QtGui.QPixmap(w.size())
+        w.render(pixmap)
+        self.assert_(len(w._tileCache) > 0, "No tile drawn!")
+        self.assert_(all(key[0] == 0 for key in w._tileCache),
+                     "Wrong level of detail drawn!")
+
+        w.resetTiledImage()
+        self.assert_(not w.isTiled(), "Tiled mode not disabled!")
+
+    def test_paint(self):
+        pixmap = QtGui.QPixmap(40, 40)
+        pixmap.fill(QtGui.QColor(0, 0, 255))
+
+        w = PixmapWidget()
+        w.resize(100, 40)
+        w.setAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+        w.setPixmap(pixmap)
+        self.assertEquals(w._getPixmapOffset(), QtCore.QPoint(30, 0))
+        self.assert_(not w.testAttribute(QtCore.Qt.WA_OpaquePaintEvent),
+                     "Widget not fully covered but opaque!")
+
+        w.setAspectRatioMode(QtCore.Qt.IgnoreAspectRatio)
+        self.assertEquals(w._getPixmapOffset(), QtCore.QPoint(0, 0))
+        self.assert_(w.testAttribute(QtCore.Qt.WA_OpaquePaintEvent),
+                     "Widget fully covered but not opaque!")
+
+        image = QtGui.QImage(w.size(), QtGui.QImage.Format_ARGB32)
+        image.fill(0)
+        w.render(image, QtCore.QPoint(), QtGui.QRegion(0, 0, 10, 10))
+        self.assertEquals(QtGui.QColor(image.pixel(5, 5)).blue(), 255)
+        self.assertEquals(image.pixel(50, 20), 0)
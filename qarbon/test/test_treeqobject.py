@@ -0,0 +1,206 @@
+# ----------------------------------------------------------------------------
+# This file is part of qarbon (http://qarbon.rtfd.org/)
+#
+# Copyright (c) 2013 European Synchrotron Radiation Facility, Grenoble, France
+#
+# Distributed under the terms of the GNU Lesser General Public License,
+# either version 3 of the License, or (at your option) any later version.
+# See LICENSE.txt for more info.
+# ----------------------------------------------------------------------------
+
+import sys
+
+from qarbon.test.base import QarbonBaseTest
+from qarbon.external.qt import QtCore, QtGui
+from qarbon.qt.gui.treeqobject import TreeQObjectInfoModel, getQObjectTree, \
+    getQObjectTreeStr, getQObjectIcon, registerQObjectIcon, \
+    unregisterQObjectIcon, QObjectSnapshot, QObjectLeakSampler
+
+
+class MyLabel(QtGui.QLabel):
+    pass
+
+
+class MyLabel2(MyLabel):
+    pass
+
+
+class TestTreeQObject(QarbonBaseTest):
+
+    def test_deepTree(self):
+        top = qobject = QtCore.QObject()
+        depth = sys.getrecursionlimit() + 10
+        for i in range(depth):
+            qobject = QtCore.QObject(qobject)
+        tree = getQObjectTree(qobject=top)
+        for i in range(depth):
+            tree = tree[0][1]
+        self.assertEquals(tree, [(qobject, [])])
+        self.assertEquals(len(getQObjectTreeStr(qobject=top)), 1)
+        model = TreeQObjectInfoModel()
+        model.setLazy(False)
+        model.setDataSource(top)
+        item = model._rootItem
+        for i in range(depth + 1):
+            item = item.child(0)
+        self.assertEquals(item.qobject() is qobject, True)
+
+    def test_live(self):
+        top = QtCore.QObject()
+        a, b = QtCore.QObject(top), QtCore.QObject(top)
+        a.setObjectName("a")
+        model = TreeQObjectInfoModel(data=top)
+        model.fetchAll()
+        model.setLive(True)
+        model.setLiveUpdateInterval(0)
+        signals = []
+
+        def recorder(name):
+            return lambda *args: signals.append(name)
+
+        for name in ("modelReset", "rowsInserted", "rowsRemoved"):
+            getattr(model, name).connect(recorder(name))
+        topIndex = model.index(0, 0)
+        self.assertEquals(model.rowCount(topIndex), 2)
+
+        c = QtCore.QObject(top)
+        c.setObjectName("c")
+        b.setParent(None)
+        QtCore.QObject(a)
+        self.app.processEvents()
+        self.assertEquals(sorted(signals),
+                          ["rowsInserted", "rowsInserted", "rowsRemoved"])
+        self.assertEquals(model.rowCount(model.index(0, 0, topIndex)), 1)
+        self.assertEquals([model.data(model.index(row, 1, topIndex))
+                           for row in range(model.rowCount(topIndex))],
+                          ["a", "c"])
+
+        c.setObjectName("new c")
+        self.app.processEvents()
+        self.assertEquals(model.data(model.index(1, 1, topIndex)), "new c")
+
+        model.setLive(False)
+        del signals[:]
+        QtCore.QObject(top)
+        self.app.processEvents()
+        self.assertEquals(signals, [])
+        self.assertEquals(model.rowCount(topIndex), 2)
+
+    def test_liveWidget(self):
+        # a tracked widget receives many other events (paint, deferred
+        # delete, ...) than the child ones
+        top = QtGui.QWidget()
+        child = QtGui.QWidget(top)
+        model = TreeQObjectInfoModel(data=top)
+        model.fetchAll()
+        model.setLive(True)
+        model.setLiveUpdateInterval(0)
+        topIndex = model.index(0, 0)
+        self.assertEquals(model.rowCount(topIndex), 1)
+        top.show()
+        top.repaint()
+        child.deleteLater()
+        QtCore.QCoreApplication.sendPostedEvents(
+            None, QtCore.QEvent.DeferredDelete)
+        self.app.processEvents()
+        self.assertEquals(model.rowCount(topIndex), 0)
+        model.setLive(False)
+
+    def test_lazyDeletedChild(self):
+        for fetchAll in (False, True):
+            top = QtCore.QObject()
+            a, b = QtCore.QObject(top), QtCore.QObject(top)
+            QtCore.QObject(a)
+            b.setObjectName("b")
+            model = TreeQObjectInfoModel(data=top)
+            topIndex = model.index(0, 0)
+            inserted = []
+            model.rowsInserted.connect(
+                lambda parent, first, last: inserted.append((first, last)))
+            # a is deleted in C++ (the python object is kept) before being
+            # fetched
+            a.deleteLater()
+            QtCore.QCoreApplication.sendPostedEvents(
+                None, QtCore.QEvent.DeferredDelete)
+            if fetchAll:
+                model.fetchAll()
+            else:
+                model.fetchMore(topIndex)
+            self.assertEquals(model.rowCount(topIndex), 1)
+            self.assertEquals(model.data(model.index(0, 1, topIndex)), "b")
+            self.assertEquals(inserted[-1], (0, 0))
+            self.assertEquals(model.canFetchMore(topIndex), False)
+
+    def test_qobjectIcon(self):
+        a, b = QtGui.QLabel(), QtGui.QLabel()
+        label = getQObjectIcon(a)
+        self.assertEquals(label.isNull(), False)
+        self.assertEquals(getQObjectIcon(b) is label, True)
+        self.assertEquals(getQObjectIcon(MyLabel2()).cacheKey(),
+                          label.cacheKey())
+
+        icon = QtGui.QIcon(QtGui.QPixmap(4, 4))
+        registerQObjectIcon(MyLabel, icon)
+        try:
+            # also used for subclasses
+            self.assertEquals(getQObjectIcon(MyLabel2()).cacheKey(),
+                              icon.cacheKey())
+            self.assertEquals(getQObjectIcon(a) is label, True)
+        finally:
+            unregisterQObjectIcon(MyLabel)
+        self.assertEquals(getQObjectIcon(MyLabel2()).cacheKey(),
+                          getQObjectIcon(a).cacheKey())
+
+    def test_snapshot(self):
+        className = lambda klass: klass.__module__ + "." + klass.__name__
+        top = QtGui.QWidget()
+        top.setObjectName("top")
+        QtCore.QObject(top)
+        before = QObjectSnapshot(top)
+        self.assertEquals(len(before), 2)
+        for i in range(3):
+            MyLabel(top).setObjectName("zombie")
+        after = QObjectSnapshot(top)
+        label = className(MyLabel)
+        self.assertEquals(after.counts()[label], 3)
+        self.assertEquals(after.diff(before), [(label, 0, 3)])
+        self.assertTrue("+3" in after.report(before))
+        entries = list(after.entries(label))
+        self.assertEquals(entries[0][1:], (label, "zombie",
+            ['{0}("top")'.format(className(QtGui.QWidget))]))
+        self.assertEquals(len(list(after.newEntries(before))), 3)
+
+        # snapshots only keep weak references
+        del entries
+        for label in top.findChildren(MyLabel):
+            label.setParent(None)
+        label = None
+        self.assertEquals(after.objects(className(MyLabel)), [])
+
+    def test_leakSampler(self):
+        top = QtCore.QObject()
+        sampler = QObjectLeakSampler(top)
+        samples = []
+        sampler.sampled.connect(lambda snapshot, diff: samples.append(diff))
+        sampler.start(60000)
+        self.assertEquals(sampler.isRunning(), True)
+        child = QtCore.QObject(top)
+        snapshot = sampler.sample()
+        self.assertEquals(sampler.snapshot() is snapshot, True)
+        klass = QtCore.QObject.__module__ + ".QObject"
+        self.assertEquals(samples, [[(klass, 1, 2)]])
+        sampler.stop()
+        self.assertEquals(sampler.isRunning(), False)
+
+        # a destroyed object stops the sampler (instead of sampling the
+        # whole application)
+        sampler.start(60000)
+        top.deleteLater()
+        QtCore.QCoreApplication.sendPostedEvents(
+            None, QtCore.QEvent.DeferredDelete)
+        self.assertEquals(sampler.sample(), None)
+        self.assertEquals(sampler.isRunning(), False)
+        self.assertEquals(len(samples), 1)
+        del top
+        sampler.start(60000)
+        self.assertEquals(sampler.isRunning(), False)